@@ -1,107 +1,190 @@
-import json
 import os
+import sys
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.utils import ImageReader
 
-def reconstruct_pdf_from_json(json_path, output_pdf_path="recreated.pdf"):
-    # Load JSON
-    with open(json_path, "r", encoding="utf-8") as f:
-        pdf_data = json.load(f)
-
-    c = canvas.Canvas(output_pdf_path, pagesize=letter)
-    page_width, page_height = letter
-
-    # Allowed built-in fonts
-    allowed_fonts = ["Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Times-Roman", "Courier"]
-
-    # Resolve base folder for relative paths
-    base_dir = os.path.dirname(json_path)
-
-    for page in pdf_data["pages"]:
-        page_w = page.get("width", page_width)
-        page_h = page.get("height", page_height)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "pythonService"))
+
+from app.pdfParser.layoutFormat import iterLayoutFile
+
+# Allowed built-in fonts
+allowed_fonts = ["Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Times-Roman", "Courier"]
+
+def resolve_font(font):
+    font_name = font.get("name", "Helvetica")
+    font_size = font.get("size", 12)
+    # Map unknown fonts to Helvetica variants
+    if "Bold" in font_name or font.get("bold", False):
+        font_name = "Helvetica-Bold"
+    elif "Oblique" in font_name or font.get("italic", False):
+        font_name = "Helvetica-Oblique"
+    elif font_name not in allowed_fonts:
+        font_name = "Helvetica"
+    return font_name, font_size
+
+class PageRenderer:
+    """
+    Draws layout pages onto one canvas. Decoded images are cached by path, and consecutive
+    text spans go into a single text object that only switches font when the font changes.
+    """
+    def __init__(self, c, base_dir):
+        self.c = c
+        self.base_dir = base_dir
+        self.images = {}  # path -> ImageReader, or None if missing/unreadable
+
+    def image(self, src):
+        img_path = src if os.path.isabs(src) else os.path.join(self.base_dir, src)
+        if img_path not in self.images:
+            self.images[img_path] = None
+            if not os.path.exists(img_path):
+                print(f"⚠️ Image not found: {img_path}")
+            else:
+                try:
+                    self.images[img_path] = ImageReader(img_path)
+                except Exception as e:
+                    print(f"⚠️ Failed to read image {img_path}: {e}")
+        return self.images[img_path]
+
+    def draw_page(self, page):
+        c = self.c
+        page_w = page.get("width", letter[0])
+        page_h = page.get("height", letter[1])
         c.setPageSize((page_w, page_h))
 
+        text, current_font = None, None
         for element in page["elements"]:
             etype = element["type"]
             pos = element["position"]
 
             if etype == "textbox":
-                font_name = element.get("font", {}).get("name", "Helvetica")
-                font_size = element.get("font", {}).get("size", 12)
-                bold = element.get("font", {}).get("bold", False)
-                italic = element.get("font", {}).get("italic", False)
-
-                # Map unknown fonts to Helvetica variants
-                if "Bold" in font_name or bold:
-                    font_name = "Helvetica-Bold"
-                elif "Oblique" in font_name or italic:
-                    font_name = "Helvetica-Oblique"
-                elif font_name not in allowed_fonts:
-                    font_name = "Helvetica"
-
-                try:
-                    c.setFont(font_name, font_size)
-                except Exception:
-                    c.setFont("Helvetica", 12)
-
-                x = pos["x"]
-                y = page_h - pos["y"] - pos["height"]
-                text = element.get("content", "")
-                c.drawString(x, y, text)
-
-            elif etype == "image":
-                img_path = element.get("src")
-                if img_path:
-                    # Fix relative path issue
-                    if not os.path.isabs(img_path):
-                        img_path = os.path.join(base_dir, img_path)
-
-                    if os.path.exists(img_path):
-                        try:
-                            img = ImageReader(img_path)
-                            x = pos["x"]
-                            y = page_h - pos["y"] - pos["height"]
-                            width = pos["width"]
-                            height = pos["height"]
-                            c.drawImage(img, x, y, width=width, height=height)
-                            print(f"✅ Placed image: {img_path}")
-                        except Exception as e:
-                            print(f"⚠️ Failed to draw image {img_path}: {e}")
-                    else:
-                        print(f"⚠️ Image not found: {img_path}")
+                if text is None:
+                    text, current_font = c.beginText(), None
+                font = resolve_font(element.get("font", {}))
+                if font != current_font:
+                    try:
+                        text.setFont(*font)
+                    except Exception:
+                        text.setFont("Helvetica", 12)
+                    current_font = font
+                text.setTextOrigin(pos["x"], page_h - pos["y"] - pos["height"])
+                text.textOut(element.get("content", ""))
+                continue
+
+            # Flush pending text so elements keep their stacking order
+            if text is not None:
+                c.drawText(text)
+                text = None
+
+            if etype == "image":
+                img = self.image(element["src"]) if element.get("src") else None
+                if img is not None:
+                    try:
+                        c.drawImage(img, pos["x"], page_h - pos["y"] - pos["height"],
+                                    width=pos["width"], height=pos["height"])
+                    except Exception as e:
+                        print(f"⚠️ Failed to draw image {element['src']}: {e}")
 
             elif etype == "table":
-                x0 = pos["x"]
-                y0 = page_h - pos["y"] - pos["height"]
-                table_data = element.get("content", [])
-
-                if table_data:
-                    num_rows = len(table_data)
-                    num_cols = len(table_data[0]) if num_rows > 0 else 0
-                    if num_rows > 0 and num_cols > 0:
-                        cell_w = pos["width"] / num_cols
-                        cell_h = pos["height"] / num_rows
-
-                        # Draw cell borders
-                        for i in range(num_rows + 1):
-                            c.line(x0, y0 + i * cell_h, x0 + pos["width"], y0 + i * cell_h)
-                        for j in range(num_cols + 1):
-                            c.line(x0 + j * cell_w, y0, x0 + j * cell_w, y0 + pos["height"])
-
-                        # Draw cell content
-                        for i, row in enumerate(table_data):
-                            for j, cell_text in enumerate(row):
-                                text_x = x0 + j * cell_w + 2
-                                text_y = y0 + pos["height"] - (i + 1) * cell_h + 2
-                                c.setFont("Helvetica", 10)
-                                c.drawString(text_x, text_y, str(cell_text))
+                self.draw_table(pos, page_h, element.get("content", []))
 
+        if text is not None:
+            c.drawText(text)
         c.showPage()
 
+    def draw_table(self, pos, page_h, table_data):
+        c = self.c
+        x0 = pos["x"]
+        y0 = page_h - pos["y"] - pos["height"]
+        num_rows = len(table_data)
+        num_cols = len(table_data[0]) if num_rows > 0 else 0
+        if num_rows == 0 or num_cols == 0:
+            return
+        cell_w = pos["width"] / num_cols
+        cell_h = pos["height"] / num_rows
+
+        # Draw cell borders
+        for i in range(num_rows + 1):
+            c.line(x0, y0 + i * cell_h, x0 + pos["width"], y0 + i * cell_h)
+        for j in range(num_cols + 1):
+            c.line(x0 + j * cell_w, y0, x0 + j * cell_w, y0 + pos["height"])
+
+        # Draw cell content
+        c.setFont("Helvetica", 10)
+        for i, row in enumerate(table_data):
+            for j, cell_text in enumerate(row):
+                c.drawString(x0 + j * cell_w + 2, y0 + pos["height"] - (i + 1) * cell_h + 2, str(cell_text))
+
+def render_pages(pages, output_pdf_path, base_dir):
+    # Runs in a worker process for parallel reconstruction
+    c = canvas.Canvas(output_pdf_path, pagesize=letter)
+    renderer = PageRenderer(c, base_dir)
+    for page in pages:
+        renderer.draw_page(page)
     c.save()
+    return output_pdf_path
+
+def merge_pdfs(part_paths, output_pdf_path):
+    import fitz  # PyMuPDF
+    merged = fitz.open()
+    for path in part_paths:
+        with fitz.open(path) as part:
+            merged.insert_pdf(part)
+    # garbage=3 folds images repeated across parts back into one object
+    merged.save(output_pdf_path, garbage=3, deflate=True)
+    merged.close()
+
+def page_ranges(pages, pages_per_part):
+    part = []
+    for page in pages:
+        part.append(page)
+        if len(part) >= pages_per_part:
+            yield part
+            part = []
+    if part:
+        yield part
+
+def reconstruct_pdf_from_json(json_path, output_pdf_path="recreated.pdf", workers=1, pages_per_part=50):
+    # Accepts .json layouts and binary .layout files; binary ones are read page by page.
+    # workers > 1 opts in to rendering page ranges in parallel and merging them with PyMuPDF.
+    # Resolve base folder for relative paths
+    base_dir = os.path.dirname(json_path)
+    workers = workers or 1
+
+    if workers <= 1:
+        render_pages(iterLayoutFile(json_path), output_pdf_path, base_dir)
+        print(f"✅ Recreated PDF saved at: {output_pdf_path}")
+        return output_pdf_path
+
+    # Page ranges are rendered into partial PDFs in parallel, then merged in order
+    parts_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output_pdf_path)))
+    try:
+        part_paths = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # At most workers*2 page ranges in flight, so the layout is still read as it renders
+            in_flight = {}
+            for i, part in enumerate(page_ranges(iterLayoutFile(json_path), pages_per_part)):
+                if len(in_flight) >= workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        part_paths.append((in_flight.pop(f), f.result()))
+                path = os.path.join(parts_dir, f"part{i:05d}.pdf")
+                in_flight[pool.submit(render_pages, part, path, base_dir)] = i
+            for f in in_flight:
+                part_paths.append((in_flight[f], f.result()))
+        part_paths = [path for _, path in sorted(part_paths)]
+        if len(part_paths) == 1:
+            shutil.move(part_paths[0], output_pdf_path)
+        else:
+            merge_pdfs(part_paths, output_pdf_path)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
     print(f"✅ Recreated PDF saved at: {output_pdf_path}")
+    return output_pdf_path
 
 
 if __name__ == "__main__":
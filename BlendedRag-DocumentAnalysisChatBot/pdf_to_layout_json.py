@@ -1,109 +1,49 @@
-import fitz  # PyMuPDF
-import pdfplumber
-import json
 import os
+import sys
+import json
+import shutil
+
+# The extractor lives in the service so ingestion can share its page cache
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "pythonService"))
+
+from app import config
+from app.pdfParser.layoutExtractor import extractLayout, iterLayoutPages, hashFile, imagePath
+from app.pdfParser.layoutFormat import LayoutWriter
+
+def copy_images(pages, output_dir):
+    # Images live once in the content-addressed store; copy each unique one into the output folder
+    for page in pages:
+        for element in page["elements"]:
+            if element["type"] == "image":
+                target = os.path.join(output_dir, element["src"])
+                if not os.path.exists(target):
+                    shutil.copyfile(imagePath(element["src"]), target)
+
+def extract_pdf_layout_binary(pdf_path, output_dir="output_json", workers=None, batch_size=16):
+    """Writes <name>.layout (compact binary format) page batch by page batch."""
+    os.makedirs(os.path.join(output_dir, "images"), exist_ok=True)
+    file_hash = hashFile(pdf_path)
+    layout_path = os.path.join(output_dir, os.path.splitext(os.path.basename(pdf_path))[0] + ".layout")
+    with LayoutWriter(layout_path, os.path.basename(pdf_path), file_hash) as writer:
+        for pages in iterLayoutPages(pdf_path, batch_size, fileHash=file_hash, workers=workers or config.PARSER_WORKERS):
+            copy_images(pages, output_dir)
+            for page in pages:
+                writer.writePage(page)
+    print(f"✅ Binary layout saved at: {layout_path}")
+    return layout_path
+
+def extract_pdf_layout(pdf_path, output_dir="output_json", workers=None, fmt="json"):
+    if fmt == "binary":
+        return extract_pdf_layout_binary(pdf_path, output_dir, workers)
 
-def extract_pdf_layout(pdf_path, output_dir="output_json"):
     # Create output folder for images
     os.makedirs(output_dir, exist_ok=True)
     images_dir = os.path.join(output_dir, "images")
     os.makedirs(images_dir, exist_ok=True)
 
-    # Open with PyMuPDF for text/images
-    doc = fitz.open(pdf_path)
-
-    # Also open with pdfplumber for table detection
-    plumber_doc = pdfplumber.open(pdf_path)
-
-    pdf_data = {"document": os.path.basename(pdf_path), "pages": []}
-
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        plumber_page = plumber_doc.pages[page_num]
-
-        width, height = page.rect.width, page.rect.height
-        page_dict = {
-            "page_number": page_num + 1,
-            "width": width,
-            "height": height,
-            "elements": []
-        }
-
-        # === Extract text with font & positions ===
-        text_dict = page.get_text("dict")
-        for block in text_dict["blocks"]:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    element = {
-                        "type": "textbox",
-                        "position": {
-                            "x": span["bbox"][0],
-                            "y": span["bbox"][1],
-                            "width": span["bbox"][2] - span["bbox"][0],
-                            "height": span["bbox"][3] - span["bbox"][1],
-                        },
-                        "font": {
-                            "name": span.get("font", "Unknown"),
-                            "size": span.get("size", 0),
-                            "bold": "Bold" in span.get("font", ""),
-                            "italic": "Italic" in span.get("font", ""),
-                        },
-                        "content": span["text"]
-                    }
-                    page_dict["elements"].append(element)
-
-        # === Extract images ===
-        image_list = page.get_images(full=True)
-        for img_index, img in enumerate(image_list, start=1):
-            xref = img[0]
-            pix = fitz.Pixmap(doc, xref)
-
-            image_filename = f"page{page_num+1}_img{img_index}.png"
-            image_path = os.path.join(images_dir, image_filename)
-
-            if pix.n < 5:  # RGB or grayscale
-                pix.save(image_path)
-            else:  # CMYK
-                pix = fitz.Pixmap(fitz.csRGB, pix)
-                pix.save(image_path)
-
-            # Get position(s) where image is drawn
-            rects = page.get_image_rects(xref)
-            for rect in rects:
-                element = {
-                    "type": "image",
-                    "position": {
-                        "x": rect.x0,
-                        "y": rect.y0,
-                        "width": rect.width,
-                        "height": rect.height,
-                    },
-                    "src": os.path.join("images", image_filename)
-                }
-                page_dict["elements"].append(element)
-
-        # === Extract tables (basic with pdfplumber) ===
-        try:
-            tables = plumber_page.find_tables()
-            for t_index, table in enumerate(tables, start=1):
-                element = {
-                    "type": "table",
-                    "position": {
-                        "x": table.bbox[0],
-                        "y": table.bbox[1],
-                        "width": table.bbox[2] - table.bbox[0],
-                        "height": table.bbox[3] - table.bbox[1],
-                    },
-                    "content": table.extract(),  # raw 2D array of cell texts
-                }
-                page_dict["elements"].append(element)
-        except Exception as e:
-            print(f"No tables found on page {page_num+1}: {e}")
-
-        # Add page dict
-        pdf_data["pages"].append(page_dict)
-
-    plumber_doc.close()
+    # Pages are extracted in parallel workers, or read from the layout cache if seen before
+    pdf_data = extractLayout(pdf_path, workers=workers)
+    copy_images(pdf_data["pages"], output_dir)
 
     # Save JSON
     json_path = os.path.join(output_dir, os.path.splitext(os.path.basename(pdf_path))[0] + ".json")
@@ -112,6 +52,7 @@ def extract_pdf_layout(pdf_path, output_dir="output_json"):
 
     print(f"✅ Layout JSON saved at: {json_path}")
     print(f"✅ Extracted images saved at: {images_dir}")
+    return pdf_data
 
 
 if __name__ == "__main__":
@@ -1,8 +1,9 @@
 # app/chromaClient.py
 import chromadb
+from app import config
 
 # Persistent Chroma client using new API
-chromaClient = chromadb.PersistentClient(path="./data/chroma")
+chromaClient = chromadb.PersistentClient(path=config.CHROMA_PATH)
 
 # Shared collection
 collection = chromaClient.get_or_create_collection(name="documents")
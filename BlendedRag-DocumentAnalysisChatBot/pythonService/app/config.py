@@ -8,18 +8,82 @@ DATA_DIR = BASE_DIR / "data"
 UPLOADS_DIR = DATA_DIR / "uploads"
 CHUNKS_DIR = DATA_DIR / "chunks"
 EMBEDDINGS_DIR = DATA_DIR / "embeddings"
+CACHE_DIR = DATA_DIR / "cache"
+LAYOUT_CACHE_DIR = CACHE_DIR / "layout"
+OCR_CACHE_DIR = CACHE_DIR / "ocr"
+TABLE_CACHE_DIR = CACHE_DIR / "tables"
+TABLES_DIR = DATA_DIR / "tables"
+IMAGE_STORE_DIR = CACHE_DIR / "images"  # content-addressed, shared by all layouts
+EMBEDDING_CACHE_DIR = CACHE_DIR / "embeddings"
+ONNX_CACHE_DIR = CACHE_DIR / "onnx"
+VECTOR_INDEX_DIR = DATA_DIR / "vectors"  # per-document .npy embedding matrices
+HNSW_DIR = DATA_DIR / "hnsw"
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./data/chroma")
 
 # Ensure required directories exist
-for d in [UPLOADS_DIR, CHUNKS_DIR, EMBEDDINGS_DIR]:
+for d in [UPLOADS_DIR, CHUNKS_DIR, EMBEDDINGS_DIR, LAYOUT_CACHE_DIR, OCR_CACHE_DIR, TABLE_CACHE_DIR, TABLES_DIR, IMAGE_STORE_DIR, VECTOR_INDEX_DIR]:
     os.makedirs(d, exist_ok=True)
 
 # === Embedding Settings ===
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"  # local model
 EMBEDDING_DIMENSION = 384  # for all-MiniLM-L6-v2
+EMBEDDING_MAX_SEQ_LENGTH = 256  # model max_seq_length, special tokens included
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch", "onnx" or "onnx-int8" (CPU)
+EMBEDDING_ONNX_THREADS = 0  # ONNX Runtime intra-op threads; 0 lets it decide
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))  # ingestion encoder processes (>1 spawns a pool, one model each)
+EMBEDDING_BUCKET_SIZE = 64  # chunks of similar token length encoded together
+EMBEDDING_CACHE_ENABLED = True  # persistent chunk-embedding cache used by ingestion
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000  # ~300 MB of vectors at 384 dims; least recently used are evicted
+EMBED_BATCH_MAX_ITEMS = 64  # query micro-batching: flush after this many texts...
+EMBED_BATCH_MAX_WAIT_MS = 5.0  # ...or this long after the first queued request
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = 10_000  # in-memory LRU for query embeddings
+QUERY_EMBEDDING_CACHE_MAX_MB = 32
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = 3600
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "0") == "1"  # load + run the model at startup instead of on first use
+
+# === Dense Search ===
+DENSE_SEARCH_BACKEND = os.getenv("DENSE_SEARCH_BACKEND", "npy")  # "npy" (exact, per-document matrices), "chroma" or "hnsw"
+VECTOR_INDEX_MAX_LOADED = 256  # per-document matrices kept memory-mapped (LRU)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+HNSW_EXACT_FILTER_MAX = 5000  # docId-filtered searches over at most this many vectors are exact
+HNSW_PERSIST_EVERY = 10_000  # changed vectors between automatic saves (also saved at shutdown)
+
+# === OCR Settings (scanned pages without a text layer) ===
+OCR_ENABLED = True
+OCR_WORKERS = 2  # Tesseract processes shared by all ingestions
+OCR_DPI = 300
+OCR_LANG = "eng"
+OCR_MIN_TEXT_CHARS = 10  # pages with less extracted text than this are OCR'd
+
+# === Table Extraction ===
+TABLE_EXTRACTION_ENABLED = True
+TABLE_MIN_RULINGS = 2  # horizontal and vertical ruling lines a page needs before pdfplumber runs on it
 
 # === Chunking Settings ===
 CHUNK_SIZE = 300  # characters per chunk
 CHUNK_OVERLAP = 50  # characters overlap to maintain context
+CHUNK_MAX_TOKENS = 254  # all-MiniLM-L6-v2 truncates at 256 word-pieces including [CLS]/[SEP]
+CHUNK_OVERLAP_TOKENS = 32  # tokens shared between consecutive chunks
+# Page anchoring restarts token windows at every page, so an edit in a revision only re-chunks (and
+# re-embeds) the pages it touches. The cost is retrieval quality for every document: no chunk spans a
+# page break, so text split across pages lands in two short chunks. Enable it only for corpora that
+# are mostly updated through revisions (PUT /processPdf/{docId}); changing it re-chunks on next ingest.
+CHUNK_ANCHOR_PAGES = False
+
+# === Ingestion Settings ===
+INGEST_STREAMING = True  # walk the PDF in page batches instead of loading it whole
+INGEST_PAGE_BATCH_SIZE = 16  # pages parsed -> chunked -> embedded -> upserted per batch
+PARSER_WORKERS = min(8, os.cpu_count() or 1)  # parser processes in total, shared by all ingestion jobs (1 = serial)
+PARSER_MIN_PAGES_PER_TASK = 32  # pages per streaming parse task, so each fitz.open is amortized over a long range
+INGEST_WORKERS = 2  # background ingestion jobs (files) processed concurrently
+INGEST_JOB_HISTORY = 500  # finished jobs kept for status lookups
+IMAGE_ENCODE_THREADS = 4  # image conversion threads per layout worker
+INGEST_USE_LAYOUT = False  # extract (and cache) full page layout during ingestion; cached layouts are always reused
+
+# === Storage Settings ===
+CHROMA_WRITE_BATCH_SIZE = 1000  # chunks per Chroma upsert
 
 # === Retrieval Settings ===
 TOP_K = 5  # number of chunks to retrieve during search
@@ -30,4 +94,6 @@ LLM_MODEL_NAME = "models/qwen2.5-3b-instruct-q5_k_m.gguf"  # placeholder for loc
 
 # === Miscellaneous ===
 ALLOWED_FILE_TYPES = [".pdf"]
-MAX_UPLOAD_SIZE_MB = 25
+MAX_UPLOAD_SIZE_MB = 25  # per file, enforced while the upload is streamed to disk
+MAX_FILES_PER_JOB = 20
+PENDING_DUPLICATE_WAIT_SECONDS = 900  # how long an upload waits for an identical one still being ingested
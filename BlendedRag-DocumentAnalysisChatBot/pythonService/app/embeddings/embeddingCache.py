@@ -0,0 +1,208 @@
+# app/embeddings/embeddingCache.py
+# Persistent, content-addressed embedding cache. Vectors live in a memory-mapped float32 matrix
+# (one row per entry); a SQLite index maps sha256(normalized text) -> row and tracks last use
+# for LRU eviction. There is one cache directory per model, so a model change never serves
+# stale vectors. Row allocation happens inside an IMMEDIATE transaction and vectors are flushed
+# before their index rows commit; lookups read slots and vectors inside one too, so several
+# processes can share one cache directory.
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, List, Any
+import numpy as np
+from app import config
+from app.embeddings.embeddingEngine import embeddingEngine
+from app.embeddings.embeddingExecutor import embeddingExecutor
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalizeText(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def textKey(text: str) -> str:
+    return hashlib.sha256(normalizeText(text).encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    GROW_ROWS = 4096  # the matrix file grows by at least this many rows at a time
+    SQL_BATCH = 500  # keys per IN (...) query
+
+    def __init__(self, modelName: str, dim: int, engine=embeddingEngine, directory=None, maxEntries: int = None):
+        self.modelName = modelName
+        self.dim = dim
+        self.engine = engine
+        self.maxEntries = maxEntries or config.EMBEDDING_CACHE_MAX_ENTRIES
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", modelName)
+        self.directory = os.path.join(str(directory or config.EMBEDDING_CACHE_DIR), slug)
+        self.vectorPath = os.path.join(self.directory, "vectors.f32")
+        self._lock = threading.Lock()
+        self._db = None
+        self._matrix = None
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily, so importing the module never touches the disk
+        if self._db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30,
+                                 isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER NOT NULL, lastUsed REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS entriesLastUsed ON entries (lastUsed)")
+            db.execute("CREATE TABLE IF NOT EXISTS free (slot INTEGER PRIMARY KEY)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT NOT NULL)")
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('nextSlot', '0')")
+            storedDim = int(db.execute("SELECT v FROM meta WHERE k = 'dim'").fetchone()[0])
+            if storedDim != self.dim:
+                raise ValueError(f"Embedding cache {self.directory} holds {storedDim}-d vectors, expected {self.dim}")
+            self._db = db
+        return self._db
+
+    def _map(self, rows: int):
+        """Maps the matrix file so that at least `rows` rows are addressable, growing it if needed."""
+        if self._matrix is not None and self._rows >= rows:
+            return
+        rowBytes = self.dim * 4
+        fileRows = os.path.getsize(self.vectorPath) // rowBytes if os.path.exists(self.vectorPath) else 0
+        if fileRows < rows:
+            fileRows = max(rows, fileRows + self.GROW_ROWS, min(fileRows * 2, self.maxEntries + self.GROW_ROWS))
+            with open(self.vectorPath, "a+b") as f:
+                f.truncate(fileRows * rowBytes)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(self.vectorPath, dtype=np.float32, mode="r+", shape=(fileRows, self.dim))
+        self._rows = fileRows
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        # Slots are resolved, read and touched in one IMMEDIATE transaction: another process's
+        # _put cannot evict a key and reuse its slot between the index read and the vector read
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            slots = {}
+            for i in range(0, len(keys), self.SQL_BATCH):
+                part = keys[i:i + self.SQL_BATCH]
+                rows = db.execute(f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(part))})", part)
+                slots.update(rows.fetchall())
+            found = {}
+            if slots:
+                self._map(max(slots.values()) + 1)
+                found = dict(zip(slots, np.array(self._matrix[list(slots.values())])))
+                now = time.time()
+                db.executemany("UPDATE entries SET lastUsed = ? WHERE key = ?", [(now, k) for k in slots])
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return found
+
+    def _put(self, keys: List[str], vectors: np.ndarray):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            present = set()
+            for i in range(0, len(keys), self.SQL_BATCH):
+                part = keys[i:i + self.SQL_BATCH]
+                present.update(k for (k,) in db.execute(f"SELECT key FROM entries WHERE key IN ({','.join('?' * len(part))})", part))
+            new = [i for i, k in enumerate(keys) if k not in present]
+            if not new:
+                db.execute("COMMIT")
+                return
+
+            slots = [s for (s,) in db.execute("SELECT slot FROM free LIMIT ?", (len(new),))]
+            db.executemany("DELETE FROM free WHERE slot = ?", [(s,) for s in slots])
+            nextSlot = int(db.execute("SELECT v FROM meta WHERE k = 'nextSlot'").fetchone()[0])
+            fresh = len(new) - len(slots)
+            slots.extend(range(nextSlot, nextSlot + fresh))
+            db.execute("UPDATE meta SET v = ? WHERE k = 'nextSlot'", (str(nextSlot + fresh),))
+
+            # Vectors reach the file before the index rows that point at them commit
+            self._map(max(slots) + 1)
+            self._matrix[slots] = vectors[new]
+            self._matrix.flush()
+            now = time.time()
+            db.executemany("INSERT INTO entries VALUES (?, ?, ?)", [(keys[i], s, now) for i, s in zip(new, slots)])
+
+            excess = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.maxEntries
+            if excess > 0:
+                victims = db.execute("SELECT key, slot FROM entries ORDER BY lastUsed LIMIT ?", (excess,)).fetchall()
+                db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                db.executemany("INSERT OR IGNORE INTO free VALUES (?)", [(s,) for _, s in victims])
+                self.evictions += len(victims)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for texts: cached rows are read back, only misses are encoded (once each)."""
+        keys = [textKey(t) for t in texts]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        try:
+            with self._lock:
+                cached = self._lookup(list(set(keys)))
+        except Exception as e:
+            logger.error(f"Embedding cache lookup failed, encoding everything: {e}")
+            cached = {}
+
+        missing: Dict[str, str] = {}
+        for i, k in enumerate(keys):
+            if k in cached:
+                out[i] = cached[k]
+            else:
+                missing.setdefault(k, texts[i])
+        hits = sum(1 for k in keys if k in cached)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        if missing:
+            vectors = np.asarray(self.engine.generateEmbeddings(list(missing.values())), dtype=np.float32)
+            byKey = dict(zip(missing, vectors))
+            for i, k in enumerate(keys):
+                if k in byKey:
+                    out[i] = byKey[k]
+            try:
+                with self._lock:
+                    self._put(list(missing), vectors)
+            except Exception as e:
+                logger.error(f"Failed to store {len(missing)} embedding(s) in the cache: {e}")
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "modelName": self.modelName,
+                "entries": entries,
+                "maxEntries": self.maxEntries,
+                "bytes": entries * self.dim * 4,
+                "fileBytes": os.path.getsize(self.vectorPath) if os.path.exists(self.vectorPath) else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+def cachedEmbeddings(texts: List[str]) -> np.ndarray:
+    """
+    Document-side embeddings through the persistent cache (when EMBEDDING_CACHE_ENABLED);
+    misses are encoded by the length-bucketed executor.
+    """
+    if config.EMBEDDING_CACHE_ENABLED:
+        return embeddingCache.embed(texts)
+    return embeddingExecutor.generateEmbeddings(texts)
+
+# Singleton instance
+embeddingCache = EmbeddingCache(embeddingEngine.cacheKey, config.EMBEDDING_DIMENSION, engine=embeddingExecutor)
@@ -1,12 +1,17 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
+from app.embeddings.embeddingEngine import getEmbeddingEngine
 
 class EmbeddingClient:
-    def __init__(self, modelName: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(modelName)
-    
+    """Thin handle on the shared engine; creating one no longer loads a model."""
+    def __init__(self, modelName: str = None, backend: str = None):
+        self.engine = getEmbeddingEngine(modelName, backend)
+
+    @property
+    def model(self):
+        return self.engine.model
+
     def generateEmbeddings(self, texts: list[str]) -> np.ndarray:
-        return np.array(self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True))
+        return self.engine.generateEmbeddings(texts)
     
     def generateEmbedding(self, text: str) -> np.ndarray:
-        return self.generateEmbeddings([text])[0]
\ No newline at end of file
+        return self.engine.generateEmbedding(text)
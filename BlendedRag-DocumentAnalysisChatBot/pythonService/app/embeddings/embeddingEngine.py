@@ -0,0 +1,106 @@
+# app/embeddings/embeddingEngine.py
+# Process-wide embedding engine. The model is loaded once, on first use (or on warmup at
+# startup), and shared by ingestion, retrieval and the query routes. The backend is either
+# PyTorch SentenceTransformer or ONNX Runtime (fp32 or int8) behind the same encode call.
+import os
+import time
+import threading
+from typing import Dict, Any, List
+import numpy as np
+from app import config
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+def rssBytes() -> int:
+    """Resident set size of this process (0 where it cannot be read)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, in KiB on Linux
+        except Exception:
+            return 0
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+class EmbeddingEngine:
+    def __init__(self, modelName: str = config.EMBEDDING_MODEL_NAME, backend: str = None):
+        self.modelName = modelName
+        self.backend = backend or config.EMBEDDING_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {self.backend!r}, expected one of {BACKENDS}")
+        self._model = None
+        self._lock = threading.Lock()
+        self._loadStats: Dict[str, Any] = {}
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    @property
+    def cacheKey(self) -> str:
+        """Identity of the vectors this engine produces (backends differ slightly)."""
+        return self.modelName if self.backend == "torch" else f"{self.modelName}@{self.backend}"
+
+    def _load(self):
+        rssBefore = rssBytes()
+        started = time.perf_counter()
+        if self.backend == "torch":
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.modelName)
+            parameterBytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        else:
+            from app.embeddings.onnxBackend import OnnxEmbeddingModel
+            model = OnnxEmbeddingModel(self.modelName, quantized=self.backend == "onnx-int8")
+            parameterBytes = model.sizeBytes
+        loadSeconds = time.perf_counter() - started
+        self._loadStats = {
+            "loadSeconds": round(loadSeconds, 3),
+            "parameterBytes": parameterBytes,
+            "rssDeltaBytes": max(0, rssBytes() - rssBefore),
+            "device": str(model.device)
+        }
+        logger.info(f"Loaded embedding model {self.modelName} ({self.backend}) in {loadSeconds:.2f}s "
+                    f"({self._loadStats['parameterBytes'] / 2**20:.0f} MiB of weights, "
+                    f"+{self._loadStats['rssDeltaBytes'] / 2**20:.0f} MiB RSS)")
+        return model
+
+    @property
+    def isLoaded(self) -> bool:
+        return self._model is not None
+
+    def warmup(self):
+        """Load the model and run one encode so the first request does not pay for either."""
+        started = time.perf_counter()
+        self.generateEmbeddings(["warmup"])
+        self._loadStats["warmupSeconds"] = round(time.perf_counter() - started, 3)
+
+    def generateEmbeddings(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+
+    def generateEmbedding(self, text: str) -> np.ndarray:
+        return self.generateEmbeddings([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"modelName": self.modelName, "backend": self.backend, "loaded": self.isLoaded, **self._loadStats}
+
+_engines: Dict[tuple, EmbeddingEngine] = {}
+_enginesLock = threading.Lock()
+
+def getEmbeddingEngine(modelName: str = None, backend: str = None) -> EmbeddingEngine:
+    """The shared engine for modelName and backend (defaults: EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)."""
+    key = (modelName or config.EMBEDDING_MODEL_NAME, backend or config.EMBEDDING_BACKEND)
+    with _enginesLock:
+        if key not in _engines:
+            _engines[key] = EmbeddingEngine(*key)
+        return _engines[key]
+
+# Singleton instance
+embeddingEngine = getEmbeddingEngine()
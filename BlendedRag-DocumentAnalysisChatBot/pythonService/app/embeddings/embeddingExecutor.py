@@ -0,0 +1,89 @@
+# app/embeddings/embeddingExecutor.py
+# Ingestion-side embedding: chunks are sorted by token length and cut into buckets of similar
+# length, so short chunks are not padded to the longest one in their batch. With
+# EMBEDDING_WORKERS > 1 the buckets are spread over a pool of spawned worker processes, each with
+# its own model copy and a pinned number of intra-op threads. Results come back in input order.
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Callable
+import numpy as np
+from app import config
+from app.embeddings.embeddingEngine import embeddingEngine, getEmbeddingEngine
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+def tokenLengths(texts: List[str]) -> List[int]:
+    """Token counts (truncated at the model's max sequence length) used for bucketing."""
+    from app.pdfParser.chunker import loadTokenizer
+    enc = loadTokenizer(config.EMBEDDING_MODEL_NAME)(texts, truncation=True, max_length=config.EMBEDDING_MAX_SEQ_LENGTH,
+                                                     return_attention_mask=False, return_token_type_ids=False)
+    return [len(ids) for ids in enc["input_ids"]]
+
+def lengthBuckets(lengths: List[int], bucketSize: int) -> List[List[int]]:
+    """Input indices sorted by length (longest first) and cut into buckets of bucketSize."""
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    return [order[i:i + bucketSize] for i in range(0, len(order), bucketSize)]
+
+_workerEngine = None
+
+def _initWorker(modelName: str, backend: str, threads: int):
+    # Pin thread pools before torch / onnxruntime are imported in this process
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    config.EMBEDDING_ONNX_THREADS = threads
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+    global _workerEngine
+    _workerEngine = getEmbeddingEngine(modelName, backend)
+
+def _encodeBucket(texts: List[str]) -> np.ndarray:
+    return _workerEngine.generateEmbeddings(texts)
+
+class EmbeddingExecutor:
+    """generateEmbeddings-compatible front end used for document chunks."""
+    def __init__(self, engine=embeddingEngine, workers: int = None, threadsPerWorker: int = None,
+                 bucketSize: int = None, lengthFn: Callable[[List[str]], List[int]] = tokenLengths):
+        self.engine = engine
+        self.workers = config.EMBEDDING_WORKERS if workers is None else workers
+        self.threadsPerWorker = threadsPerWorker or max(1, (os.cpu_count() or 1) // max(1, self.workers))
+        self.bucketSize = bucketSize or config.EMBEDDING_BUCKET_SIZE
+        self.lengthFn = lengthFn
+        self._pool = None
+
+    def _getPool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already holds torch / OpenMP state can deadlock
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initWorker,
+                initargs=(self.engine.modelName, self.engine.backend, self.threadsPerWorker)
+            )
+            logger.info(f"Started {self.workers} embedding worker(s) with {self.threadsPerWorker} thread(s) each")
+        return self._pool
+
+    def generateEmbeddings(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, config.EMBEDDING_DIMENSION), dtype=np.float32)
+        buckets = lengthBuckets(self.lengthFn(texts), self.bucketSize)
+        if self.workers > 1:
+            pool = self._getPool()
+            results = list(pool.map(_encodeBucket, [[texts[i] for i in bucket] for bucket in buckets]))
+        else:
+            results = [self.engine.generateEmbeddings([texts[i] for i in bucket]) for bucket in buckets]
+        out = np.empty((len(texts), results[0].shape[1]), dtype=np.float32)
+        for bucket, vectors in zip(buckets, results):
+            out[bucket] = vectors
+        return out
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+# Singleton instance
+embeddingExecutor = EmbeddingExecutor()
@@ -0,0 +1,138 @@
+# app/embeddings/embeddingScheduler.py
+# Micro-batching for small, concurrent embedding calls (query embeddings). Requests are queued;
+# a single worker thread waits at most EMBED_BATCH_MAX_WAIT_MS after the first one (or until
+# EMBED_BATCH_MAX_ITEMS texts are queued), encodes everything in one model call and hands each
+# caller its slice. Bulk ingestion keeps calling the engine directly with its own large batches.
+import time
+import queue
+import asyncio
+import threading
+from bisect import bisect_left
+from concurrent.futures import Future
+from typing import List, Dict, Any
+import numpy as np
+from app import config
+from app.embeddings.embeddingEngine import embeddingEngine
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+class Histogram:
+    """Fixed-bucket histogram; bucket i counts values <= bounds[i], the last one the overflow."""
+    def __init__(self, bounds: List[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueuedAt")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future = Future()
+        self.enqueuedAt = time.perf_counter()
+
+class EmbeddingScheduler:
+    def __init__(self, engine=embeddingEngine, maxBatchSize: int = None, maxWaitMs: float = None):
+        self.engine = engine
+        self.maxBatchSize = maxBatchSize or config.EMBED_BATCH_MAX_ITEMS
+        self.maxWait = (config.EMBED_BATCH_MAX_WAIT_MS if maxWaitMs is None else maxWaitMs) / 1000.0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._statsLock = threading.Lock()
+        self.batchSizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queueWaitMs = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100])
+        self.batches = 0
+
+    def _ensureWorker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embeddingScheduler", daemon=True)
+                    self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queues texts; the future resolves to their (len(texts), dim) embeddings."""
+        self._ensureWorker()
+        request = _Request(list(texts))
+        self._queue.put(request)
+        return request.future
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def embedOne(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    async def embedAsync(self, texts: List[str]) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(texts))
+
+    async def embedOneAsync(self, text: str) -> np.ndarray:
+        return (await self.embedAsync([text]))[0]
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        items = len(batch[0].texts)
+        deadline = time.perf_counter() + self.maxWait
+        while items < self.maxBatchSize:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            items += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts = [t for r in batch for t in r.texts]
+            with self._statsLock:
+                self.batches += 1
+                self.batchSizes.observe(len(texts))
+                for r in batch:
+                    self.queueWaitMs.observe((started - r.enqueuedAt) * 1000.0)
+            try:
+                embeddings = self.engine.generateEmbeddings(texts)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} text(s) failed: {e}")
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            offset = 0
+            for r in batch:
+                r.future.set_result(embeddings[offset:offset + len(r.texts)])
+                offset += len(r.texts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._statsLock:
+            return {
+                "maxBatchSize": self.maxBatchSize,
+                "maxWaitMs": self.maxWait * 1000.0,
+                "queueDepth": self._queue.qsize(),
+                "batches": self.batches,
+                "batchSize": self.batchSizes.snapshot(),
+                "queueWaitMs": self.queueWaitMs.snapshot()
+            }
+
+# Singleton instance
+embeddingScheduler = EmbeddingScheduler()
@@ -0,0 +1,91 @@
+# app/embeddings/onnxBackend.py
+# CPU embedding backend on ONNX Runtime. The transformer is exported once to ONNX (optionally
+# dynamically quantized to int8) and cached under data/cache/onnx. Mean pooling and
+# L2 normalization are done in numpy exactly as the sentence-transformers pipeline does,
+# so the vectors are interchangeable with the PyTorch backend's.
+import os
+import re
+from typing import List
+import numpy as np
+from app import config
+from app.pdfParser.chunker import loadTokenizer
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+OUTPUT_NAME = "last_hidden_state"
+
+def onnxDir(modelName: str) -> str:
+    return os.path.join(str(config.ONNX_CACHE_DIR), re.sub(r"[^A-Za-z0-9_.-]+", "_", modelName))
+
+def exportOnnx(modelName: str, path: str):
+    """Exports the Hugging Face encoder of modelName to an ONNX graph with dynamic batch and length."""
+    import torch
+    from transformers import AutoModel
+    model = AutoModel.from_pretrained(modelName).eval()
+    dummy = loadTokenizer(modelName)(["export"], return_tensors="pt")
+    inputNames = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamicAxes = {n: {0: "batch", 1: "sequence"} for n in inputNames + [OUTPUT_NAME]}
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(dummy[n] for n in inputNames), tmpPath, input_names=inputNames,
+                          output_names=[OUTPUT_NAME], dynamic_axes=dynamicAxes, opset_version=14)
+    os.replace(tmpPath, path)
+
+def quantizeOnnx(path: str, int8Path: str):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    tmpPath = f"{int8Path}.{os.getpid()}.tmp"
+    quantize_dynamic(path, tmpPath, weight_type=QuantType.QInt8)
+    os.replace(tmpPath, int8Path)
+
+def ensureOnnxModel(modelName: str, quantized: bool = False) -> str:
+    """Path of the (exported, optionally quantized) ONNX graph, building it on first use."""
+    directory = onnxDir(modelName)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "model.onnx")
+    if not os.path.exists(path):
+        logger.info(f"Exporting {modelName} to ONNX at {path}")
+        exportOnnx(modelName, path)
+    if not quantized:
+        return path
+    int8Path = os.path.join(directory, "model.int8.onnx")
+    if not os.path.exists(int8Path):
+        logger.info(f"Quantizing {path} to int8")
+        quantizeOnnx(path, int8Path)
+    return int8Path
+
+class OnnxEmbeddingModel:
+    """Drop-in for the SentenceTransformer calls the engine makes (encode, device)."""
+    device = "cpu"
+
+    def __init__(self, modelName: str, quantized: bool = False, threads: int = None):
+        import onnxruntime as ort
+        self.path = ensureOnnxModel(modelName, quantized)
+        self.tokenizer = loadTokenizer(modelName)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = config.EMBEDDING_ONNX_THREADS if threads is None else threads
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.inputNames = [i.name for i in self.session.get_inputs()]
+
+    @property
+    def sizeBytes(self) -> int:
+        return os.path.getsize(self.path)
+
+    def encode(self, texts: List[str], batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=True,
+                                 max_length=config.EMBEDDING_MAX_SEQ_LENGTH, return_tensors="np")
+            hidden = self.session.run([OUTPUT_NAME], {n: enc[n].astype(np.int64) for n in self.inputNames})[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        if not batches:
+            return np.empty((0, config.EMBEDDING_DIMENSION), dtype=np.float32)
+        return np.concatenate(batches)
@@ -0,0 +1,103 @@
+# app/embeddings/queryEmbeddingCache.py
+# In-memory LRU + TTL cache for query-side embeddings (user questions and refined variants),
+# keyed on normalized text and shared by every retrieval path. Misses go through the
+# micro-batching scheduler, so a repeated question never reaches the encoder.
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any
+import numpy as np
+from app import config
+from app.embeddings.embeddingCache import normalizeText
+from app.embeddings.embeddingScheduler import embeddingScheduler
+
+class QueryEmbeddingCache:
+    def __init__(self, embedder=embeddingScheduler, maxEntries: int = None, maxBytes: int = None, ttlSeconds: float = None):
+        self.embedder = embedder
+        self.maxEntries = maxEntries or config.QUERY_EMBEDDING_CACHE_MAX_ENTRIES
+        self.maxBytes = maxBytes or config.QUERY_EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+        self.ttl = config.QUERY_EMBEDDING_CACHE_TTL_SECONDS if ttlSeconds is None else ttlSeconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (vector, expiresAt), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _pop(self, key: str):
+        vector, _ = self._entries.pop(key)
+        self._bytes -= vector.nbytes
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = normalizeText(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text: str, vector: np.ndarray):
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False  # shared between callers
+        key = normalizeText(text)
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (vector, time.monotonic() + self.ttl)
+            self._bytes += vector.nbytes
+            while self._entries and (len(self._entries) > self.maxEntries or self._bytes > self.maxBytes):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def embedOne(self, text: str) -> np.ndarray:
+        vector = self.get(text)
+        if vector is None:
+            vector = self.embedder.embedOne(text)
+            self.put(text, vector)
+        return vector
+
+    def embedMany(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for several queries; all misses go to the encoder in one call."""
+        vectors = [self.get(t) for t in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fresh = dict(zip(missing, self.embedder.embed(missing)))
+            for t, v in fresh.items():
+                self.put(t, v)
+            vectors = [fresh[t] if v is None else v for t, v in zip(texts, vectors)]
+        return np.stack(vectors) if vectors else np.empty((0, config.EMBEDDING_DIMENSION), dtype=np.float32)
+
+    async def embedOneAsync(self, text: str) -> np.ndarray:
+        vector = self.get(text)
+        if vector is None:
+            vector = await self.embedder.embedOneAsync(text)
+            self.put(text, vector)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxEntries": self.maxEntries,
+                "maxBytes": self.maxBytes,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+# Singleton instance
+queryEmbeddingCache = QueryEmbeddingCache()
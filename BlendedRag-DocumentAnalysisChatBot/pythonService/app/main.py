@@ -1,8 +1,41 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.routes import healthRoutes, pdfRoutes, queryRoutes, documentRoutes,ragRoutes
+from app.embeddings.embeddingEngine import embeddingEngine
+from app.storage.vectorStore import getMirrorStore
+from app.pdfParser.jobQueue import ingestionQueue
+from app import config
 
 app = FastAPI(title="Blended RAG Chatbot")
 
+@app.middleware("http")
+async def rejectOversizedUploads(request: Request, call_next):
+    # Refuse on the declared Content-Length before the multipart body is read at all;
+    # chunked uploads without a length are still capped per file while streaming to disk.
+    if request.method in ("POST", "PUT") and request.url.path.startswith("/processPdf"):
+        declared = request.headers.get("content-length")
+        maxFiles = config.MAX_FILES_PER_JOB if request.url.path.rstrip("/").endswith("/jobs") else 1
+        limit = config.MAX_UPLOAD_SIZE_MB * 1024 * 1024 * maxFiles + 64 * 1024  # + multipart framing
+        if declared and declared.isdigit() and int(declared) > limit:
+            return JSONResponse(status_code=413, content={"detail": "Upload exceeds the maximum allowed size"})
+    return await call_next(request)
+
+@app.on_event("startup")
+def warmupEmbeddingEngine():
+    if config.EMBEDDING_WARMUP:
+        embeddingEngine.warmup()
+
+@app.on_event("shutdown")
+def stopIngestion():
+    ingestionQueue.shutdown()  # cancels queued files, waits for running ones
+
+@app.on_event("shutdown")
+def persistVectorStore():
+    mirror = getMirrorStore()
+    if mirror:
+        mirror.reconcile(mirror.fallback)  # keep documents the bulk CLI added meanwhile
+        mirror.persist()
+
 #Registering routes
 app.include_router(healthRoutes.router, prefix="/health",tags=["Health"])
 app.include_router(pdfRoutes.router, prefix="/processPdf", tags=["PDF Processing"])
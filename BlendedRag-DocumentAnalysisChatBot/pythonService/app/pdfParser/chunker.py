@@ -1,3 +1,7 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
 def chunkText(text: str, chunkSize: int = 200, chunkOverlap: int = 50):
     """
     Splits text into overlapping chunks.
@@ -13,3 +17,162 @@ def chunkText(text: str, chunkSize: int = 200, chunkOverlap: int = 50):
         chunks.append(chunk)
         start += chunkSize - chunkOverlap
     return chunks
+
+class StreamingChunker:
+    """
+    Incremental version of chunkText for text that arrives in pieces (e.g. page batches).
+    feed() returns the chunks completed so far, flush() returns the remainder.
+    Feeding the pages of a document one by one yields exactly chunkText(" ".join(pages)).
+    """
+    def __init__(self, chunkSize: int = 200, chunkOverlap: int = 50):
+        if chunkOverlap >= chunkSize:
+            raise ValueError("chunkOverlap must be smaller than chunkSize")
+        self.chunkSize = chunkSize
+        self.step = chunkSize - chunkOverlap
+        self._words = []  # words not yet covered by a full window
+
+    def feed(self, text: str):
+        self._words.extend(text.split())
+        chunks = []
+        start = 0
+        while start + self.chunkSize <= len(self._words):
+            chunks.append(" ".join(self._words[start:start + self.chunkSize]))
+            start += self.step
+        if start:
+            del self._words[:start]
+        return chunks
+
+    def flush(self):
+        chunks = []
+        start = 0
+        while start < len(self._words):
+            chunks.append(" ".join(self._words[start:start + self.chunkSize]))
+            start += self.step
+        self._words = []
+        return chunks
+
+_WORD_RE = re.compile(r"\S+")
+
+def whitespaceOffsets(text: str) -> List[Tuple[int, int]]:
+    """(start, end) character offsets of whitespace-separated words; tokenizer-free fallback."""
+    return [(m.start(), m.end()) for m in _WORD_RE.finditer(text)]
+
+@lru_cache(maxsize=None)
+def loadTokenizer(modelName: str):
+    """The embedding model's (fast) tokenizer, loaded once per process without the model weights."""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(modelName)
+
+def tokenizerOffsets(tokenizer):
+    """Wraps a HF fast tokenizer into a text -> [(start, end), ...] function."""
+    def offsets(text: str) -> List[Tuple[int, int]]:
+        enc = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                        return_attention_mask=False, return_token_type_ids=False, verbose=False)
+        return [(s, e) for s, e in enc["offset_mapping"] if e > s]
+    return offsets
+
+class TokenChunker:
+    """
+    Splits a document into windows of at most maxTokens tokens, measured with the embedding
+    model's tokenizer, so no chunk is silently truncated at encode time.
+    Pages are fed one at a time; every chunk records its character offsets in the document
+    (pages joined by pageSeparator), the pages it spans and its token count.
+    Each page is tokenized once and chunk text is sliced from a buffer that only keeps the
+    unfinished tail, so the whole pass is linear in the document length.
+    With anchorPages, windows restart at every page instead of running across pages, so a
+    chunk depends only on its own page's text: an edit shifts the windows of the edited page
+    and leaves every other page's chunks (and their hashes) unchanged.
+    """
+    def __init__(self, tokenOffsets=whitespaceOffsets, maxTokens: int = 254, overlapTokens: int = 32,
+                 pageSeparator: str = "\n", boundaryLookback: int = 16, anchorPages: bool = False):
+        if overlapTokens >= maxTokens:
+            raise ValueError("overlapTokens must be smaller than maxTokens")
+        self.tokenOffsets = tokenOffsets
+        self.maxTokens = maxTokens
+        self.overlapTokens = overlapTokens
+        self.pageSeparator = pageSeparator
+        self.boundaryLookback = boundaryLookback
+        self.anchorPages = anchorPages
+        self._reset()
+
+    def _reset(self):
+        self._buf = ""          # document text from offset _bufStart on
+        self._bufStart = 0
+        self._docLength = 0
+        self._starts, self._ends, self._pages = [], [], []
+
+    def feedPage(self, pageNumber: int, text: str) -> List[Dict]:
+        """Adds one page and returns the chunks that are now complete."""
+        chunks = self._drain(final=True) if self.anchorPages else []
+        if self._docLength:
+            self._buf += self.pageSeparator
+            self._docLength += len(self.pageSeparator)
+        base = self._docLength
+        for s, e in self.tokenOffsets(text):
+            self._starts.append(base + s)
+            self._ends.append(base + e)
+            self._pages.append(pageNumber)
+        self._buf += text
+        self._docLength += len(text)
+        return chunks + self._drain(final=False)
+
+    def flush(self) -> List[Dict]:
+        """Returns the remaining chunks and resets the chunker for the next document."""
+        chunks = self._drain(final=True)
+        self._reset()
+        return chunks
+
+    def chunkPages(self, pages) -> List[Dict]:
+        """Convenience: chunk [(pageNumber, text), ...] in one go."""
+        chunks = []
+        for pageNumber, text in pages:
+            chunks.extend(self.feedPage(pageNumber, text))
+        chunks.extend(self.flush())
+        return chunks
+
+    def _drain(self, final: bool) -> List[Dict]:
+        chunks = []
+        n = len(self._starts)
+        i = 0
+        # Until the last page is in, only emit windows that are known to be followed by more text
+        while n - i > self.maxTokens or (final and i < n):
+            end = min(i + self.maxTokens, n)
+            if end < n:
+                end = self._wordBoundary(i, end)
+            chunks.append(self._makeChunk(i, end))
+            if end >= n:
+                i = n
+                break
+            i = self._nextWordStart(max(end - self.overlapTokens, i + 1), end)
+
+        if i:
+            del self._starts[:i], self._ends[:i], self._pages[:i]
+            newStart = self._starts[0] if self._starts else self._docLength
+            self._buf = self._buf[newStart - self._bufStart:]
+            self._bufStart = newStart
+        return chunks
+
+    def _wordBoundary(self, i: int, end: int) -> int:
+        # Prefer not to split a word into word-pieces across chunks: back off to a token
+        # that is preceded by whitespace, within a small lookback.
+        for k in range(end, max(i + 1, end - self.boundaryLookback), -1):
+            if self._starts[k] > self._ends[k - 1]:
+                return k
+        return end
+
+    def _nextWordStart(self, k: int, limit: int) -> int:
+        # Start the overlap at the beginning of a word rather than on a trailing word-piece
+        while k < limit and self._starts[k] <= self._ends[k - 1]:
+            k += 1
+        return k
+
+    def _makeChunk(self, i: int, end: int) -> Dict:
+        charStart, charEnd = self._starts[i], self._ends[end - 1]
+        return {
+            "text": self._buf[charStart - self._bufStart:charEnd - self._bufStart],
+            "charStart": charStart,
+            "charEnd": charEnd,
+            "pageStart": self._pages[i],
+            "pageEnd": self._pages[end - 1],
+            "tokenCount": end - i
+        }
@@ -1,42 +1,321 @@
 # app/pdfParser/ingestor.py
 import uuid
 import os
+import time
+import numpy as np
 from fastapi import UploadFile
-from app.pdfParser.parser import extractTextFromPdf
-from app.pdfParser.chunker import chunkText
-from app.embeddings.embeddingClient import EmbeddingClient
-from app.storage.documentStore import documentStore
+from starlette.concurrency import run_in_threadpool
+from app.pdfParser.parser import extractTextFromPdf, getPageCount
+from app.pdfParser.pageSource import iterSourcePages
+from app.pdfParser.tableExtractor import extractTables
+from app.pdfParser.chunker import chunkText, TokenChunker, loadTokenizer, tokenizerOffsets
+from app.embeddings.embeddingCache import cachedEmbeddings
+from app.storage.documentStore import documentStore, hashChunk
+from app.storage.documentCatalog import documentCatalog
+from app.storage.tableStore import tableStore
 from app.utils.logger import getLogger
+from app.utils.fileUtils import streamUploadToDisk, safeFileName, checkFileType
 from app.retrieval.sparseRetriever import sparseRetriever
+from app import config
 
 # Import the shared Chroma client
 from app.chromaClient import chromaClient
 
 uploadDir = "data/uploads"
 logger = getLogger(__name__)
-embeddingClient = EmbeddingClient()
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200  # overlap between chunks to preserve context
+EMBEDDING_DIM = config.EMBEDDING_DIMENSION
 
-async def processPdf(file: UploadFile):
+def makeChunker() -> TokenChunker:
+    """Chunker sized to the embedding model's tokenizer, shared by every ingestion path."""
+    return TokenChunker(
+        tokenOffsets=tokenizerOffsets(loadTokenizer(config.EMBEDDING_MODEL_NAME)),
+        maxTokens=config.CHUNK_MAX_TOKENS,
+        overlapTokens=config.CHUNK_OVERLAP_TOKENS,
+        anchorPages=config.CHUNK_ANCHOR_PAGES
+    )
+
+def storeTables(docId: str, filePath: str, contentHash: str = None) -> int:
+    """
+    Table stage: extract ruled tables (prefiltered, cached by content hash) into the table store.
+    A failure here is logged and does not fail the ingestion. Returns the number of tables.
+    """
+    if not config.TABLE_EXTRACTION_ENABLED:
+        return 0
+    try:
+        tables = extractTables(filePath, fileHash=contentHash, workers=config.PARSER_WORKERS)
+        tableStore.saveTables(docId, tables)
+        return len(tables)
+    except Exception as e:
+        logger.error(f"Table extraction failed for docId={docId}: {e}")
+        return 0
+
+def chunkPageBatch(chunker: TokenChunker, batch) -> list:
+    chunks = []
+    for pageNumber, text in batch:
+        chunks.extend(chunker.feedPage(pageNumber, text))
+    return chunks
+
+def ingestPdfStreaming(filePath: str, docId: str, fileName: str, pageBatchSize: int = None, progress=None, contentHash: str = None):
+    """
+    Ingest a PDF already saved on disk, walking it in page batches:
+    parse -> chunk -> embed -> upsert to Chroma / stage for BM25, one batch at a time.
+    Peak memory depends on pageBatchSize rather than on the size of the document.
+    progress, if given, is called as progress(stage=..., seconds=..., items=..., pageCount=...,
+    pagesDone=..., chunksEmbedded=...) after every stage of every batch.
+    contentHash is the catalog claim made by saveUpload; it is completed or released here.
+    Holds the docId's write lock, so a replace of the same docId waits for it.
+    Returns ingestion stats (no chunk texts).
+    """
+    pageBatchSize = pageBatchSize or config.INGEST_PAGE_BATCH_SIZE
+    pageCount = 0
+    chunker = makeChunker()
+    numChunks = 0
+    pagesDone = 0
+
+    def report(stage, startedAt, items):
+        if progress:
+            progress(stage=stage, seconds=time.perf_counter() - startedAt, items=items,
+                     pageCount=pageCount, pagesDone=pagesDone, chunksEmbedded=numChunks)
+
+    def storeBatch(chunks):
+        nonlocal numChunks
+        if not chunks:
+            return
+        startedAt = time.perf_counter()
+        texts = [c["text"] for c in chunks]
+        embeddings = cachedEmbeddings(texts)
+        report("embed", startedAt, len(chunks))
+        startedAt = time.perf_counter()
+        ids = documentStore.appendChunks(docId, numChunks, chunks, embeddings, fileName, pageCount)
+        sparseRetriever.appendChunks(docId, texts, ids)
+        numChunks += len(chunks)
+        report("store", startedAt, len(chunks))
+
+    with documentStore.documentLock(docId):
+        try:
+            pageCount = getPageCount(filePath)
+            batches = iterSourcePages(filePath, pageBatchSize, pageCount, contentHash)
+            while True:
+                startedAt = time.perf_counter()
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                pagesDone += len(batch)
+                report("parse", startedAt, len(batch))
+
+                startedAt = time.perf_counter()
+                chunks = chunkPageBatch(chunker, batch)
+                report("chunk", startedAt, len(chunks))
+                storeBatch(chunks)
+                logger.info(f"docId={docId}: processed pages {batch[0][0]}-{batch[-1][0]} of {pageCount}, {numChunks} chunks so far")
+            storeBatch(chunker.flush())
+
+            if numChunks == 0:
+                raise ValueError(f"No text extracted from PDF: {fileName}")
+
+            startedAt = time.perf_counter()
+            sparseRetriever.finalizeDocument(docId)
+            report("index", startedAt, numChunks)
+            logger.info(f"BM25 index built for docId={docId}")
+
+            startedAt = time.perf_counter()
+            report("tables", startedAt, storeTables(docId, filePath, contentHash))
+        except Exception:
+            # Roll back partially written batches so a failed ingestion leaves no orphans
+            sparseRetriever.discardPending(docId)
+            if numChunks:
+                documentStore.deleteDocument(docId)
+            if contentHash:
+                documentCatalog.release(contentHash)
+            raise
+
+        documentStore.registerDocument(docId, fileName, pageCount, numChunks)
+        if contentHash:
+            documentCatalog.complete(contentHash, docId, fileName, pageCount, numChunks)
+        logger.info(f"Saved {numChunks} chunks to Chroma for docId={docId}")
+        return {
+            "docId": docId,
+            "fileName": fileName,
+            "pageCount": pageCount,
+            "numChunks": numChunks
+        }
+
+def replaceDocument(docId: str, filePath: str, fileName: str, contentHash: str = None, pageBatchSize: int = None):
+    """
+    Re-ingest a new revision of an existing document under the same docId.
+    New chunks are diffed against the stored ones by content hash: unchanged chunks keep
+    their stored embeddings, only new or changed chunks are embedded, only rows whose text
+    changed at their position are rewritten, chunks past the end of the new revision are
+    removed from Chroma and the BM25 index is brought in line. The diff and the writes hold
+    the docId's write lock, so concurrent ingests or replaces of one docId are serialized.
+    Reuse depends on CHUNK_ANCHOR_PAGES: with page-anchored windows an edit only re-embeds the
+    pages it touches; without it (the default) any edit shifts every later window and little
+    beyond the unchanged prefix is reused. The stats report the split.
+    """
+    pageBatchSize = pageBatchSize or config.INGEST_PAGE_BATCH_SIZE
+    pageCount = getPageCount(filePath)
+    chunker = makeChunker()
+    chunks = []
+    for batch in iterSourcePages(filePath, pageBatchSize, pageCount, contentHash):
+        chunks.extend(chunkPageBatch(chunker, batch))
+    chunks.extend(chunker.flush())
+    if not chunks:
+        raise ValueError(f"No text extracted from PDF: {fileName}")
+    texts = [c["text"] for c in chunks]
+    hashes = [hashChunk(t) for t in texts]
+
+    with documentStore.documentLock(docId):
+        stored = documentStore.getChunkMetadata(docId)
+        if not stored:
+            raise ValueError(f"Document not found: {docId}")
+        storedHashes = {}
+        for cid, md in stored.items():
+            storedHashes.setdefault(md["chunkHash"], cid)
+        reusable = documentStore.getEmbeddings(list({storedHashes[h] for h in hashes if h in storedHashes}))
+        missing = [i for i, h in enumerate(hashes) if storedHashes.get(h) not in reusable]
+
+        # Stored embeddings must be read before any positional id is overwritten below
+        embeddings = np.empty((len(chunks), EMBEDDING_DIM), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            if storedHashes.get(h) in reusable:
+                embeddings[i] = reusable[storedHashes[h]]
+        if missing:
+            embeddings[missing] = cachedEmbeddings([texts[i] for i in missing])
+
+        written = documentStore.writeRevision(docId, chunks, embeddings, fileName, pageCount, stored)
+        sparseRetriever.updateDocument(docId, texts, [f"{docId}_{i}" for i in range(len(chunks))])
+        storeTables(docId, filePath, contentHash)
+        documentStore.registerDocument(docId, fileName, pageCount, len(chunks))
+        if contentHash:
+            documentCatalog.forgetDocument(docId)
+            existing = documentCatalog.claim(contentHash, docId)
+            if existing and existing["docId"] != docId:
+                # The revision's bytes already belong to (or are being ingested as) another document
+                logger.info(f"Revision of docId={docId} is identical to docId={existing['docId']}, catalog entry kept")
+            else:
+                documentCatalog.complete(contentHash, docId, fileName, pageCount, len(chunks))
+
+    stats = {
+        "docId": docId,
+        "fileName": fileName,
+        "pageCount": pageCount,
+        "numChunks": len(chunks),
+        "reusedChunks": len(chunks) - len(missing),
+        "embeddedChunks": len(missing),
+        "rewrittenChunks": written["upserted"],
+        "metadataUpdates": written["updated"],
+        "removedChunks": written["removed"]
+    }
+    logger.info(f"Replaced docId={docId}: {stats}")
+    return stats
+
+async def saveRevisionUpload(file: UploadFile, docId: str) -> dict:
+    """Streams a new revision of docId to data/uploads; no dedup, the docId is fixed."""
+    os.makedirs(uploadDir, exist_ok=True)
+    fileName = safeFileName(file.filename)
+    checkFileType(fileName)
+    filePath = os.path.join(uploadDir, f"{docId}_{int(time.time())}_{fileName}")
+    _, contentHash = await streamUploadToDisk(file, filePath)
+    return {"docId": docId, "filePath": filePath, "fileName": fileName, "contentHash": contentHash}
+
+async def saveUpload(file: UploadFile) -> dict:
+    """
+    Streams the upload to data/uploads in fixed-size blocks, hashing it on the way and
+    enforcing MAX_UPLOAD_SIZE_MB / ALLOWED_FILE_TYPES, then assigns a new docId.
+    Byte-identical content that is already in the catalog is discarded:
+    the result then carries the existing docId and "duplicate" holds its catalog entry.
+    Content identical to an upload still being ingested is kept on disk ("duplicate" has
+    "pending": True) until that ingestion settles: resolvePendingDuplicate waits for it, the
+    ingestion queue registers a catalog callback instead of holding a worker.
+    """
     os.makedirs(uploadDir, exist_ok=True)
+    fileName = safeFileName(file.filename)
+    checkFileType(fileName)
+    partPath = os.path.join(uploadDir, f".{uuid.uuid4()}.part")
+    _, contentHash = await streamUploadToDisk(file, partPath)
+    return claimUpload(partPath, fileName, contentHash)
+
+def claimUpload(partPath: str, fileName: str, contentHash: str) -> dict:
+    docId = str(uuid.uuid4())
+    existing = documentCatalog.claim(contentHash, docId)
+    if existing and existing.get("pending"):
+        logger.info(f"Upload {fileName} (sha256={contentHash[:12]}) matches docId={existing['docId']}, still being ingested")
+        return {"docId": existing["docId"], "filePath": partPath, "fileName": fileName,
+                "contentHash": contentHash, "duplicate": existing}
+    if existing:
+        os.remove(partPath)
+        logger.info(f"Duplicate upload {fileName} (sha256={contentHash[:12]}), reusing docId={existing['docId']}")
+        return {"docId": existing["docId"], "filePath": None, "fileName": fileName,
+                "contentHash": contentHash, "duplicate": existing}
+
+    filePath = os.path.join(uploadDir, f"{docId}_{fileName}")
     try:
-        # Generate unique docId and file path
-        docId = str(uuid.uuid4())
-        filePath = os.path.join(uploadDir, f"{docId}_{file.filename}")
-        logger.info(f"Starting ingestion for: {file.filename}, saving as: {filePath}")
-
-        # Save the uploaded file
-        contents = await file.read()
-        if not contents:
-            raise ValueError(f"Uploaded file is empty: {file.filename}")
-        with open(filePath, "wb") as f:
-            f.write(contents)
+        os.replace(partPath, filePath)
+    except Exception:
+        documentCatalog.release(contentHash)
+        raise
+    return {"docId": docId, "filePath": filePath, "fileName": fileName,
+            "contentHash": contentHash, "duplicate": None}
+
+def resolvePendingDuplicate(upload: dict) -> dict:
+    """
+    Blocking: waits for the ingestion an upload duplicates. If it completed, the upload becomes
+    a plain duplicate of that document; if it failed, this copy claims the content under a new
+    docId and must be ingested itself. Uploads that are not pending are returned unchanged.
+    """
+    while upload["duplicate"] and upload["duplicate"].get("pending"):
+        try:
+            documentCatalog.waitFor(upload["contentHash"], timeout=config.PENDING_DUPLICATE_WAIT_SECONDS)
+        except TimeoutError:
+            os.remove(upload["filePath"])
+            raise
+        upload = claimUpload(upload["filePath"], upload["fileName"], upload["contentHash"])
+    return upload
+
+def discardUpload(upload: dict):
+    """Undo saveUpload for an upload that will not be ingested: drop its claim and its file."""
+    if not upload["duplicate"]:
+        documentCatalog.release(upload["contentHash"])
+    if upload["filePath"] and os.path.exists(upload["filePath"]):
+        os.remove(upload["filePath"])
+
+def duplicateResult(upload: dict) -> dict:
+    """Ingestion result for an upload that matched an already-ingested document."""
+    existing = upload["duplicate"]
+    return {
+        "docId": existing["docId"],
+        "fileName": existing.get("fileName", upload["fileName"]),
+        "pageCount": existing.get("pageCount", 0),
+        "numChunks": existing.get("numChunks", 0),
+        "duplicate": True,
+        "chunks": []
+    }
+
+async def processPdf(file: UploadFile, streaming: bool = None):
+    if streaming is None:
+        streaming = config.INGEST_STREAMING
+    upload = None
+    try:
+        upload = await saveUpload(file)
+        # Wait for an identical upload still in flight instead of returning its docId before it exists
+        upload = await run_in_threadpool(resolvePendingDuplicate, upload)
+        if upload["duplicate"]:
+            return duplicateResult(upload)
+        docId, filePath, fileName = upload["docId"], upload["filePath"], upload["fileName"]
+        logger.info(f"Starting ingestion for: {fileName}, saved as: {filePath}")
+
+        if streaming:
+            # Parsing and embedding are CPU-bound; keep them off the event loop
+            result = await run_in_threadpool(ingestPdfStreaming, filePath, docId, fileName,
+                                             contentHash=upload["contentHash"])
+            return {**result, "duplicate": False, "chunks": []}
 
         # Extract text and page count
         text, pageCount = extractTextFromPdf(filePath)
         if not text:
-            raise ValueError(f"No text extracted from PDF: {file.filename}")
+            raise ValueError(f"No text extracted from PDF: {fileName}")
         logger.info(f"Extracted text length: {len(text)} characters")
 
         # Chunk text
@@ -44,52 +323,31 @@ async def processPdf(file: UploadFile):
         logger.info(f"Generated {len(chunks)} chunks")
 
         # Generate embeddings
-        embeddings = embeddingClient.generateEmbeddings(chunks)
+        embeddings = cachedEmbeddings(chunks)
         logger.info(f"Generated embeddings for {len(chunks)} chunks")
 
-        # Prepare metadata and IDs for Chroma
-        metadatas = [
-            {
-                "docId": docId,
-                "chunkIndex": i,
-                "text": chunks[i],
-                "fileName": file.filename or "unknown.pdf",
-                "pageCount": pageCount or 0
-            } for i in range(len(chunks))
-        ]
-        ids = [f"{docId}_{i}" for i in range(len(chunks))]
+        # Store chunks and embeddings in Chroma (one batched write)
+        ids = documentStore.writeDocument(docId, chunks, embeddings, fileName, pageCount)
+        logger.info(f"Saved {len(chunks)} chunks to Chroma for docId={docId}")
 
         # Build and cache BM25 index
         sparseRetriever.indexDocument(docId, chunks, ids)
         logger.info(f"BM25 index built for docId={docId}")
-
-        # Save document in memory and Chroma
-        documentStore.saveDocument(docId, {
-            "fileName": file.filename,
-            "pageCount": pageCount,
-            "chunks": [{"text": chunks[i]} for i in range(len(chunks))],
-            "embeddings": embeddings
-        })
-
-        # Add chunks to Chroma collection (use documentStore's collection to avoid duplication)
-        collection = documentStore.collection
-        collection.add(
-            ids=ids,
-            embeddings=embeddings.tolist(),  # Convert to list
-            documents=chunks,                # List of strings
-            metadatas=metadatas
-        )
-        logger.info(f"Saved {len(chunks)} chunks to Chroma for docId={docId}")
+        documentCatalog.complete(upload["contentHash"], docId, fileName, pageCount, len(chunks))
 
         return {
             "docId": docId,
-            "fileName": file.filename,
+            "fileName": fileName,
             "pageCount": pageCount,
+            "numChunks": len(chunks),
+            "duplicate": False,
             "chunks": [{"text": chunk} for chunk in chunks]
         }
 
     except Exception as e:
         logger.error(f"Ingestion failed for {file.filename}: {e}")
+        if upload and not upload["duplicate"]:
+            documentCatalog.release(upload["contentHash"])
         raise
     # finally:
     #     # Clean up temporary file if it exists
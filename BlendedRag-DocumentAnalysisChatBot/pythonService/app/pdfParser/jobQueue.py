@@ -0,0 +1,262 @@
+# app/pdfParser/jobQueue.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from app import config
+from app.pdfParser.ingestor import ingestPdfStreaming, claimUpload, discardUpload
+from app.pdfParser.ocr import ocrLane
+from app.pdfParser.parserPool import shutdownParserPools
+from app.storage.documentCatalog import documentCatalog
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+STAGES = ["parse", "chunk", "embed", "store", "index", "tables"]
+
+class IngestionJob:
+    """
+    One upload request. Every file in it becomes a task on the ingestion pool;
+    the job is finished once all of its files are.
+    """
+    def __init__(self, uploads: List[Dict[str, Any]]):
+        self.jobId = str(uuid.uuid4())
+        self.createdAt = time.time()
+        self.finishedAt = None
+        self.files = [self._fileEntry(u) for u in uploads]
+
+    @staticmethod
+    def _fileEntry(upload: Dict[str, Any]) -> Dict[str, Any]:
+        existing = upload.get("duplicate")
+        waiting = bool(existing and existing.get("pending"))
+        if waiting:
+            existing = None  # identical content still being ingested; settled through a catalog callback
+        return {
+            "docId": upload["docId"],
+            "fileName": upload["fileName"],
+            "filePath": upload["filePath"],
+            "contentHash": upload.get("contentHash"),
+            "pendingUpload": upload if waiting else None,
+            # Duplicates of already-ingested content are finished before they start
+            "stage": "done" if existing else "waiting" if waiting else "queued",
+            "duplicate": bool(existing),
+            "pageCount": existing.get("pageCount", 0) if existing else 0,
+            "pagesDone": existing.get("pageCount", 0) if existing else 0,
+            "chunksEmbedded": 0,
+            "error": None
+        }
+
+    @property
+    def status(self) -> str:
+        stages = [f["stage"] for f in self.files]
+        if all(s == "queued" for s in stages) and stages:
+            return "queued"
+        if any(s not in ("done", "failed") for s in stages):
+            return "running"
+        if all(s == "done" for s in stages):
+            return "completed"
+        if all(s == "failed" for s in stages):
+            return "failed"
+        return "partial"
+
+    def toDict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.jobId,
+            "status": self.status,
+            "createdAt": self.createdAt,
+            "finishedAt": self.finishedAt,
+            "pageCount": sum(f["pageCount"] for f in self.files),
+            "pagesDone": sum(f["pagesDone"] for f in self.files),
+            "chunksEmbedded": sum(f["chunksEmbedded"] for f in self.files),
+            "errors": [f"{f['fileName']}: {f['error']}" for f in self.files if f["error"]],
+            "files": [{k: v for k, v in f.items() if k not in ("filePath", "contentHash", "pendingUpload")} for f in self.files]
+        }
+
+class IngestionQueue:
+    """
+    Runs ingestion jobs on a bounded thread pool so uploads can return immediately.
+    Threads (not processes) so jobs share the in-process Chroma, BM25 and embedding singletons.
+    The CPU-heavy parsing of every job goes to one shared parser pool (PARSER_WORKERS processes
+    in total, plus the OCR lane's OCR_WORKERS), so running more jobs queues parse tasks instead
+    of starting more processes.
+    """
+    def __init__(self, maxWorkers: int = None, historySize: int = None):
+        self.maxWorkers = maxWorkers or config.INGEST_WORKERS
+        self.historySize = historySize or config.INGEST_JOB_HISTORY
+        self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._queuedFiles = 0
+        self._runningFiles = 0
+        self._closed = False
+        self._stageTotals = {stage: {"seconds": 0.0, "items": 0} for stage in STAGES}
+
+    def submit(self, uploads: List[Dict[str, Any]]) -> IngestionJob:
+        """uploads: results of ingestor.saveUpload, already on disk"""
+        job = IngestionJob(uploads)
+        pending = [f for f in job.files if f["stage"] == "queued"]
+        with self._lock:
+            self._jobs[job.jobId] = job
+            self._queuedFiles += len(pending)
+            if job.status not in ("queued", "running"):
+                job.finishedAt = time.time()
+            self._evictFinished()
+        for fileEntry in pending:
+            self._submitFile(job, fileEntry)
+        for fileEntry in job.files:
+            if fileEntry["stage"] == "waiting":
+                self._waitForOriginal(job, fileEntry)
+        logger.info(f"Queued ingestion job {job.jobId} with {len(job.files)} file(s)")
+        return job
+
+    def getJob(self, jobId: str) -> IngestionJob | None:
+        with self._lock:
+            return self._jobs.get(jobId)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            throughput = {
+                stage: {
+                    "items": t["items"],
+                    "seconds": round(t["seconds"], 3),
+                    "itemsPerSecond": round(t["items"] / t["seconds"], 2) if t["seconds"] else 0.0
+                } for stage, t in self._stageTotals.items()
+            }
+            return {
+                "workers": self.maxWorkers,
+                "parserWorkers": config.PARSER_WORKERS,
+                "queueDepth": self._queuedFiles,
+                "running": self._runningFiles,
+                "jobs": len(self._jobs),
+                "stageThroughput": throughput
+            }
+
+    def _waitForOriginal(self, job: IngestionJob, fileEntry: Dict[str, Any]):
+        # No pool thread blocks on the identical upload: the catalog calls back when it settles
+        documentCatalog.onSettled(fileEntry["contentHash"],
+                                  lambda entry: self._originalSettled(job, fileEntry))
+
+    def _originalSettled(self, job: IngestionJob, fileEntry: Dict[str, Any]):
+        """The ingestion this file duplicates finished: reuse its document, or ingest this copy."""
+        with self._lock:
+            pending, fileEntry["pendingUpload"] = fileEntry["pendingUpload"], None
+            closed = self._closed
+        if pending is None:
+            return  # abandoned at shutdown
+        if closed:
+            self._abandonFile(job, fileEntry, pending)
+            return
+        try:
+            upload = claimUpload(pending["filePath"], pending["fileName"], pending["contentHash"])
+        except Exception as e:
+            discardUpload(pending)
+            self._finishFile(job, fileEntry, "failed", str(e))
+            return
+        existing = upload["duplicate"]
+        if existing and existing.get("pending"):
+            # Another copy claimed it first; wait for that one
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    fileEntry["pendingUpload"] = upload
+            if not closed:
+                self._waitForOriginal(job, fileEntry)
+            else:
+                self._abandonFile(job, fileEntry, upload)
+            return
+        with self._lock:
+            fileEntry.update(docId=upload["docId"], filePath=upload["filePath"])
+        if existing:
+            with self._lock:
+                fileEntry.update(duplicate=True, pageCount=existing.get("pageCount", 0),
+                                 pagesDone=existing.get("pageCount", 0))
+            self._finishFile(job, fileEntry, "done", None)
+            return
+        with self._lock:
+            fileEntry["stage"] = "queued"
+            self._queuedFiles += 1
+        try:
+            self._submitFile(job, fileEntry)
+        except RuntimeError as e:  # queue shut down meanwhile
+            discardUpload(upload)
+            with self._lock:
+                self._queuedFiles -= 1
+            self._finishFile(job, fileEntry, "failed", str(e))
+
+    def _submitFile(self, job: IngestionJob, fileEntry: Dict[str, Any]):
+        future = self._executor.submit(self._runFile, job, fileEntry)
+        future.add_done_callback(lambda f: f.cancelled() and self._fileCancelled(job, fileEntry))
+
+    def _fileCancelled(self, job: IngestionJob, fileEntry: Dict[str, Any]):
+        """A queued file dropped at shutdown: release its claim and its upload, it never started."""
+        with self._lock:
+            self._queuedFiles -= 1
+        self._abandonFile(job, fileEntry, {"duplicate": None, "contentHash": fileEntry["contentHash"],
+                                           "filePath": fileEntry["filePath"]})
+
+    def _abandonFile(self, job: IngestionJob, fileEntry: Dict[str, Any], upload: Dict[str, Any]):
+        discardUpload(upload)
+        self._finishFile(job, fileEntry, "failed", "Ingestion queue shut down before this file started")
+
+    def _finishFile(self, job: IngestionJob, fileEntry: Dict[str, Any], stage: str, error: str | None):
+        with self._lock:
+            fileEntry["stage"] = stage
+            fileEntry["error"] = error
+            if job.status not in ("queued", "running"):
+                job.finishedAt = time.time()
+
+    def _runFile(self, job: IngestionJob, fileEntry: Dict[str, Any]):
+        with self._lock:
+            self._queuedFiles -= 1
+            self._runningFiles += 1
+            fileEntry["stage"] = "parse"
+
+        def progress(stage, seconds, items, pageCount, pagesDone, chunksEmbedded):
+            with self._lock:
+                totals = self._stageTotals[stage]
+                totals["seconds"] += seconds
+                totals["items"] += items
+                fileEntry.update(stage=stage, pageCount=pageCount, pagesDone=pagesDone, chunksEmbedded=chunksEmbedded)
+
+        try:
+            ingestPdfStreaming(fileEntry["filePath"], fileEntry["docId"], fileEntry["fileName"],
+                               progress=progress, contentHash=fileEntry["contentHash"])
+            finalStage, error = "done", None
+        except Exception as e:
+            logger.error(f"Ingestion job {job.jobId} failed for {fileEntry['fileName']}: {e}")
+            finalStage, error = "failed", str(e)
+
+        with self._lock:
+            self._runningFiles -= 1
+        self._finishFile(job, fileEntry, finalStage, error)
+
+    def _evictFinished(self):
+        # Caller holds the lock; drop the oldest finished jobs beyond the history size
+        excess = len(self._jobs) - self.historySize
+        for jobId in [j for j, job in self._jobs.items() if job.finishedAt][:max(0, excess)]:
+            del self._jobs[jobId]
+
+    def shutdown(self):
+        """
+        Stop accepting work: queued files and files waiting on an identical upload are cancelled
+        (claims released, uploads removed), running files are waited for. Only then are the
+        shared parser pools and the OCR lane shut down, so no running ingestion loses its workers.
+        """
+        with self._lock:
+            self._closed = True
+            waiting = []
+            for job in self._jobs.values():
+                for fileEntry in job.files:
+                    if fileEntry["pendingUpload"] is not None:
+                        waiting.append((job, fileEntry, fileEntry["pendingUpload"]))
+                        fileEntry["pendingUpload"] = None
+        for job, fileEntry, upload in waiting:
+            self._abandonFile(job, fileEntry, upload)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        shutdownParserPools()
+        ocrLane.shutdown()
+
+# Singleton instance
+ingestionQueue = IngestionQueue()
@@ -0,0 +1,266 @@
+# app/pdfParser/layoutExtractor.py
+# Page layout extraction (text spans with fonts/positions, images, tables) as a library.
+# Pages are processed in worker processes and every page result is cached on disk, keyed by
+# the PDF's SHA-256 and page number, so ingestion and the JSON/PDF tools never parse twice.
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List
+import fitz  # PyMuPDF
+from app import config
+from app.pdfParser.parserPool import getParserPool, splitContiguous
+from app.pdfParser.tableExtractor import isTableCandidate, plumberTables
+from app.storage.imageStore import imageStore, hashImage
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+LAYOUT_VERSION = "v2"  # bump when the page layout format changes to invalidate old caches
+
+def hashFile(path: str, blockSize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blockSize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def layoutDir(fileHash: str) -> str:
+    """Cache directory of one PDF's page layouts (images live in the shared image store)."""
+    return os.path.join(str(config.LAYOUT_CACHE_DIR), LAYOUT_VERSION, fileHash)
+
+def _pagePath(fileHash: str, pageNumber: int) -> str:
+    return os.path.join(layoutDir(fileHash), f"page{pageNumber}.json")
+
+def loadCachedPage(fileHash: str, pageNumber: int) -> Dict[str, Any] | None:
+    path = _pagePath(fileHash, pageNumber)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # torn write from a killed worker: treat as a miss
+
+def hasCachedLayout(fileHash: str, pageCount: int) -> bool:
+    return all(os.path.exists(_pagePath(fileHash, n)) for n in range(1, pageCount + 1))
+
+def _savePage(fileHash: str, page: Dict[str, Any]):
+    path = _pagePath(fileHash, page["page_number"])
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        json.dump(page, f, ensure_ascii=False)
+    os.replace(tmpPath, path)
+
+class _ImageWriter:
+    """
+    Per-worker image deduplication. Each xref is looked at once; its raw stream is hashed and,
+    unless the store already has that content, converted and written on a thread pool.
+    PNG and RGB/gray JPEG streams are stored as they are, without re-encoding.
+    """
+    def __init__(self, threads: int):
+        self._names: Dict[int, str | None] = {}  # xref -> stored name
+        self._submitted = set()
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._futures = []
+
+    def nameFor(self, doc, xref: int) -> str | None:
+        if xref not in self._names:
+            self._names[xref] = self._store(doc, xref)
+        return self._names[xref]
+
+    def _store(self, doc, xref: int) -> str | None:
+        try:
+            info = doc.extract_image(xref)
+        except Exception:
+            info = None
+        if not info or not info.get("image"):
+            return self._storePixmap(doc, xref)
+        raw, ext = info["image"], info.get("ext", "")
+        passthrough = ext == "png" or (ext in ("jpeg", "jpg") and info.get("colorspace", 3) <= 3)
+        storedExt = ("jpeg" if ext == "jpg" else ext) if passthrough else "png"
+        name = f"{hashImage(raw)}.{storedExt}"
+        if name not in self._submitted and not imageStore.has(name):
+            self._submitted.add(name)
+            self._futures.append((xref, name, self._executor.submit(_encodeImage, raw, name, passthrough)))
+        return name
+
+    def _storePixmap(self, doc, xref: int) -> str | None:
+        # Streams that neither pass through nor decode with PIL (JBIG2, JPX, ...): let MuPDF render
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.n >= 5:  # CMYK
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            data = pix.tobytes("png")
+        except Exception as e:
+            logger.warning(f"Failed to extract image xref={xref}: {e}")
+            return None
+        name = f"{hashImage(data)}.png"
+        if not imageStore.has(name):
+            imageStore.put(name, data)
+        return name
+
+    def finish(self, doc) -> Dict[str, str | None]:
+        """Waits for pending writes; returns {failed name: replacement name} for fallbacks."""
+        replaced = {}
+        for xref, name, future in self._futures:
+            if not future.result():
+                replaced[name] = self._storePixmap(doc, xref)
+        self._executor.shutdown()
+        return replaced
+
+def _encodeImage(raw: bytes, name: str, passthrough: bool) -> bool:
+    if not passthrough:
+        import io
+        from PIL import Image
+        try:
+            img = Image.open(io.BytesIO(raw))
+            out = io.BytesIO()
+            img.convert("RGBA" if "A" in img.getbands() else "RGB").save(out, format="PNG")
+            raw = out.getvalue()
+        except Exception:
+            return False
+    imageStore.put(name, raw)
+    return True
+
+def _extractPage(doc, plumberPage, pageIndex: int, images: _ImageWriter) -> Dict[str, Any]:
+    page = doc[pageIndex]
+    pageNumber = pageIndex + 1
+    width, height = page.rect.width, page.rect.height
+    page_dict = {
+        "page_number": pageNumber,
+        "width": width,
+        "height": height,
+        "text": page.get_text(),  # plain text, identical to parser.extractPages, for ingestion
+        "elements": []
+    }
+
+    # === Extract text with font & positions ===
+    text_dict = page.get_text("dict")
+    for block in text_dict["blocks"]:
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                page_dict["elements"].append({
+                    "type": "textbox",
+                    "position": {
+                        "x": span["bbox"][0],
+                        "y": span["bbox"][1],
+                        "width": span["bbox"][2] - span["bbox"][0],
+                        "height": span["bbox"][3] - span["bbox"][1],
+                    },
+                    "font": {
+                        "name": span.get("font", "Unknown"),
+                        "size": span.get("size", 0),
+                        "bold": "Bold" in span.get("font", ""),
+                        "italic": "Italic" in span.get("font", ""),
+                    },
+                    "content": span["text"]
+                })
+
+    # === Images: reference the content-addressed store, encoded by _ImageWriter ===
+    for img in page.get_images(full=True):
+        xref = img[0]
+        name = images.nameFor(doc, xref)
+        if not name:
+            continue
+        for rect in page.get_image_rects(xref):
+            page_dict["elements"].append({
+                "type": "image",
+                "position": {"x": rect.x0, "y": rect.y0, "width": rect.width, "height": rect.height},
+                "src": os.path.join("images", name)
+            })
+
+    # === Extract tables (pdfplumber, only on pages with ruling lines) ===
+    if plumberPage is not None and isTableCandidate(page):
+        try:
+            for table in plumberTables(plumberPage, pageNumber):
+                x0, y0, x1, y1 = table["bbox"]
+                page_dict["elements"].append({
+                    "type": "table",
+                    "position": {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0},
+                    "content": [table["header"]] + table["rows"],  # 2D array of cell texts
+                })
+        except Exception as e:
+            logger.warning(f"Table extraction failed on page {pageNumber}: {e}")
+    return page_dict
+
+def _extractPageRange(pdfPath: str, fileHash: str, pageNumbers: List[int]) -> List[Dict[str, Any]]:
+    # Runs in a worker process: each worker opens its own PyMuPDF and pdfplumber handles
+    import pdfplumber
+    images = _ImageWriter(config.IMAGE_ENCODE_THREADS)
+    pages = []
+    with fitz.open(pdfPath) as doc, pdfplumber.open(pdfPath) as plumberDoc:
+        for pageNumber in pageNumbers:
+            pages.append(_extractPage(doc, plumberDoc.pages[pageNumber - 1], pageNumber - 1, images))
+        replaced = images.finish(doc)
+    # Pages are cached only once every image they reference is in the store
+    for page in pages:
+        if replaced:
+            page["elements"] = [_replaceImage(e, replaced) for e in page["elements"]]
+            page["elements"] = [e for e in page["elements"] if e is not None]
+        _savePage(fileHash, page)
+    return pages
+
+def _replaceImage(element: Dict[str, Any], replaced: Dict[str, str | None]) -> Dict[str, Any] | None:
+    if element["type"] != "image":
+        return element
+    name = os.path.basename(element["src"])
+    if name not in replaced:
+        return element
+    return {**element, "src": os.path.join("images", replaced[name])} if replaced[name] else None
+
+def imagePath(src: str) -> str:
+    """Stored file behind an image element's "src"."""
+    return imageStore.path(src)
+
+def extractLayoutPages(pdfPath: str, pageNumbers: List[int] = None, fileHash: str = None,
+                       workers: int = 1, executor: ProcessPoolExecutor = None) -> List[Dict[str, Any]]:
+    """
+    Returns the layout of the given (1-based) pages, in order. Cached pages are read from disk;
+    the rest are extracted in `workers` contiguous page ranges on the shared parser pool
+    (or on executor if given) and cached.
+    """
+    fileHash = fileHash or hashFile(pdfPath)
+    if pageNumbers is None:
+        with fitz.open(pdfPath) as doc:
+            pageNumbers = list(range(1, len(doc) + 1))
+
+    pages = {n: loadCachedPage(fileHash, n) for n in pageNumbers}
+    missing = [n for n, page in pages.items() if page is None]
+    if missing:
+        os.makedirs(layoutDir(fileHash), exist_ok=True)
+        if executor is None and workers <= 1:
+            results = [_extractPageRange(pdfPath, fileHash, missing)]
+        else:
+            executor = executor or getParserPool(workers)
+            futures = [executor.submit(_extractPageRange, pdfPath, fileHash, r) for r in splitContiguous(missing, workers)]
+            results = [f.result() for f in futures]
+        for rangePages in results:
+            for page in rangePages:
+                pages[page["page_number"]] = page
+        logger.info(f"Extracted layout for {len(missing)} page(s), {len(pageNumbers) - len(missing)} from cache")
+    return [pages[n] for n in pageNumbers]
+
+def extractLayout(pdfPath: str, workers: int = None, fileHash: str = None) -> Dict[str, Any]:
+    """Full document layout: {"document", "fileHash", "pages": [...]}."""
+    fileHash = fileHash or hashFile(pdfPath)
+    pages = extractLayoutPages(pdfPath, fileHash=fileHash, workers=workers or config.PARSER_WORKERS)
+    return {"document": os.path.basename(pdfPath), "fileHash": fileHash, "pages": pages}
+
+def iterLayoutPages(pdfPath: str, batchSize: int = 16, fileHash: str = None, workers: int = 1):
+    """
+    Yields lists of full page layouts, batchSize pages at a time, so callers (ingestion,
+    the binary layout writer) never hold the whole document. Uncached pages are extracted
+    (and cached) batch by batch.
+    """
+    fileHash = fileHash or hashFile(pdfPath)
+    with fitz.open(pdfPath) as doc:
+        pageCount = len(doc)
+    for start in range(1, pageCount + 1, batchSize):
+        batch = list(range(start, min(start + batchSize, pageCount + 1)))
+        yield extractLayoutPages(pdfPath, batch, fileHash=fileHash, workers=workers)
+
+def iterLayoutPageBatches(pdfPath: str, batchSize: int = 16, fileHash: str = None, workers: int = 1):
+    """Drop-in for parser.iterPageBatches backed by the layout cache: yields [(pageNumber, text), ...]."""
+    for pages in iterLayoutPages(pdfPath, batchSize, fileHash=fileHash, workers=workers):
+        yield [(p["page_number"], p["text"]) for p in pages]
@@ -0,0 +1,178 @@
+# app/pdfParser/layoutFormat.py
+# Compact binary layout files, written and read one page at a time.
+#
+#   file  = MAGIC, codec byte, then frames
+#   frame = 4-byte big-endian length + zlib-compressed payload
+#
+# The first frame is the header ({"document", "fileHash"}); every following frame is one page.
+# Pages are stored column-wise: text spans become parallel arrays with a per-page font table
+# instead of one dict per span, and other elements (images, tables) keep their position in the
+# element order. The payload codec is msgpack when it is installed, otherwise JSON. Readers
+# handle both.
+import os
+import json
+import zlib
+import struct
+from typing import Dict, Any, Iterator, List
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON payloads are a bit larger and slower, same format otherwise
+    msgpack = None
+
+MAGIC = b"BRLAYOUT"
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+_LENGTH = struct.Struct(">I")
+
+def isBinaryLayout(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def toColumnar(page: Dict[str, Any]) -> Dict[str, Any]:
+    fonts: List[list] = []
+    fontIndex: Dict[tuple, int] = {}
+    cols = {k: [] for k in ("x", "y", "w", "h", "font", "content")}
+    other = []
+    for i, element in enumerate(page.get("elements", [])):
+        if element.get("type") != "textbox":
+            other.append([i, element])
+            continue
+        pos, font = element["position"], element.get("font", {})
+        key = (font.get("name", "Unknown"), font.get("size", 0), font.get("bold", False), font.get("italic", False))
+        if key not in fontIndex:
+            fontIndex[key] = len(fonts)
+            fonts.append(list(key))
+        cols["x"].append(pos["x"])
+        cols["y"].append(pos["y"])
+        cols["w"].append(pos["width"])
+        cols["h"].append(pos["height"])
+        cols["font"].append(fontIndex[key])
+        cols["content"].append(element.get("content", ""))
+    rest = {k: v for k, v in page.items() if k != "elements"}
+    return {**rest, "fonts": fonts, "spans": cols, "other": other}
+
+def fromColumnar(col: Dict[str, Any]) -> Dict[str, Any]:
+    spans, fonts = col["spans"], col["fonts"]
+    textboxes = (
+        {
+            "type": "textbox",
+            "position": {"x": x, "y": y, "width": w, "height": h},
+            "font": dict(zip(("name", "size", "bold", "italic"), fonts[f])),
+            "content": content
+        }
+        for x, y, w, h, f, content in zip(spans["x"], spans["y"], spans["w"], spans["h"], spans["font"], spans["content"])
+    )
+    other = {i: element for i, element in col["other"]}
+    total = len(spans["content"]) + len(other)
+    elements = [other[i] if i in other else next(textboxes) for i in range(total)]
+    page = {k: v for k, v in col.items() if k not in ("fonts", "spans", "other")}
+    page["elements"] = elements
+    return page
+
+class LayoutWriter:
+    """
+    Writes a layout page by page; use as a context manager. Frames go to path + ".tmp", which
+    replaces path only on a clean close(), so a crash never leaves a truncated layout behind.
+    """
+    def __init__(self, path: str, document: str, fileHash: str = None, level: int = 6):
+        self.codec = CODEC_MSGPACK if msgpack else CODEC_JSON
+        self.level = level
+        self.path = path
+        self._tmpPath = path + ".tmp"
+        self._f = open(self._tmpPath, "wb")
+        self._f.write(MAGIC + bytes([self.codec]))
+        self._writeFrame({"document": document, "fileHash": fileHash})
+
+    def _encode(self, obj) -> bytes:
+        if self.codec == CODEC_MSGPACK:
+            return msgpack.packb(obj, use_bin_type=True)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def _writeFrame(self, obj):
+        payload = zlib.compress(self._encode(obj), self.level)
+        self._f.write(_LENGTH.pack(len(payload)))
+        self._f.write(payload)
+
+    def writePage(self, page: Dict[str, Any]):
+        self._writeFrame(toColumnar(page))
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        os.replace(self._tmpPath, self.path)
+
+    def abort(self):
+        """Discards everything written; path is left as it was."""
+        self._f.close()
+        if os.path.exists(self._tmpPath):
+            os.remove(self._tmpPath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, *exc):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+class LayoutReader:
+    """Reads the header eagerly and pages lazily; use as a context manager."""
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        if self._f.read(len(MAGIC)) != MAGIC:
+            self._f.close()
+            raise ValueError(f"Not a binary layout file: {path}")
+        self.codec = self._f.read(1)[0]
+        if self.codec == CODEC_MSGPACK and msgpack is None:
+            self._f.close()
+            raise ImportError("msgpack is required to read this layout file")
+        self.header = self._readFrame()
+
+    def _readFrame(self):
+        prefix = self._f.read(_LENGTH.size)
+        if len(prefix) < _LENGTH.size:
+            return None
+        payload = zlib.decompress(self._f.read(_LENGTH.unpack(prefix)[0]))
+        if self.codec == CODEC_MSGPACK:
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload)
+
+    def iterPages(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            col = self._readFrame()
+            if col is None:
+                return
+            yield fromColumnar(col)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def writeLayout(path: str, layout: Dict[str, Any]):
+    with LayoutWriter(path, layout.get("document"), layout.get("fileHash")) as writer:
+        for page in layout["pages"]:
+            writer.writePage(page)
+
+def readLayout(path: str) -> Dict[str, Any]:
+    """Whole layout in the same shape as the JSON files; prefer LayoutReader.iterPages for big files."""
+    with LayoutReader(path) as reader:
+        return {**reader.header, "pages": list(reader.iterPages())}
+
+def iterLayoutFile(path: str) -> Iterator[Dict[str, Any]]:
+    """Pages of a layout file in either format (JSON files are loaded whole)."""
+    if isBinaryLayout(path):
+        with LayoutReader(path) as reader:
+            yield from reader.iterPages()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)["pages"]
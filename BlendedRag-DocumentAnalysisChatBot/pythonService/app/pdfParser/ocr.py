@@ -0,0 +1,126 @@
+# app/pdfParser/ocr.py
+# OCR fallback for scanned pages. Only pages without a usable text layer are rasterized and
+# OCR'd, on a bounded process pool shared by every ingestion. Results are cached by a hash of
+# the rendered page image, so re-ingesting a document never OCRs the same page twice.
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple
+import fitz  # PyMuPDF
+from app import config
+from app.pdfParser.parserPool import spawnPool
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+def needsOcr(text: str) -> bool:
+    return len((text or "").strip()) < config.OCR_MIN_TEXT_CHARS
+
+def _cachePath(imageHash: str) -> str:
+    return os.path.join(str(config.OCR_CACHE_DIR), imageHash[:2], f"{imageHash}.json")
+
+def _loadCached(imageHash: str) -> Dict[str, Any] | None:
+    try:
+        with open(_cachePath(imageHash), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _saveCached(imageHash: str, result: Dict[str, Any]):
+    path = _cachePath(imageHash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmpPath, path)
+
+def ocrImageBytes(imageBytes: bytes, lang: str = "eng") -> Dict[str, Any]:
+    """Tesseract word boxes for an encoded image; same output shape as the old ocr_image_get_data."""
+    import io
+    import pytesseract
+    from PIL import Image
+    img = Image.open(io.BytesIO(imageBytes)).convert("RGB")
+    ocr_data = pytesseract.image_to_data(img, lang=lang, output_type=pytesseract.Output.DICT)
+    text_items = []
+    for i in range(len(ocr_data.get("text", []))):
+        txt = ocr_data["text"][i].strip()
+        if not txt:
+            continue
+        text_items.append({
+            "text": txt,
+            "bbox": {"x": int(ocr_data["left"][i]), "y": int(ocr_data["top"][i]),
+                     "w": int(ocr_data["width"][i]), "h": int(ocr_data["height"][i])},
+            "conf": int(float(ocr_data["conf"][i])) if i < len(ocr_data.get("conf", [])) else -1
+        })
+    return {"text": " ".join(t["text"] for t in text_items), "items": text_items}
+
+def _ocrPage(filePath: str, pageNumber: int, dpi: int, lang: str) -> Tuple[int, str, bool]:
+    # Runs in a worker: rasterize, then OCR only if this exact page image was never seen
+    with fitz.open(filePath) as doc:
+        pngBytes = doc[pageNumber - 1].get_pixmap(dpi=dpi).tobytes("png")
+    imageHash = hashlib.sha256(lang.encode() + b"\0" + pngBytes).hexdigest()
+    cached = _loadCached(imageHash)
+    if cached is not None:
+        return pageNumber, cached["text"], True
+    result = ocrImageBytes(pngBytes, lang=lang)
+    _saveCached(imageHash, result)
+    return pageNumber, result["text"], False
+
+class OcrLane:
+    def __init__(self, workers: int = None):
+        self.workers = workers or config.OCR_WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {"pagesOcred": 0, "cacheHits": 0, "failures": 0}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = spawnPool(self.workers)
+            return self._executor
+
+    def ocrPages(self, filePath: str, pageNumbers: List[int]) -> Dict[int, str]:
+        """OCR text for the given pages; pages that fail are left out."""
+        futures = [self._pool().submit(_ocrPage, filePath, n, config.OCR_DPI, config.OCR_LANG) for n in pageNumbers]
+        texts = {}
+        for n, future in zip(pageNumbers, futures):
+            try:
+                pageNumber, text, cached = future.result()
+            except Exception as e:
+                logger.error(f"OCR failed for page {n} of {filePath}: {e}")
+                with self._lock:
+                    self._stats["failures"] += 1
+                continue
+            texts[pageNumber] = text
+            with self._lock:
+                self._stats["cacheHits" if cached else "pagesOcred"] += 1
+        return texts
+
+    def fillEmptyPages(self, filePath: str, batch: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """Replaces the text of pages that have no text layer with their OCR text."""
+        empty = [n for n, text in batch if needsOcr(text)]
+        if not empty:
+            return batch
+        texts = self.ocrPages(filePath, empty)
+        logger.info(f"OCR fallback for {len(empty)} page(s) of {os.path.basename(filePath)}")
+        return [(n, texts.get(n, text)) for n, text in batch]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown()
+                self._executor = None
+
+def withOcrFallback(filePath: str, batches):
+    """Wraps a page-batch iterator, OCR'ing pages that came back without text."""
+    for batch in batches:
+        yield ocrLane.fillEmptyPages(filePath, batch)
+
+# Singleton instance
+ocrLane = OcrLane()
@@ -0,0 +1,21 @@
+# app/pdfParser/pageSource.py
+# Page text for ingestion, shared by the API pipeline and the bulk CLI's parser processes.
+# Imports only the parsing modules, so worker processes never load the embedding model or stores.
+from app import config
+from app.pdfParser.parser import iterPageBatches
+from app.pdfParser.layoutExtractor import hasCachedLayout, iterLayoutPageBatches
+from app.pdfParser.ocr import withOcrFallback
+
+def iterSourcePages(filePath: str, pageBatchSize: int, pageCount: int, contentHash: str = None, workers: int = None):
+    """
+    Page text source for ingestion: the layout cache when it already has this file (or when
+    INGEST_USE_LAYOUT asks for layout extraction), otherwise plain PyMuPDF text extraction.
+    Both yield the same page text, so chunks do not depend on the source.
+    Pages without a text layer (scans) go through the OCR lane when OCR_ENABLED.
+    """
+    workers = workers or config.PARSER_WORKERS
+    if contentHash and (config.INGEST_USE_LAYOUT or hasCachedLayout(contentHash, pageCount)):
+        batches = iterLayoutPageBatches(filePath, pageBatchSize, fileHash=contentHash, workers=workers)
+    else:
+        batches = iterPageBatches(filePath, pageBatchSize, workers=workers)
+    return withOcrFallback(filePath, batches) if config.OCR_ENABLED else batches
@@ -1,5 +1,11 @@
 # parser.py
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 import fitz  # PyMuPDF
+from app import config
+from app.pdfParser.parserPool import getParserPool, splitContiguous
 
 def extractTextFromPdf(filePath: str):
     """Extracts text from a PDF and returns (text, pageCount)"""
@@ -9,3 +15,86 @@ def extractTextFromPdf(filePath: str):
         for page in doc:
             text_list.append(page.get_text())
     return "\n".join(text_list), pageCount
+
+def getPageCount(filePath: str) -> int:
+    """Returns the number of pages without extracting any text"""
+    with fitz.open(filePath) as doc:
+        return len(doc)
+
+def _extractPageRange(filePath: str, start: int, end: int) -> List[Tuple[int, str]]:
+    # Runs inside a worker process: fitz documents can't be shared across processes,
+    # so every task opens its own handle.
+    with fitz.open(filePath) as doc:
+        return [(i + 1, doc[i].get_text()) for i in range(start, end)]
+
+def extractPages(filePath: str, workers: int = 1, startPage: int = 0, endPage: int = None, executor: ProcessPoolExecutor = None) -> List[Tuple[int, str]]:
+    """
+    Extracts text page by page and returns [(pageNumber, text), ...] in page order.
+    With workers > 1 the page range is split into `workers` contiguous ranges (one fitz.open
+    per range) on the shared parser pool, or on executor if given.
+    startPage/endPage are 0-based, endPage exclusive.
+    """
+    if endPage is None:
+        endPage = getPageCount(filePath)
+    if endPage <= startPage:
+        return []
+    if executor is None and workers <= 1:
+        return _extractPageRange(filePath, startPage, endPage)
+
+    ranges = splitContiguous(range(startPage, endPage), workers)
+    executor = executor or getParserPool(workers)
+    futures = [executor.submit(_extractPageRange, filePath, r[0], r[-1] + 1) for r in ranges]
+    pages = []
+    for future in futures:  # futures are in range order, so pages stay ordered
+        pages.extend(future.result())
+    return pages
+
+def extractTextFromPdfParallel(filePath: str, workers: int = None):
+    """Parallel counterpart of extractTextFromPdf, returns (text, pageCount)"""
+    pages = extractPages(filePath, workers=workers or os.cpu_count() or 1)
+    return "\n".join(text for _, text in pages), len(pages)
+
+def iterPageBatches(filePath: str, batchSize: int = 16, workers: int = 1):
+    """
+    Yields lists of (pageNumber, text) tuples, batchSize pages at a time.
+    Serially, only one batch of page text is held in memory at once.
+    With workers > 1 the document is read in contiguous ranges of at least
+    PARSER_MIN_PAGES_PER_TASK pages (a whole number of batches, one fitz.open each) on the
+    shared parser pool, and up to `workers` ranges stay in flight while earlier batches are
+    consumed, so parsing overlaps chunking and embedding.
+    """
+    if batchSize < 1:
+        raise ValueError("batchSize must be at least 1")
+    if workers > 1:
+        pageCount = getPageCount(filePath)
+        taskPages = batchSize * max(1, -(-config.PARSER_MIN_PAGES_PER_TASK // batchSize))
+        starts = iter(range(0, pageCount, taskPages))
+        executor = getParserPool(workers)
+        inFlight = deque()
+
+        def submitNext():
+            start = next(starts, None)
+            if start is not None:
+                inFlight.append(executor.submit(_extractPageRange, filePath, start, min(start + taskPages, pageCount)))
+
+        for _ in range(workers):
+            submitNext()
+        try:
+            while inFlight:
+                pages = inFlight.popleft().result()
+                submitNext()
+                for b in range(0, len(pages), batchSize):
+                    yield pages[b:b + batchSize]
+        finally:
+            for future in inFlight:  # consumer stopped early
+                future.cancel()
+        return
+    with fitz.open(filePath) as doc:
+        batch = []
+        for pageIndex in range(len(doc)):
+            batch.append((pageIndex + 1, doc[pageIndex].get_text()))
+            if len(batch) >= batchSize:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,36 @@
+# app/pdfParser/parserPool.py
+# Long-lived process pools for PDF parsing (text, layout and table extraction), created once per
+# process and shared by every ingestion in it, so concurrent jobs queue on a bounded set of
+# workers instead of each starting its own. Workers are spawned rather than forked: the API
+# process may already hold torch / OpenMP threads whose locks a forked child can deadlock on.
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from app import config
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_lock = threading.Lock()
+
+def spawnPool(workers: int) -> ProcessPoolExecutor:
+    """A new process pool whose workers are spawned."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def getParserPool(workers: int = None) -> ProcessPoolExecutor:
+    """The shared pool with `workers` processes (PARSER_WORKERS by default), started on first use."""
+    workers = workers or config.PARSER_WORKERS
+    with _lock:
+        if workers not in _pools:
+            _pools[workers] = spawnPool(workers)
+        return _pools[workers]
+
+def splitContiguous(items: List, parts: int) -> List[List]:
+    """items cut into at most `parts` contiguous, nearly equal runs (one task per worker)."""
+    size = max(1, -(-len(items) // max(1, parts)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def shutdownParserPools():
+    with _lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
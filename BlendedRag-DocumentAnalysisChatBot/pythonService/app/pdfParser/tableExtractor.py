@@ -0,0 +1,123 @@
+# app/pdfParser/tableExtractor.py
+# Selective table extraction. pdfplumber's find_tables() is slow, so a cheap PyMuPDF pass first
+# counts ruling lines (vector strokes and thin rectangles) on every page. Only pages with enough
+# horizontal and vertical rulings to form a grid go to pdfplumber. That is also what
+# pdfplumber's default "lines" strategy needs to find a table. Results are cached per file hash.
+import os
+import json
+from typing import Dict, Any, List, Tuple
+import fitz  # PyMuPDF
+from app import config
+from app.pdfParser.parserPool import getParserPool, splitContiguous
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+TABLE_VERSION = "v1"  # bump when the table format changes to invalidate old caches
+MIN_RULING_LENGTH = 8.0  # points; shorter strokes are glyph decoration, not table rules
+MAX_RULING_THICKNESS = 2.0  # rectangles thinner than this are drawn rules
+
+def rulingCounts(page) -> Tuple[int, int]:
+    """(horizontal, vertical) ruling lines drawn on a PyMuPDF page."""
+    horizontal = vertical = 0
+    for path in page.get_drawings():
+        for item in path["items"]:
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                dx, dy = abs(p2.x - p1.x), abs(p2.y - p1.y)
+                if dy < 1 and dx >= MIN_RULING_LENGTH:
+                    horizontal += 1
+                elif dx < 1 and dy >= MIN_RULING_LENGTH:
+                    vertical += 1
+            elif item[0] == "re":
+                rect = item[1]
+                if rect.height <= MAX_RULING_THICKNESS and rect.width >= MIN_RULING_LENGTH:
+                    horizontal += 1
+                elif rect.width <= MAX_RULING_THICKNESS and rect.height >= MIN_RULING_LENGTH:
+                    vertical += 1
+                elif rect.width >= MIN_RULING_LENGTH and rect.height >= MIN_RULING_LENGTH:
+                    horizontal += 2  # bordered cell: four edges
+                    vertical += 2
+    return horizontal, vertical
+
+def isTableCandidate(page, minRulings: int = None) -> bool:
+    minRulings = minRulings or config.TABLE_MIN_RULINGS
+    horizontal, vertical = rulingCounts(page)
+    return horizontal >= minRulings and vertical >= minRulings
+
+def findCandidatePages(pdfPath: str) -> List[int]:
+    """1-based numbers of the pages that may contain a ruled table."""
+    with fitz.open(pdfPath) as doc:
+        return [i + 1 for i, page in enumerate(doc) if isTableCandidate(page)]
+
+def plumberTables(plumberPage, pageNumber: int) -> List[Dict[str, Any]]:
+    """Tables of one pdfplumber page as structured rows; the first row is taken as the header."""
+    tables = []
+    for index, table in enumerate(plumberPage.find_tables()):
+        rows = [[(cell or "").strip() for cell in row] for row in table.extract()]
+        if not rows:
+            continue
+        tables.append({
+            "page": pageNumber,
+            "index": index,
+            "bbox": list(table.bbox),
+            "header": rows[0],
+            "rows": rows[1:]
+        })
+    return tables
+
+def _extractTablesRange(pdfPath: str, pageNumbers: List[int]) -> List[Dict[str, Any]]:
+    # Runs in a worker process
+    import pdfplumber
+    tables = []
+    with pdfplumber.open(pdfPath) as plumberDoc:
+        for pageNumber in pageNumbers:
+            try:
+                tables.extend(plumberTables(plumberDoc.pages[pageNumber - 1], pageNumber))
+            except Exception as e:
+                logger.warning(f"Table extraction failed on page {pageNumber} of {pdfPath}: {e}")
+    return tables
+
+def _cachePath(fileHash: str) -> str:
+    return os.path.join(str(config.TABLE_CACHE_DIR), TABLE_VERSION, f"{fileHash}.json")
+
+def _loadCached(fileHash: str) -> List[Dict[str, Any]] | None:
+    try:
+        with open(_cachePath(fileHash), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _saveCached(fileHash: str, tables: List[Dict[str, Any]]):
+    path = _cachePath(fileHash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        json.dump(tables, f, ensure_ascii=False)
+    os.replace(tmpPath, path)
+
+def extractTables(pdfPath: str, fileHash: str = None, workers: int = 1) -> List[Dict[str, Any]]:
+    """
+    All ruled tables of a PDF, ordered by page. pdfplumber runs only on prefiltered pages,
+    split into `workers` contiguous runs on the shared parser pool; with fileHash the result
+    is cached and reused.
+    """
+    if fileHash:
+        cached = _loadCached(fileHash)
+        if cached is not None:
+            return cached
+
+    candidates = findCandidatePages(pdfPath)
+    if not candidates:
+        tables = []
+    elif workers <= 1 or len(candidates) == 1:
+        tables = _extractTablesRange(pdfPath, candidates)
+    else:
+        ranges = splitContiguous(candidates, workers)
+        results = getParserPool(workers).map(_extractTablesRange, [pdfPath] * len(ranges), ranges)
+        tables = [t for rangeTables in results for t in rangeTables]
+    logger.info(f"Found {len(tables)} table(s) on {len(candidates)} candidate page(s) of {os.path.basename(pdfPath)}")
+
+    if fileHash:
+        _saveCached(fileHash, tables)
+    return tables
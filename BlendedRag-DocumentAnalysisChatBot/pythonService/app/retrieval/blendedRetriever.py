@@ -4,7 +4,7 @@ from app.retrieval.denseRetriever import DenseRetriever
 from app.retrieval.sparseRetriever import SparseRetriever
 from app.utils.logger import getLogger
 from app.chromaClient import chromaClient
-from app.embeddings.embeddingClient import EmbeddingClient
+from app.embeddings.queryEmbeddingCache import queryEmbeddingCache
 
 logger = getLogger(__name__)
 
@@ -14,10 +14,9 @@ class BlendedRetriever:
         alpha: weight for dense retriever (0.3 = 30% dense, 70% sparse)
         """
         self.alpha = alpha
-        embedding_client = EmbeddingClient()
         self.dense = DenseRetriever(
             chroma_client=chromaClient,
-            embedding_fn=embedding_client.generateEmbedding
+            embedding_fn=queryEmbeddingCache.embedOne
         )
         self.sparse = SparseRetriever()  # Adjust if needs params
 
@@ -31,13 +30,14 @@ class BlendedRetriever:
         logger.debug(f"Normalized scores: {normalized}")  # Log normalized scores
         return normalized
 
-    def query(self, doc_id: str, query: str, top_k: int = 10) -> List[Dict]:  # Increased top_k to 10
+    def query(self, doc_id: str, query: str, top_k: int = 10, query_vector=None) -> List[Dict]:  # Increased top_k to 10
         """
         Blends dense (semantic) and sparse (keyword) scores.
+        query_vector, if the caller already embedded the query, skips the encoder.
         Returns ranked chunks.
         """
         logger.info(f"Querying doc_id: {doc_id} with query: {query}, top_k: {top_k}")
-        dense_results = self.dense.query(doc_id, query, top_k=top_k)
+        dense_results = self.dense.query(doc_id, query, top_k=top_k, query_vector=query_vector)
         sparse_results = self.sparse.query(doc_id, query, top_k=top_k)
 
         # Extract scores & chunks
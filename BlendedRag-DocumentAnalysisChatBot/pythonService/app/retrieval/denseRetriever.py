@@ -1,23 +1,38 @@
 # pythonService/app/retrieval/denseRetriever.py
 from typing import List, Dict
+import numpy as np
+from app.retrieval.denseSearch import searchDocument
+from app.storage.vectorStore import ChromaVectorStore, getVectorStore
 
 class DenseRetriever:
-    def __init__(self, chroma_client, embedding_fn):
+    """
+    Dense search within one docId: the per-document vector index, or the configured vector
+    store filtered by docId (see denseSearch). The query is embedded by embedding_fn
+    (or passed in precomputed), never by Chroma's default embedding function, and collection
+    handles are looked up once and reused.
+    """
+    def __init__(self, chroma_client, embedding_fn, collection_name: str = "documents"):
         self.chroma = chroma_client
         self.embed = embedding_fn
+        self.collection_name = collection_name
+        self._collections = {}
 
-    def query(self, collection_name: str, q: str, top_k: int=20) -> List[Dict]:
-        col = self.chroma.get_or_create_collection(collection_name)
-        res = col.query(query_texts=[q], n_results=top_k,
-                        include=["documents","metadatas","distances"])
-        out = []
-        for i, cid in enumerate(res["ids"][0]):
-            out.append({
-                "chunk": {
-                    "id": cid,
-                    "text": res["documents"][0][i],
-                    "meta": res["metadatas"][0][i],
-                },
-                "score": 1.0 - float(res["distances"][0][i]) if "distances" in res else 0.0,
-            })
-        return out
+    def _store(self, name: str):
+        if name == "documents":
+            return getVectorStore()  # the shared collection, or the HNSW index built over it
+        store = self._collections.get(name)
+        if store is None:
+            store = self._collections[name] = ChromaVectorStore(self.chroma.get_or_create_collection(name))
+        return store
+
+    def query(self, doc_id: str, q: str, top_k: int=20, query_vector: np.ndarray = None) -> List[Dict]:
+        if query_vector is None:
+            query_vector = self.embed(q)
+        hits = searchDocument(doc_id, query_vector, top_k, store=self._store(self.collection_name))[0]
+        return [
+            {
+                "chunk": {"id": h["id"], "text": h["text"], "meta": h["meta"]},
+                "score": 1.0 - h["distance"],
+            }
+            for h in hits
+        ]
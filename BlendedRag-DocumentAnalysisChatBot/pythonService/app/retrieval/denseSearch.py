@@ -0,0 +1,73 @@
+# app/retrieval/denseSearch.py
+# Dense search scoped to one document, shared by every retrieval path. With
+# DENSE_SEARCH_BACKEND="npy" it is an exact search over the document's memory-mapped embedding
+# matrix (backfilled from Chroma the first time for documents ingested before the index existed);
+# otherwise, or if the document has no vectors at all, a docId-filtered search on the
+# vector store (Chroma, or the in-process HNSW index).
+from typing import List, Dict, Any
+import numpy as np
+from app import config
+from app.storage.documentStore import documentStore
+from app.storage.vectorIndex import vectorIndex
+from app.storage.vectorStore import VectorStore, getVectorStore
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+def _searchIndex(docId: str, queries: np.ndarray, topK: int) -> List[List[Dict[str, Any]]] | None:
+    found = vectorIndex.search(docId, queries, topK)
+    if found is None:
+        matrix = documentStore.exportVectors(docId)
+        if matrix is None:
+            return None
+        vectorIndex.writeDocument(docId, matrix)
+        logger.info(f"Backfilled vector index for docId={docId} ({len(matrix)} rows)")
+        found = vectorIndex.search(docId, queries, topK)
+    rows, scores = found
+    chunks = documentStore.getChunks([f"{docId}_{r}" for r in np.unique(rows)])
+    results = []
+    for queryRows, queryScores in zip(rows, scores):
+        hits = []
+        for r, s in zip(queryRows.tolist(), queryScores.tolist()):
+            chunk = chunks.get(f"{docId}_{r}")
+            if chunk is None:
+                continue  # matrix briefly ahead of Chroma during a replace
+            hits.append({
+                "id": f"{docId}_{r}",
+                "chunkIndex": r,
+                "text": chunk["text"],
+                "meta": chunk["meta"],
+                "distance": 2.0 - 2.0 * s  # squared L2 between unit vectors, as Chroma reports it
+            })
+        results.append(hits)
+    return results
+
+def _searchStore(store: VectorStore, docId: str, queries: np.ndarray, topK: int) -> List[List[Dict[str, Any]]]:
+    results = store.search(queries, topK, docId=docId)
+    # Stores without chunk text (HNSW) get it from Chroma by primary key
+    missing = list({h["id"] for hits in results for h in hits if "text" not in h})
+    chunks = documentStore.getChunks(missing)
+    out = []
+    for hits in results:
+        rows = []
+        for h in hits:
+            if "text" not in h:
+                chunk = chunks.get(h["id"])
+                if chunk is None:
+                    continue
+                h = {**h, "text": chunk["text"], "meta": chunk["meta"]}
+            rows.append({"chunkIndex": h["meta"].get("chunkIndex"), **h})
+        out.append(rows)
+    return out
+
+def searchDocument(docId: str, queryVectors, topK: int, store: VectorStore = None) -> List[List[Dict[str, Any]]]:
+    """
+    Top-k chunks of docId for each query vector (one list per query, closest first).
+    Each hit is {"id", "chunkIndex", "text", "meta", "distance"}; smaller distance is closer.
+    """
+    queries = np.atleast_2d(np.asarray(queryVectors, dtype=np.float32))
+    if config.DENSE_SEARCH_BACKEND == "npy":
+        results = _searchIndex(docId, queries, topK)
+        if results is not None:
+            return results
+    return _searchStore(store or getVectorStore(), docId, queries, topK)
@@ -1,16 +1,13 @@
 # app/retrieval/retriever.py
-# Chroma-based semantic search
+# Dense semantic search (per-document vector index or Chroma)
 
 from typing import List, Dict, Any
-from app.embeddings.embeddingClient import EmbeddingClient
-from app.chromaClient import collection  # Shared collection only
-
-# Singleton embedding client
-embeddingClient = EmbeddingClient()
+from app.embeddings.queryEmbeddingCache import queryEmbeddingCache
+from app.retrieval.denseSearch import searchDocument
 
 def retrieveTopK(docId: str, queryText: str, topK: int = 5) -> List[Dict[str, Any]]:
     """
-    Retrieve top-K most similar chunks for a given query from Chroma.
+    Retrieve top-K most similar chunks of a document for a given query.
 
     Args:
         docId (str): ID of the document to query.
@@ -21,26 +18,8 @@ def retrieveTopK(docId: str, queryText: str, topK: int = 5) -> List[Dict[str, An
         List[Dict[str, Any]]: List of chunks with 'chunkIndex', 'text', and 'score'.
     """
     # Generate embedding for the query
-    queryVec = embeddingClient.generateEmbedding(queryText)
-
-    # Query Chroma collection
-    results = collection.query(
-        query_embeddings=[queryVec],  # no .tolist()
-        n_results=topK,
-        where={"docId": docId}
-    )
-
-    # Handle empty results
-    if not results or len(results.get("metadatas", [])) == 0 or len(results["metadatas"][0]) == 0:
-        return []
-
-    # Process results
-    top_chunks = []
-    for i, metadata in enumerate(results["metadatas"][0]):
-        top_chunks.append({
-            "chunkIndex": metadata.get("chunkIndex"),
-            "text": metadata.get("text", ""),
-            "score": float(results["distances"][0][i])
-        })
+    queryVec = queryEmbeddingCache.embedOne(queryText)
 
-    return top_chunks
+    # Per-document vector index (or Chroma, filtered by docId)
+    hits = searchDocument(docId, queryVec, topK)[0]
+    return [{"chunkIndex": h["chunkIndex"], "text": h["text"], "score": h["distance"]} for h in hits]
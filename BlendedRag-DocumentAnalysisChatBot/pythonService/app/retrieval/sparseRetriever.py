@@ -15,6 +15,7 @@ class SparseRetriever:
         self.indices = {}  # in-memory cache {doc_id: BM25Okapi}
         self._cached_chunks = {}  # {doc_id: chunks}
         self._cached_ids = {}     # {doc_id: ids}
+        self._pending = {}        # {doc_id: (chunks, ids)} for documents ingested in batches
 
     def _get_cache_path(self, doc_id: str) -> str:
         return os.path.join(CACHE_DIR, f"{doc_id}.pkl")
@@ -39,6 +40,40 @@ class SparseRetriever:
 
         logger.info(f"BM25 index built and cached for document {doc_id}")
 
+    def updateDocument(self, doc_id: str, chunks: List[str], ids: List[str]) -> bool:
+        """
+        Bring a document's index in line with a new revision.
+        BM25 IDF depends on every chunk, so any change means a rebuild; an unchanged
+        revision is detected and skipped. Returns True if the index was rebuilt.
+        """
+        try:
+            self._load_index(doc_id)
+        except FileNotFoundError:
+            pass
+        if self._cached_chunks.get(doc_id) == chunks and self._cached_ids.get(doc_id) == ids:
+            logger.info(f"BM25 index unchanged for document {doc_id}")
+            return False
+        self.indexDocument(doc_id, chunks, ids)
+        return True
+
+    def appendChunks(self, doc_id: str, chunks: List[str], ids: List[str]):
+        """
+        Stage a batch of chunks for a document that is being ingested incrementally.
+        BM25 needs corpus-wide statistics, so the index is only built in finalizeDocument().
+        """
+        pendingChunks, pendingIds = self._pending.setdefault(doc_id, ([], []))
+        pendingChunks.extend(chunks)
+        pendingIds.extend(ids)
+
+    def finalizeDocument(self, doc_id: str):
+        """
+        Build the BM25 index from all chunks staged with appendChunks().
+        """
+        chunks, ids = self._pending.pop(doc_id, ([], []))
+        self.indexDocument(doc_id, chunks, ids)
+
+    def discardPending(self, doc_id: str):
+        self._pending.pop(doc_id, None)
 
     def _load_index(self, doc_id: str):
         if doc_id in self.indices:
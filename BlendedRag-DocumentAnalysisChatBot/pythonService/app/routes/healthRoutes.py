@@ -1,7 +1,22 @@
 from fastapi import APIRouter
+from app.embeddings.embeddingEngine import embeddingEngine
+from app.embeddings.embeddingScheduler import embeddingScheduler
+from app.embeddings.embeddingCache import embeddingCache
+from app.embeddings.queryEmbeddingCache import queryEmbeddingCache
 
 router = APIRouter()
 
 @router.get("/")
 def healthCheck():
     return{"status":"ok","service":"Document AI Engine"}
+
+
+@router.get("/embedding")
+def embeddingEngineStats():
+    """
+    Embedding model load time and memory footprint (loaded: false until first use),
+    plus batch-size and queue-wait histograms of the query micro-batcher and the
+    hit rates of the persistent chunk-embedding cache and the in-memory query cache.
+    """
+    return {**embeddingEngine.stats(), "scheduler": embeddingScheduler.stats(),
+            "cache": embeddingCache.stats(), "queryCache": queryEmbeddingCache.stats()}
@@ -1,18 +1,45 @@
 # app/routes/pdfRoutes.py
+from typing import List
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.pdfParser.ingestor import processPdf
+from starlette.concurrency import run_in_threadpool
+from app.pdfParser.ingestor import processPdf, saveUpload, saveRevisionUpload, replaceDocument, discardUpload
+from app.pdfParser.jobQueue import ingestionQueue
 from app.storage.documentStore import documentStore
+from app.storage.tableStore import tableStore
 from app.utils.logger import getLogger
+from app.utils.exceptions import uploadRejectedError, uploadTooLargeError
+from app import config
 from pydantic import BaseModel
 
 router = APIRouter()
 logger = getLogger(__name__)
 
+def uploadErrorStatus(e: uploadRejectedError) -> int:
+    return 413 if isinstance(e, uploadTooLargeError) else 400
+
 class PDFResponse(BaseModel):
     docId: str
     fileName: str
     pageCount: int
-    chunks: list
+    numChunks: int = 0
+    duplicate: bool = False  # true when an identical file was already ingested under docId
+    chunks: list  # empty when the document was ingested in streaming mode
+
+class ReplaceResponse(BaseModel):
+    docId: str
+    fileName: str
+    pageCount: int
+    numChunks: int
+    reusedChunks: int
+    embeddedChunks: int
+    rewrittenChunks: int
+    metadataUpdates: int
+    removedChunks: int
+
+class JobSubmittedResponse(BaseModel):
+    jobId: str
+    status: str
+    documents: List[dict]
 
 @router.post("")  # Explicit route without trailing slash
 async def processPdfEndpoint(file: UploadFile = File(...)):
@@ -20,13 +47,90 @@ async def processPdfEndpoint(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     try:
         uploadResult = await processPdf(file)
-        logger.info(f"Stored {len(uploadResult['chunks'])} chunks with embeddings in ChromaDB for docId: {uploadResult['docId']}")
+        logger.info(f"Stored {uploadResult['numChunks']} chunks with embeddings in ChromaDB for docId: {uploadResult['docId']}")
         return PDFResponse(
             docId=uploadResult["docId"],
             fileName=uploadResult["fileName"],
             pageCount=uploadResult["pageCount"],
+            numChunks=uploadResult["numChunks"],
+            duplicate=uploadResult.get("duplicate", False),
             chunks=[{"text": c["text"]} for c in uploadResult["chunks"]]
         )
+    except uploadRejectedError as e:
+        raise HTTPException(status_code=uploadErrorStatus(e), detail=str(e))
     except Exception as e:
         logger.error(f"Failed to process PDF {file.filename}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/{docId}", response_model=ReplaceResponse)
+async def replaceDocumentEndpoint(docId: str, file: UploadFile = File(...)):
+    """
+    Replace docId with a new revision of the PDF, re-embedding only chunks that changed.
+    """
+    if not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    if not documentStore.hasDocument(docId):
+        raise HTTPException(status_code=404, detail="Document not found")
+    try:
+        upload = await saveRevisionUpload(file, docId)
+        stats = await run_in_threadpool(replaceDocument, docId, upload["filePath"], upload["fileName"],
+                                        contentHash=upload["contentHash"])
+        return ReplaceResponse(**stats)
+    except uploadRejectedError as e:
+        raise HTTPException(status_code=uploadErrorStatus(e), detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to replace document {docId}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs", status_code=202, response_model=JobSubmittedResponse)
+async def submitIngestionJob(files: List[UploadFile] = File(...)):
+    """
+    Save the uploads and queue them for background ingestion.
+    Returns a jobId immediately; poll GET /processPdf/jobs/{jobId} for progress.
+    """
+    if len(files) > config.MAX_FILES_PER_JOB:
+        raise HTTPException(status_code=400, detail=f"At most {config.MAX_FILES_PER_JOB} files per request")
+    for file in files:
+        if not file.filename.endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"Only PDF files are supported: {file.filename}")
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await saveUpload(file))
+    except Exception as e:
+        # Nothing is queued if any file fails to save; drop the claims and files already taken
+        for u in uploads:
+            discardUpload(u)
+        if isinstance(e, uploadRejectedError):
+            raise HTTPException(status_code=uploadErrorStatus(e), detail=str(e))
+        raise
+
+    job = ingestionQueue.submit(uploads)
+    return JobSubmittedResponse(
+        jobId=job.jobId,
+        status=job.status,
+        documents=[{"docId": u["docId"], "fileName": u["fileName"], "duplicate": bool(u["duplicate"]),
+                    "pending": bool(u["duplicate"] and u["duplicate"].get("pending"))} for u in uploads]
+    )
+
+@router.get("/jobs")
+def ingestionQueueStats():
+    """Queue depth, running files and per-stage throughput of the ingestion pool."""
+    return ingestionQueue.stats()
+
+@router.get("/jobs/{jobId}")
+def getIngestionJob(jobId: str):
+    job = ingestionQueue.getJob(jobId)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.toDict()
+
+@router.get("/{docId}/tables")
+def getDocumentTables(docId: str, page: int = None):
+    """Structured rows of the tables found in docId at ingestion, optionally for one page."""
+    tables = tableStore.getTables(docId, page)
+    if tables is None:
+        raise HTTPException(status_code=404, detail="No tables recorded for this document")
+    return {"docId": docId, "tables": tables}
@@ -3,14 +3,14 @@ from pydantic import BaseModel
 from typing import List
 import re
 from app.retrieval.queryRefiner import refine_query_intelligent
-from app.embeddings.embeddingClient import EmbeddingClient
+from app.embeddings.queryEmbeddingCache import queryEmbeddingCache
 from app.storage.documentStore import documentStore
 from app.utils.logger import getLogger
-from app.chromaClient import chromaClient, collection  # Shared Chroma client & collection
+from app.retrieval.denseSearch import searchDocument
+from app.retrieval.scoring import rrf_fuse
 
 router = APIRouter()
 logger = getLogger(__name__)
-embedding_client = EmbeddingClient()
 
 # --- Models ---
 class QueryRequest(BaseModel):
@@ -59,30 +59,34 @@ def getTopSentences(text: str, query: str, top_n: int = 3):
     return " ".join([s for _, s in scores[:top_n]])
 
 def chromaRetrieveTopK(doc_id: str, query: str, topK: int = 5):
-    """Perform similarity search using ChromaDB for a specific document."""
-    query_embedding = embedding_client.generateEmbedding(query)
-    query_embedding_2d = query_embedding.reshape(1, -1).tolist()
-    results = collection.query(
-        query_embeddings=query_embedding_2d,
-        where={"docId": doc_id},
-        n_results=topK
-    )
+    """Similarity search within one document (vector index, or ChromaDB filtered by docId)."""
+    query_embedding = queryEmbeddingCache.embedOne(query)
+    hits = searchDocument(doc_id, query_embedding, topK)[0]
+    return [{"chunkIndex": h["chunkIndex"], "text": h["text"], "score": h["distance"]} for h in hits]
 
-    chunks = []
-    if results and len(results.get("documents", [])) > 0:
-        for i, text in enumerate(results["documents"][0]):
-            chunks.append({
-                "chunkIndex": results["metadatas"][0][i]["chunkIndex"],
-                "text": text,
-                "score": float(results["distances"][0][i])
-            })
-    return chunks
+def fusedRetrieveTopK(doc_id: str, queries: List[str], topK: int = 5):
+    """
+    Embeds all query variants in one batch, runs one multi-vector search and fuses the
+    per-variant rankings with RRF (one entry per chunk). "score" stays the closest distance
+    any variant reached, so it means the same as in chromaRetrieveTopK.
+    """
+    if not queries:
+        return []
+    queries = list(dict.fromkeys(queries))  # a repeated variant would count twice in RRF
+    resultsList = searchDocument(doc_id, queryEmbeddingCache.embedMany(queries), topK)
+    if len(resultsList) == 1:
+        hits = resultsList[0]
+    else:
+        hits = [item["chunk"] for item in rrf_fuse([[{"chunk": h} for h in hits] for hits in resultsList])][:topK]
+    bestDistance = {}
+    for h in (h for hits in resultsList for h in hits):
+        bestDistance[h["id"]] = min(h["distance"], bestDistance.get(h["id"], h["distance"]))
+    return [{"chunkIndex": h["chunkIndex"], "text": h["text"], "score": bestDistance[h["id"]]} for h in hits]
 
 # --- API Endpoint ---
 @router.post("/api/query", response_model=QueryResponse)
 def queryEndpoint(req: QueryRequest):
-    doc = documentStore.getDocument(req.docId)
-    if not doc:
+    if not documentStore.hasDocument(req.docId):
         raise HTTPException(status_code=404, detail="Document not found")
 
     if req.refine:
@@ -91,8 +95,7 @@ def queryEndpoint(req: QueryRequest):
     else:
         refinedQueries = [req.query]
 
-    resultsList = [chromaRetrieveTopK(req.docId, q, topK=req.topK) for q in refinedQueries]
-    fusedChunks = resultsList[0] if resultsList else []
+    fusedChunks = fusedRetrieveTopK(req.docId, refinedQueries, topK=req.topK)
 
     for chunk in fusedChunks:
         chunk["snippet"] = getTopSentences(chunk["text"], req.query, top_n=3)
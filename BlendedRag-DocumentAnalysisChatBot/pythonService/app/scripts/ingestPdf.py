@@ -0,0 +1,223 @@
+# app/scripts/ingestPdf.py
+# Offline bulk ingestion of a directory tree of PDFs into the same Chroma / BM25 / catalog
+# stores the API uses. Run from pythonService/ (the stores use paths relative to it):
+#
+#   python -m app.scripts.ingestPdf /path/to/pdfs --workers 8 --embed-batch 512
+#
+# Parsing (layout cache, OCR fallback for scans) and chunking run in a process pool, which also
+# warms the table cache; embeddings are computed in the parent in batches that span several
+# files, and tables are stored once each document is written, as in the API pipeline.
+# Every finished file is appended to a JSONL manifest, so an interrupted run picks up where
+# it stopped when started again with the same manifest.
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+from concurrent.futures import FIRST_COMPLETED, wait
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app import config
+from app.pdfParser.parserPool import spawnPool
+
+DEFAULT_MANIFEST = config.DATA_DIR / "ingest_manifest.jsonl"
+DOC_ID_NAMESPACE = uuid.UUID("6f1c2a7e-3b9d-4c55-9a0e-5d1f7b2c8e41")
+
+def findPdfs(root: str):
+    for dirPath, dirNames, fileNames in os.walk(root):
+        dirNames.sort()
+        for name in sorted(fileNames):
+            if os.path.splitext(name)[1].lower() in config.ALLOWED_FILE_TYPES:
+                yield os.path.abspath(os.path.join(dirPath, name))
+
+def fileKey(path: str) -> dict:
+    st = os.stat(path)
+    return {"path": path, "size": st.st_size, "mtime": int(st.st_mtime)}
+
+def loadManifest(path: str) -> dict:
+    """Returns {path: entry} for files already finished (done or duplicate) in earlier runs."""
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if entry.get("status") in ("done", "duplicate"):
+                finished[entry["path"]] = entry
+    return finished
+
+def sha256File(path: str, blockSize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blockSize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def parseFile(path: str, pageBatchSize: int) -> dict:
+    """
+    Worker: hash, parse and chunk one PDF through the same page source as the API (layout
+    cache, OCR fallback), and extract its tables into the table cache. Imports only the light
+    parsing modules; the tokenizer (no model weights) is loaded once per worker process.
+    The file pool already runs one file per process, so each file is parsed serially here.
+    """
+    from app.pdfParser.parser import getPageCount
+    from app.pdfParser.pageSource import iterSourcePages
+    from app.pdfParser.tableExtractor import extractTables
+    from app.pdfParser.chunker import TokenChunker, loadTokenizer, tokenizerOffsets
+    try:
+        sha256 = sha256File(path)
+        pageCount = getPageCount(path)
+        chunker = TokenChunker(
+            tokenOffsets=tokenizerOffsets(loadTokenizer(config.EMBEDDING_MODEL_NAME)),
+            maxTokens=config.CHUNK_MAX_TOKENS,
+            overlapTokens=config.CHUNK_OVERLAP_TOKENS,
+            anchorPages=config.CHUNK_ANCHOR_PAGES
+        )
+        chunks = []
+        for batch in iterSourcePages(path, pageBatchSize, pageCount, sha256, workers=1):
+            for pageNumber, text in batch:
+                chunks.extend(chunker.feedPage(pageNumber, text))
+        chunks.extend(chunker.flush())
+        if config.TABLE_EXTRACTION_ENABLED and chunks:
+            try:
+                extractTables(path, fileHash=sha256, workers=1)  # cached; storeTables reads it back
+            except Exception:
+                pass  # storeTables retries and logs in the parent
+        return {"path": path, "sha256": sha256, "pageCount": pageCount, "chunks": chunks, "error": None}
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+
+class BulkIngestor:
+    def __init__(self, manifestPath: str, embedBatch: int):
+        # Heavy singletons are imported here, never in the worker processes
+        from app.embeddings.embeddingCache import cachedEmbeddings
+        from app.storage.documentStore import documentStore
+        from app.storage.documentCatalog import documentCatalog
+        from app.retrieval.sparseRetriever import sparseRetriever
+        from app.pdfParser.ingestor import storeTables
+        self.embed = cachedEmbeddings
+        self.storeTables = storeTables
+        self.documentStore = documentStore
+        self.documentCatalog = documentCatalog
+        self.sparseRetriever = sparseRetriever
+        self.embedBatch = embedBatch
+        self.manifest = open(manifestPath, "a", encoding="utf-8")
+        self._pending = []  # parsed files waiting for the next embedding batch
+        self._pendingChunks = 0
+        self.counts = {"done": 0, "duplicate": 0, "failed": 0, "chunks": 0}
+
+    def _record(self, entry: dict):
+        self.manifest.write(json.dumps(entry) + "\n")
+        self.manifest.flush()
+        os.fsync(self.manifest.fileno())
+        self.counts[entry["status"]] += 1
+
+    def add(self, parsed: dict, key: dict):
+        path = parsed["path"]
+        if parsed["error"] or not parsed["chunks"]:
+            self._record({**key, "status": "failed", "error": parsed["error"] or "No text extracted"})
+            return
+        # Deterministic docId: a file re-processed after a crash overwrites its own partial rows
+        docId = str(uuid.uuid5(DOC_ID_NAMESPACE, parsed["sha256"]))
+        existing = self.documentCatalog.claim(parsed["sha256"], docId)
+        if existing:
+            self._record({**key, "status": "duplicate", "docId": existing["docId"]})
+            return
+        self._pending.append({**parsed, "docId": docId, "key": key, "fileName": os.path.basename(path)})
+        self._pendingChunks += len(parsed["chunks"])
+        if self._pendingChunks >= self.embedBatch:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        files, self._pending, self._pendingChunks = self._pending, [], 0
+        allChunks = [c["text"] for f in files for c in f["chunks"]]
+        started = time.perf_counter()
+        embeddings = self.embed(allChunks)
+        print(f"  embedded {len(allChunks)} chunks from {len(files)} file(s) in {time.perf_counter() - started:.1f}s")
+
+        offset = 0
+        for f in files:
+            n = len(f["chunks"])
+            try:
+                ids = self.documentStore.writeDocument(f["docId"], f["chunks"], embeddings[offset:offset + n],
+                                                       f["fileName"], f["pageCount"])
+                self.sparseRetriever.indexDocument(f["docId"], [c["text"] for c in f["chunks"]], ids)
+                self.storeTables(f["docId"], f["path"], f["sha256"])
+                self.documentCatalog.complete(f["sha256"], f["docId"], f["fileName"], f["pageCount"], n)
+                self._record({**f["key"], "status": "done", "docId": f["docId"], "numChunks": n})
+                self.counts["chunks"] += n
+            except Exception as e:
+                self.documentCatalog.release(f["sha256"])
+                self._record({**f["key"], "status": "failed", "error": str(e)})
+            offset += n
+
+    def close(self):
+        from app.storage.vectorStore import getMirrorStore
+        self.flush()
+        self.manifest.close()
+        mirror = getMirrorStore()
+        if mirror:
+            # The API server may have added documents since this run loaded the HNSW index;
+            # pull them in from Chroma so this save (under the shared directory lock) drops nothing
+            mirror.reconcile(mirror.fallback)
+            mirror.persist()
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk-ingest a directory tree of PDFs")
+    ap.add_argument("root", help="directory to crawl for PDFs")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    ap.add_argument("--embed-batch", type=int, default=512, help="chunks per embedding call (spans files)")
+    ap.add_argument("--page-batch", type=int, default=config.INGEST_PAGE_BATCH_SIZE, help="pages read at a time per file")
+    ap.add_argument("--manifest", default=str(DEFAULT_MANIFEST), help="checkpoint manifest (JSONL)")
+    args = ap.parse_args()
+
+    finished = loadManifest(args.manifest)
+    todo = []
+    for path in findPdfs(args.root):
+        key = fileKey(path)
+        prev = finished.get(path)
+        if prev and prev.get("size") == key["size"] and prev.get("mtime") == key["mtime"]:
+            continue
+        todo.append(key)
+    print(f"{len(todo)} PDF(s) to ingest, {len(finished)} already in manifest {args.manifest}")
+    if not todo:
+        return
+
+    bulk = BulkIngestor(args.manifest, args.embed_batch)
+    started = time.perf_counter()
+    try:
+        # Spawned, not forked: BulkIngestor has already imported torch and the stores in this process
+        with spawnPool(args.workers) as pool:
+            # Keep a bounded number of parsed files in flight so memory stays flat on huge trees
+            queue = iter(todo)
+            inFlight = {}
+            for key in queue:
+                inFlight[pool.submit(parseFile, key["path"], args.page_batch)] = key
+                if len(inFlight) >= args.workers * 2:
+                    break
+            while inFlight:
+                done, _ = wait(inFlight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = inFlight.pop(future)
+                    bulk.add(future.result(), key)
+                    nextKey = next(queue, None)
+                    if nextKey:
+                        inFlight[pool.submit(parseFile, nextKey["path"], args.page_batch)] = nextKey
+                processed = sum(bulk.counts[s] for s in ("done", "duplicate", "failed"))
+                print(f"[{processed + len(bulk._pending)}/{len(todo)}] {bulk.counts}")
+    finally:
+        bulk.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Finished in {elapsed:.1f}s: {bulk.counts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# app/storage/documentCatalog.py
+import json
+import os
+import threading
+import time
+from typing import Dict, Any
+from app.config import DATA_DIR
+from app.utils.fileLock import fileLock
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+CATALOG_PATH = DATA_DIR / "catalog.json"
+
+class DocumentCatalog:
+    """
+    Persistent content hash (SHA-256 of the uploaded bytes) -> docId catalog.
+    Lets byte-identical re-uploads return the existing docId without parsing,
+    embedding or indexing anything again. The API server and the bulk CLI share the file:
+    every write reloads it and merges under a file lock, and reads pick up the other
+    process's writes when the file changes.
+    """
+    def __init__(self, path=CATALOG_PATH):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self._settled = threading.Condition(self.lock)  # notified when a pending claim completes or is released
+        self._stamp = None
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._pending: Dict[str, str] = {}  # contentHash -> docId still being ingested
+        self._callbacks: Dict[str, list] = {}  # contentHash -> onSettled callbacks for a pending claim
+
+    def _fileStamp(self):
+        # Every write renames a new file into place, so the inode changes even within one mtime tick
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        self._stamp = self._fileStamp()
+        if self._stamp is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load document catalog {self.path}: {e}")
+            return {}
+
+    def _refresh(self):
+        # Caller holds the lock; picks up entries another process wrote since the last read
+        if self._fileStamp() != self._stamp:
+            self._entries = self._load()
+
+    def _update(self, mutate):
+        # Caller holds the lock. Reload, apply, write-then-rename, all under the file lock, so
+        # concurrent writers merge instead of overwriting each other and no reader sees a torn file
+        with fileLock(self.path + ".lock"):
+            self._entries = self._load()
+            changed = mutate(self._entries)
+            if changed is False:
+                return
+            tmpPath = self.path + ".tmp"
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmpPath, self.path)
+            self._stamp = self._fileStamp()
+
+    def lookup(self, contentHash: str) -> Dict[str, Any] | None:
+        with self.lock:
+            self._refresh()
+            return self._entries.get(contentHash)
+
+    def claim(self, contentHash: str, docId: str) -> Dict[str, Any] | None:
+        """
+        Reserve contentHash for a new docId.
+        Returns the existing entry if the content is already ingested (or being ingested), else None.
+        """
+        with self.lock:
+            self._refresh()
+            if contentHash in self._entries:
+                return self._entries[contentHash]
+            if contentHash in self._pending:
+                return {"docId": self._pending[contentHash], "pending": True}
+            self._pending[contentHash] = docId
+            return None
+
+    def waitFor(self, contentHash: str, timeout: float = None) -> Dict[str, Any] | None:
+        """
+        Blocks while contentHash is being ingested. Returns its entry once that ingestion
+        completes, or None if it failed (the claim was released). Raises TimeoutError.
+        """
+        with self.lock:
+            if not self._settled.wait_for(lambda: contentHash not in self._pending, timeout=timeout):
+                raise TimeoutError(f"Ingestion of identical content (sha256={contentHash[:12]}) is still running")
+            return self._entries.get(contentHash)
+
+    def onSettled(self, contentHash: str, callback):
+        """
+        Non-blocking counterpart of waitFor: callback(entry or None) runs once the pending
+        ingestion of contentHash completes or fails, in the thread that settles it
+        (immediately, in this thread, if nothing is pending).
+        """
+        with self.lock:
+            if contentHash in self._pending:
+                self._callbacks.setdefault(contentHash, []).append(callback)
+                return
+            entry = self._entries.get(contentHash)
+        callback(entry)
+
+    def _settle(self, contentHash: str) -> list:
+        # Caller holds the lock; returns the callbacks to run once it is released
+        self._pending.pop(contentHash, None)
+        self._settled.notify_all()
+        return self._callbacks.pop(contentHash, [])
+
+    def _runCallbacks(self, callbacks: list, entry: Dict[str, Any] | None):
+        for callback in callbacks:
+            try:
+                callback(entry)
+            except Exception as e:
+                logger.error(f"Catalog settle callback failed: {e}")
+
+    def complete(self, contentHash: str, docId: str, fileName: str, pageCount: int, numChunks: int):
+        with self.lock:
+            callbacks = self._settle(contentHash)
+            entry = {
+                "docId": docId,
+                "fileName": fileName,
+                "pageCount": pageCount,
+                "numChunks": numChunks,
+                "ingestedAt": time.time()
+            }
+            def record(entries):
+                entries[contentHash] = entry
+            self._update(record)
+        self._runCallbacks(callbacks, entry)
+
+    def release(self, contentHash: str):
+        """Drop a claim whose ingestion failed so the content can be uploaded again."""
+        with self.lock:
+            callbacks = self._settle(contentHash)
+        self._runCallbacks(callbacks, None)
+
+    def forgetDocument(self, docId: str):
+        def forget(entries):
+            stale = [h for h, entry in entries.items() if entry["docId"] == docId]
+            for h in stale:
+                del entries[h]
+            return bool(stale)
+        with self.lock:
+            self._update(forget)
+
+# Singleton instance
+documentCatalog = DocumentCatalog()
@@ -0,0 +1,67 @@
+# app/storage/documentRevisions.py
+import json
+import os
+import threading
+from typing import Dict
+from app.config import DATA_DIR
+from app.utils.fileLock import fileLock
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+REVISIONS_PATH = DATA_DIR / "revisions.json"
+
+class DocumentRevisions:
+    """
+    Persistent docId -> revision counter, bumped by DocumentStore whenever a document is
+    registered, replaced or deleted (deleted documents keep their counter). Derived indexes
+    such as the HNSW mirror record the revision they hold per document and reconcile only the
+    documents whose counter moved, instead of scanning every chunk in Chroma. Shared by the
+    API server and the bulk CLI like the document catalog: bumps merge under a file lock.
+    """
+    def __init__(self, path=REVISIONS_PATH):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self._stamp = None
+        self._revisions: Dict[str, int] = self._load()
+
+    def _fileStamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> Dict[str, int]:
+        self._stamp = self._fileStamp()
+        if self._stamp is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load document revisions {self.path}: {e}")
+            return {}
+
+    def bump(self, docId: str) -> int:
+        """Records a change to docId and returns its new revision."""
+        with self.lock, fileLock(self.path + ".lock"):
+            self._revisions = self._load()
+            revision = self._revisions.get(docId, 0) + 1
+            self._revisions[docId] = revision
+            tmpPath = self.path + ".tmp"
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump(self._revisions, f)
+            os.replace(tmpPath, self.path)
+            self._stamp = self._fileStamp()
+            return revision
+
+    def snapshot(self) -> Dict[str, int]:
+        """Every docId's current revision, including bumps made by other processes."""
+        with self.lock:
+            if self._fileStamp() != self._stamp:
+                self._revisions = self._load()
+            return dict(self._revisions)
+
+# Singleton instance
+documentRevisions = DocumentRevisions()
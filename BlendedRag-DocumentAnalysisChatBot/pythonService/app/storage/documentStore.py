@@ -1,12 +1,37 @@
 # app/storage/documentStore.py
 from typing import Dict, Any, List
+import hashlib
 import threading
+from contextlib import contextmanager
+import numpy as np
 from app.chromaClient import chromaClient
+from app import config
+from app.storage.documentCatalog import documentCatalog
+from app.storage.documentRevisions import documentRevisions
+from app.storage.tableStore import tableStore
+from app.storage.vectorIndex import vectorIndex
+from app.storage.vectorStore import getMirrorStore
 from app.utils.logger import getLogger
 
 logger = getLogger(__name__)
 
 EMBEDDING_DIM = 384  # Must match the embedding model
+CHUNK_POSITION_KEYS = ("charStart", "charEnd", "pageStart", "pageEnd", "tokenCount")
+
+def hashChunk(text: str) -> str:
+    """Content hash stored with every chunk so revisions can be diffed without re-embedding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chunkMetadata(docId: str, chunkIndex: int, chunk: Dict[str, Any], fileName: str, pageCount: int) -> Dict[str, Any]:
+    """Chroma metadata of one chunk: positions and hash only, the text is the Chroma document."""
+    return {
+        "docId": docId,
+        "chunkIndex": chunkIndex,
+        "chunkHash": hashChunk(chunk["text"]),
+        "fileName": fileName or "unknown.pdf",
+        "pageCount": pageCount or 0,
+        **{k: chunk[k] for k in CHUNK_POSITION_KEYS if k in chunk}
+    }
 
 class DocumentStore:
     def __init__(self):
@@ -16,39 +41,237 @@ class DocumentStore:
             metadata={"description": "PDF chunks with embeddings"}
         )
         self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._docLocks: Dict[str, list] = {}  # docId -> [lock, holders]
+        # Chroma rejects upserts above the backend's batch limit
+        getMax = getattr(chromaClient, "get_max_batch_size", None)
+        self._maxBatchSize = getMax() if getMax else config.CHROMA_WRITE_BATCH_SIZE
 
     def saveDocument(self, docId: str, data: Dict[str, Any]) -> None:
-        with self.lock:
-            chunks = data["chunks"]
-            embeddings = data.get("embeddings")
-            if embeddings is not None and len(chunks) != len(embeddings):
-                raise ValueError("Number of chunks and embeddings must match")
+        """Store a whole document: {"fileName", "pageCount", "chunks", "embeddings"}."""
+        chunks = data["chunks"]
+        embeddings = data.get("embeddings")
+        if embeddings is not None and len(embeddings) > 0:  # Safe check for non-empty embeddings
+            self.writeDocument(docId, chunks, embeddings, data.get("fileName", "unknown"), data.get("pageCount", 0))
+        else:
+            self.registerDocument(docId, data.get("fileName", "unknown"), data.get("pageCount", 0), len(chunks))
 
-            if chunks and isinstance(chunks[0], str):
-                chunks = [{"text": c} for c in chunks]
+    def writeDocument(self, docId: str, chunks: List, embeddings, fileName: str, pageCount: int, batchSize: int = None) -> List[str]:
+        """
+        The single write path for a complete document: every chunk is upserted exactly once,
+        in batches, and document metadata is registered at the end.
+        All-or-nothing for the caller: if any batch fails, the batches already written are removed.
+        """
+        ids = self.appendChunks(docId, 0, chunks, embeddings, fileName, pageCount, batchSize=batchSize)
+        self.registerDocument(docId, fileName, pageCount, len(ids))
+        return ids
 
-            if embeddings is not None and len(embeddings) > 0:  # Safe check for non-empty embeddings
-                ids = [f"{docId}_{i}" for i in range(len(chunks))]
-                metadatas = [{
-                    "docId": docId,
-                    "chunkIndex": i,
-                    "fileName": data.get("fileName", "unknown"),
-                    "pageCount": data.get("pageCount", 0)
-                } for i, chunk in enumerate(chunks)]
-                self.collection.add(
-                    ids=ids,
-                    embeddings=embeddings.tolist(),
-                    metadatas=metadatas,
-                    documents=[c["text"] for c in chunks]
+    def appendChunks(self, docId: str, startIndex: int, chunks: List, embeddings, fileName: str, pageCount: int,
+                     batchSize: int = None, replacing: bool = False) -> List[str]:
+        """
+        Upsert a run of a document's chunks, numbered from startIndex, in batches of batchSize.
+        Streaming ingestion calls this once per page batch so only a batch of embeddings is in memory.
+        Chunk text is stored once, as the Chroma document; metadata carries only positions and hashes.
+        If a batch fails, rows this call wrote are deleted. With replacing=True (a revision written
+        over the previous one) existing rows are snapshotted before each batch and restored instead;
+        a fresh ingest has nothing to overwrite and skips the extra read.
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError("Number of chunks and embeddings must match")
+        if chunks and isinstance(chunks[0], str):
+            chunks = [{"text": c} for c in chunks]
+        ids = [f"{docId}_{startIndex + i}" for i in range(len(chunks))]
+        batchSize = min(batchSize or config.CHROMA_WRITE_BATCH_SIZE, self._maxBatchSize)
+        metadatas = [chunkMetadata(docId, startIndex + i, chunk, fileName, pageCount) for i, chunk in enumerate(chunks)]
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        written = self._upsertRows(docId, ids, embeddings, metadatas, [c["text"] for c in chunks], batchSize, replacing)
+        try:
+            vectorIndex.stageVectors(docId, startIndex, embeddings)
+            mirror = getMirrorStore()
+            if mirror:
+                mirror.add(ids, embeddings, [{"docId": docId, "chunkIndex": md["chunkIndex"], "chunkHash": md["chunkHash"]}
+                                             for md in metadatas])
+        except Exception:
+            self._restoreRows(docId, *written, batchSize)
+            raise
+        return ids
+
+    def writeRevision(self, docId: str, chunks: List[Dict[str, Any]], embeddings, fileName: str, pageCount: int,
+                      stored: Dict[str, Dict[str, Any]], batchSize: int = None) -> Dict[str, int]:
+        """
+        Write a new revision over a stored document, given its stored rows from getChunkMetadata().
+        Only rows whose text changed at their position are upserted; rows with the same text whose
+        metadata moved (positions, fileName, pageCount) get a metadata-only update, identical rows
+        are not touched, and stored chunks past the end of the revision are deleted.
+        Returns {"upserted", "updated", "removed"} row counts.
+        """
+        ids = [f"{docId}_{i}" for i in range(len(chunks))]
+        metadatas = [chunkMetadata(docId, i, chunk, fileName, pageCount) for i, chunk in enumerate(chunks)]
+        changed = [i for i, (cid, md) in enumerate(zip(ids, metadatas))
+                   if stored.get(cid, {}).get("chunkHash") != md["chunkHash"]]
+        moved = [i for i, (cid, md) in enumerate(zip(ids, metadatas))
+                 if cid in stored and stored[cid].get("chunkHash") == md["chunkHash"] and stored[cid] != md]
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        batchSize = min(batchSize or config.CHROMA_WRITE_BATCH_SIZE, self._maxBatchSize)
+
+        # Metadata-only updates first: the stored rows are their own snapshot if a later write fails
+        updated = 0
+        try:
+            for b in range(0, len(moved), batchSize):
+                rows = moved[b:b + batchSize]
+                with self.lock:
+                    self.collection.update(ids=[ids[i] for i in rows], metadatas=[metadatas[i] for i in rows])
+                updated += len(rows)
+            if changed:
+                self._upsertRows(docId, [ids[i] for i in changed], embeddings[changed], [metadatas[i] for i in changed],
+                                 [chunks[i]["text"] for i in changed], batchSize, replacing=True)
+        except Exception:
+            if updated:
+                with self.lock:
+                    for b in range(0, updated, batchSize):
+                        rows = moved[b:min(b + batchSize, updated)]
+                        self.collection.update(ids=[ids[i] for i in rows], metadatas=[stored[ids[i]] for i in rows])
+            raise
+
+        vectorIndex.stageVectors(docId, 0, embeddings)
+        mirror = getMirrorStore()
+        if mirror and changed:
+            mirror.add([ids[i] for i in changed], embeddings[changed],
+                       [{"docId": docId, "chunkIndex": i, "chunkHash": metadatas[i]["chunkHash"]} for i in changed])
+        removed = self.deleteChunksFrom(docId, len(chunks))
+        return {"upserted": len(changed), "updated": len(moved), "removed": removed}
+
+    def _upsertRows(self, docId: str, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]],
+                    documents: List[str], batchSize: int, replacing: bool) -> tuple:
+        """
+        Upsert rows in batches. Returns (created, overwritten) for _restoreRows; if a batch fails the
+        rows already written are rolled back here. Rows that may already exist are snapshotted
+        before each batch only when replacing, a fresh ingest has nothing to overwrite.
+        """
+        created: List[str] = []
+        overwritten = {"ids": [], "embeddings": [], "metadatas": [], "documents": []}
+        try:
+            for b in range(0, len(ids), batchSize):
+                batchIds = ids[b:b + batchSize]
+                with self.lock:
+                    if replacing:
+                        previous = self.collection.get(ids=batchIds, include=["embeddings", "metadatas", "documents"])
+                    else:
+                        previous = {key: [] for key in overwritten}
+                    self.collection.upsert(
+                        ids=batchIds,
+                        embeddings=embeddings[b:b + batchSize].tolist(),
+                        metadatas=metadatas[b:b + batchSize],
+                        documents=documents[b:b + batchSize]
+                    )
+                existed = set(previous["ids"])
+                for key in overwritten:
+                    overwritten[key].extend(previous[key])
+                created.extend(cid for cid in batchIds if cid not in existed)
+        except Exception:
+            self._restoreRows(docId, created, overwritten, batchSize)
+            raise
+        return created, overwritten
+
+    def _restoreRows(self, docId: str, created: List[str], overwritten: Dict[str, list], batchSize: int) -> None:
+        if not created and not overwritten["ids"]:
+            return
+        logger.error(f"Write failed for docId={docId}, removing {len(created)} new chunks "
+                     f"and restoring {len(overwritten['ids'])} overwritten ones")
+        with self.lock:
+            if created:
+                self.collection.delete(ids=created)
+            for b in range(0, len(overwritten["ids"]), batchSize):
+                self.collection.upsert(
+                    ids=overwritten["ids"][b:b + batchSize],
+                    embeddings=np.asarray(overwritten["embeddings"][b:b + batchSize], dtype=np.float32).tolist(),
+                    metadatas=overwritten["metadatas"][b:b + batchSize],
+                    documents=overwritten["documents"][b:b + batchSize]
                 )
 
-            # ✅ Always persist metadata in memory
+    @contextmanager
+    def documentLock(self, docId: str):
+        """Serializes whole-document writes (ingest, replace) of one docId; other docIds are not blocked."""
+        with self.lock:
+            entry = self._docLocks.setdefault(docId, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._docLocks[docId]
+
+    def registerDocument(self, docId: str, fileName: str, pageCount: int, numChunks: int) -> None:
+        """Record document-level metadata once all of its chunks are stored."""
+        vectorIndex.commitDocument(docId, numChunks)
+        with self.lock:
             self._metadata[docId] = {
-                "fileName": data.get("fileName", "unknown"),
-                "pageCount": data.get("pageCount", 0),
-                "numChunks": len(chunks)
+                "fileName": fileName or "unknown",
+                "pageCount": pageCount or 0,
+                "numChunks": numChunks
             }
             logger.info(f"Saved metadata for docId={docId}: {self._metadata[docId]}")
+        self._bumpRevision(docId)
+
+    def _bumpRevision(self, docId: str):
+        # After every write of the revision reached Chroma and the mirror
+        revision = documentRevisions.bump(docId)
+        mirror = getMirrorStore()
+        if mirror:
+            mirror.markRevision(docId, revision)
+
+    def getChunkMetadata(self, docId: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns {chunkId: metadata} for a stored document.
+        Chunks written before hashes were stored are hashed from their text.
+        """
+        results = self.collection.get(where={"docId": docId}, include=["metadatas", "documents"])
+        stored = {}
+        for cid, md, doc in zip(results.get("ids", []), results.get("metadatas", []), results.get("documents", [])):
+            md = dict(md or {})
+            md.setdefault("chunkHash", hashChunk(doc or ""))
+            stored[cid] = md
+        return stored
+
+    def getEmbeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["embeddings"])
+        return {cid: emb for cid, emb in zip(results["ids"], results["embeddings"])}
+
+    def getChunks(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{chunkId: {"text", "meta"}} by primary key, for hits found outside Chroma."""
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        return {cid: {"text": doc, "meta": md or {}}
+                for cid, doc, md in zip(results["ids"], results["documents"], results["metadatas"])}
+
+    def exportVectors(self, docId: str) -> np.ndarray | None:
+        """A document's embeddings ordered by chunkIndex, or None if it has no chunks."""
+        results = self.collection.get(where={"docId": docId}, include=["embeddings", "metadatas"])
+        if not results.get("ids"):
+            return None
+        order = np.argsort([md["chunkIndex"] for md in results["metadatas"]])
+        return np.asarray(results["embeddings"], dtype=np.float32)[order]
+
+    def deleteChunksFrom(self, docId: str, fromIndex: int) -> int:
+        """Delete a document's chunks with chunkIndex >= fromIndex, returns how many were removed."""
+        where = {"$and": [{"docId": docId}, {"chunkIndex": {"$gte": fromIndex}}]}
+        with self.lock:
+            stale = self.collection.get(where=where, include=[])["ids"]
+            if stale:
+                self.collection.delete(ids=stale)
+        mirror = getMirrorStore()
+        if mirror and stale:
+            mirror.deleteIds(stale)
+        return len(stale)
+
+    def hasDocument(self, docId: str) -> bool:
+        """Existence check that reads one id, not the document's chunks."""
+        return bool(self.collection.get(where={"docId": docId}, limit=1, include=[])["ids"])
 
     def getDocument(self, docId: str) -> Dict[str, Any] | None:
         try:
@@ -97,6 +320,13 @@ class DocumentStore:
             if docId in self._metadata:
                 del self._metadata[docId]
             self.collection.delete(where={"docId": docId})
-            return True
+        documentCatalog.forgetDocument(docId)
+        tableStore.deleteTables(docId)
+        vectorIndex.deleteDocument(docId)
+        mirror = getMirrorStore()
+        if mirror:
+            mirror.deleteByDocId(docId)
+        self._bumpRevision(docId)
+        return True
 
 documentStore = DocumentStore()
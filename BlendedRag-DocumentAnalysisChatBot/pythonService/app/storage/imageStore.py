@@ -0,0 +1,33 @@
+# app/storage/imageStore.py
+import os
+import hashlib
+from app.config import IMAGE_STORE_DIR
+
+def hashImage(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class ImageStore:
+    """
+    Content-addressed image files: each image is stored once as <sha256>.<ext>, named after
+    the hash of its raw stream in the PDF, however many pages or documents use it.
+    """
+    def __init__(self, directory=IMAGE_STORE_DIR):
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, os.path.basename(name))
+
+    def has(self, name: str) -> bool:
+        return os.path.exists(self.path(name))
+
+    def put(self, name: str, data: bytes):
+        # Write-then-rename: concurrent writers of the same image produce identical bytes
+        path = self.path(name)
+        tmpPath = f"{path}.{os.getpid()}.{id(data)}.tmp"
+        with open(tmpPath, "wb") as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+
+# Singleton instance
+imageStore = ImageStore()
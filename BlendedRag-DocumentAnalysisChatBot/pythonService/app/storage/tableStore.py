@@ -0,0 +1,54 @@
+# app/storage/tableStore.py
+import json
+import os
+import threading
+from typing import Dict, Any, List
+from app.config import TABLES_DIR
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+class TableStore:
+    """
+    Structured table rows per docId, one JSON file per document under data/tables.
+    Tables are extracted once at ingestion and served from here without re-parsing the PDF.
+    """
+    def __init__(self, directory=TABLES_DIR):
+        self.directory = str(directory)
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, docId: str) -> str:
+        return os.path.join(self.directory, f"{docId}.json")
+
+    def saveTables(self, docId: str, tables: List[Dict[str, Any]]):
+        path = self._path(docId)
+        with self.lock:
+            tmpPath = path + ".tmp"
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump(tables, f, ensure_ascii=False)
+            os.replace(tmpPath, path)
+
+    def getTables(self, docId: str, page: int = None) -> List[Dict[str, Any]] | None:
+        """Tables of docId (optionally of one page); None if the document has no table record."""
+        try:
+            with open(self._path(docId), "r", encoding="utf-8") as f:
+                tables = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load tables for docId={docId}: {e}")
+            return None
+        if page is not None:
+            tables = [t for t in tables if t["page"] == page]
+        return tables
+
+    def deleteTables(self, docId: str):
+        with self.lock:
+            try:
+                os.remove(self._path(docId))
+            except FileNotFoundError:
+                pass
+
+# Singleton instance
+tableStore = TableStore()
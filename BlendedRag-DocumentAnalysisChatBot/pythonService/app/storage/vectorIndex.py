@@ -0,0 +1,125 @@
+# app/storage/vectorIndex.py
+# Per-document dense vector matrices for exact search. Each document's normalized embeddings
+# are one .npy file (row i = chunk i) that is memory-mapped on first use and kept in an LRU of
+# open maps. A query is one matrix-vector product plus argpartition, with no metadata filtering.
+# Writes mirror the Chroma writes in DocumentStore: rows are staged in a raw .part file as batches
+# arrive and become the .npy when the document is registered.
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+import numpy as np
+from app import config
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+def normalizeRows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12, None)
+
+class VectorIndex:
+    def __init__(self, directory=None, dim: int = None, maxLoaded: int = None):
+        self.directory = str(directory or config.VECTOR_INDEX_DIR)
+        self.dim = dim or config.EMBEDDING_DIMENSION
+        self.maxLoaded = maxLoaded or config.VECTOR_INDEX_MAX_LOADED
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, np.ndarray]" = OrderedDict()  # docId -> memmap, least recent first
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, docId: str) -> str:
+        return os.path.join(self.directory, f"{docId}.npy")
+
+    def _partPath(self, docId: str) -> str:
+        return os.path.join(self.directory, f"{docId}.f32.part")
+
+    def _forget(self, docId: str):
+        with self._lock:
+            self._loaded.pop(docId, None)
+
+    def stageVectors(self, docId: str, startIndex: int, vectors):
+        """Writes rows startIndex.. of a document being ingested (not searchable until commit)."""
+        rows = normalizeRows(vectors)
+        path = self._partPath(docId)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(startIndex * self.dim * 4)
+            f.write(rows.tobytes())
+
+    def commitDocument(self, docId: str, numRows: int) -> bool:
+        """Turns the staged rows 0..numRows-1 into the document's .npy; False if nothing was staged."""
+        partPath = self._partPath(docId)
+        if not os.path.exists(partPath):
+            return False
+        rowBytes = self.dim * 4
+        if os.path.getsize(partPath) < numRows * rowBytes:
+            logger.error(f"Staged vectors for docId={docId} are incomplete, not committing")
+            return False
+        tmpPath = self._path(docId) + ".tmp"
+        with open(partPath, "rb") as src, open(tmpPath, "wb") as dst:
+            np.lib.format.write_array_header_1_0(dst, {"descr": "<f4", "fortran_order": False, "shape": (numRows, self.dim)})
+            remaining = numRows * rowBytes
+            while remaining:
+                block = src.read(min(remaining, 1 << 24))
+                dst.write(block)
+                remaining -= len(block)
+        os.replace(tmpPath, self._path(docId))
+        os.remove(partPath)
+        self._forget(docId)
+        return True
+
+    def writeDocument(self, docId: str, vectors):
+        """Writes a complete matrix at once (backfill from the vector store)."""
+        tmpPath = self._path(docId) + ".tmp"
+        with open(tmpPath, "wb") as f:
+            np.save(f, normalizeRows(vectors).reshape(-1, self.dim))
+        os.replace(tmpPath, self._path(docId))
+        self._forget(docId)
+
+    def load(self, docId: str) -> np.ndarray | None:
+        with self._lock:
+            matrix = self._loaded.get(docId)
+            if matrix is not None:
+                self._loaded.move_to_end(docId)
+                return matrix
+        try:
+            matrix = np.load(self._path(docId), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._loaded[docId] = matrix
+            while len(self._loaded) > self.maxLoaded:
+                self._loaded.popitem(last=False)
+        return matrix
+
+    def search(self, docId: str, queryVectors, topK: int) -> Tuple[np.ndarray, np.ndarray] | None:
+        """
+        Exact top-k by cosine similarity for one or more query vectors.
+        Returns (rows, scores), each (numQueries, k) and best first, or None if docId has no matrix.
+        """
+        matrix = self.load(docId)
+        if matrix is None:
+            return None
+        queries = normalizeRows(np.atleast_2d(queryVectors))
+        k = min(topK, matrix.shape[0])
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        scores = queries @ matrix.T
+        rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(scores, rows, axis=1)
+        order = np.argsort(-top, axis=1)
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+    def hasDocument(self, docId: str) -> bool:
+        return os.path.exists(self._path(docId))
+
+    def deleteDocument(self, docId: str):
+        self._forget(docId)
+        for path in (self._path(docId), self._partPath(docId)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+# Singleton instance
+vectorIndex = VectorIndex()
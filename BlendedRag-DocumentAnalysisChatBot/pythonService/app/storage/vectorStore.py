@@ -0,0 +1,324 @@
+# app/storage/vectorStore.py
+# Vector-store interface for dense search, with two implementations:
+#   ChromaVectorStore - the shared Chroma collection (persistent, SQLite metadata filtering)
+#   HnswVectorStore   - an in-process hnswlib HNSW graph for corpus-wide search at scale
+# Distances are squared L2 between unit vectors (Chroma's default space) in both, so scores
+# are comparable whichever store answered. DENSE_SEARCH_BACKEND="hnsw" selects the HNSW store;
+# Chroma stays the source of truth for chunk text, metadata and vectors either way: the HNSW
+# index re-imports from it the documents whose revision (documentRevisions) moved since it last
+# saw them, and documents it does not know are searched in Chroma.
+import os
+import pickle
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any
+import numpy as np
+from app import config
+from app.storage.documentRevisions import documentRevisions
+from app.utils.fileLock import fileLock
+from app.utils.logger import getLogger
+
+logger = getLogger(__name__)
+
+class VectorStore(ABC):
+    """Hits are {"id", "distance", "meta"} (plus "text" when the store keeps it), closest first."""
+
+    @abstractmethod
+    def add(self, ids: List[str], vectors, metadatas: List[Dict[str, Any]], documents: List[str] = None):
+        ...
+
+    @abstractmethod
+    def deleteIds(self, ids: List[str]):
+        ...
+
+    @abstractmethod
+    def deleteByDocId(self, docId: str):
+        ...
+
+    @abstractmethod
+    def search(self, queryVectors, topK: int, docId: str = None) -> List[List[Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def persist(self):
+        pass
+
+    def load(self):
+        pass
+
+    def markRevision(self, docId: str, revision: int):
+        """Called by DocumentStore once a document's writes for that revision are in this store."""
+        pass
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def add(self, ids, vectors, metadatas, documents=None):
+        self.collection.upsert(ids=list(ids), embeddings=np.asarray(vectors, dtype=np.float32).tolist(),
+                               metadatas=metadatas, documents=documents)
+
+    def deleteIds(self, ids):
+        if ids:
+            self.collection.delete(ids=list(ids))
+
+    def deleteByDocId(self, docId):
+        self.collection.delete(where={"docId": docId})
+
+    def search(self, queryVectors, topK, docId=None):
+        queries = np.atleast_2d(np.asarray(queryVectors, dtype=np.float32))
+        res = self.collection.query(query_embeddings=queries.tolist(), n_results=topK,
+                                    where={"docId": docId} if docId else None,
+                                    include=["documents", "metadatas", "distances"])
+        return [
+            [{"id": cid, "distance": float(d), "meta": md or {}, "text": doc}
+             for cid, doc, md, d in zip(ids, docs, metas, dists)]
+            for ids, docs, metas, dists in zip(res["ids"], res["documents"], res["metadatas"], res["distances"])
+        ]
+
+    def count(self):
+        return self.collection.count()
+
+    def iterBatches(self, batchSize: int = 5000):
+        """Yields (ids, vectors, metadatas) pages of the whole collection."""
+        offset = 0
+        while True:
+            page = self.collection.get(include=["embeddings", "metadatas"], limit=batchSize, offset=offset)
+            if not page["ids"]:
+                return
+            yield page["ids"], np.asarray(page["embeddings"], dtype=np.float32), page["metadatas"]
+            offset += len(page["ids"])
+
+    def getDocument(self, docId: str):
+        """(ids, vectors, metadatas) of one document."""
+        res = self.collection.get(where={"docId": docId}, include=["embeddings", "metadatas"])
+        return res["ids"], np.asarray(res["embeddings"], dtype=np.float32), res["metadatas"]
+
+def directoryLock(directory: str):
+    """Exclusive lock shared by every process (API server, bulk CLI) persisting to directory."""
+    return fileLock(os.path.join(directory, ".lock"))
+
+class HnswVectorStore(VectorStore):
+    """
+    hnswlib index in "l2" space over unit vectors. Chunk ids map to integer labels; per-label
+    docId and chunkIndex are kept alongside and pickled next to the graph on persist().
+    Searches filtered to a small document are answered exactly from the stored vectors instead
+    of walking the graph with a filter; searches filtered to a document the index does not
+    have go to fallback (Chroma) when one is set.
+    """
+    def __init__(self, directory=None, dim: int = None, maxElements: int = 100_000, fallback: VectorStore = None):
+        self.directory = str(directory or config.HNSW_DIR)
+        self.dim = dim or config.EMBEDDING_DIMENSION
+        self.fallback = fallback
+        self._initialCapacity = maxElements
+        self._lock = threading.RLock()
+        self._index = None
+        self._labels: Dict[str, int] = {}  # chunk id -> label
+        self._meta: Dict[int, Dict[str, Any]] = {}  # label -> {"id", "docId", "chunkIndex"}
+        self._byDoc: Dict[str, set] = {}  # docId -> labels
+        self._revisions: Dict[str, int] = {}  # docId -> documentRevisions revision held here
+        self._nextLabel = 0
+        self._dirty = 0
+
+    def _newIndex(self, capacity: int):
+        import hnswlib
+        index = hnswlib.Index(space="l2", dim=self.dim)
+        index.init_index(max_elements=capacity, ef_construction=config.HNSW_EF_CONSTRUCTION,
+                         M=config.HNSW_M, allow_replace_deleted=True)
+        index.set_ef(config.HNSW_EF_SEARCH)
+        return index
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._newIndex(self._initialCapacity)
+        return self._index
+
+    def add(self, ids, vectors, metadatas, documents=None):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            labels = []
+            for cid, md in zip(ids, metadatas):
+                label = self._labels.get(cid)
+                if label is None:
+                    label = self._labels[cid] = self._nextLabel
+                    self._nextLabel += 1
+                labels.append(label)
+                docId = (md or {}).get("docId")
+                self._meta[label] = {"id": cid, "docId": docId, "chunkIndex": (md or {}).get("chunkIndex"),
+                                     "chunkHash": (md or {}).get("chunkHash")}
+                self._byDoc.setdefault(docId, set()).add(label)
+            index = self.index
+            needed = index.get_current_count() + len(labels)
+            if needed > index.get_max_elements():
+                index.resize_index(max(needed, index.get_max_elements() * 2))
+            index.add_items(vectors, labels, replace_deleted=True)
+            self._dirty += len(labels)
+            if self._dirty >= config.HNSW_PERSIST_EVERY:
+                self.persist()
+
+    def _deleteLabels(self, labels):
+        for label in labels:
+            meta = self._meta.pop(label, None)
+            if meta is None:
+                continue
+            self._labels.pop(meta["id"], None)
+            self._byDoc.get(meta["docId"], set()).discard(label)
+            self.index.mark_deleted(label)
+        self._dirty += 1
+
+    def deleteIds(self, ids):
+        with self._lock:
+            self._deleteLabels([self._labels[cid] for cid in ids if cid in self._labels])
+
+    def deleteByDocId(self, docId):
+        with self._lock:
+            self._deleteLabels(list(self._byDoc.pop(docId, ())))
+
+    def _hit(self, label: int, distance: float) -> Dict[str, Any]:
+        meta = self._meta[label]
+        return {"id": meta["id"], "distance": float(distance), "meta": {"docId": meta["docId"], "chunkIndex": meta["chunkIndex"]}}
+
+    def _exact(self, queries: np.ndarray, labels: List[int], topK: int) -> List[List[Dict[str, Any]]]:
+        matrix = np.asarray(self.index.get_items(labels), dtype=np.float32)
+        distances = ((queries[:, None, :] - matrix[None, :, :]) ** 2).sum(axis=2)
+        k = min(topK, len(labels))
+        out = []
+        for row in distances:
+            best = np.argpartition(row, k - 1)[:k]
+            best = best[np.argsort(row[best])]
+            out.append([self._hit(labels[i], row[i]) for i in best])
+        return out
+
+    def search(self, queryVectors, topK, docId=None):
+        queries = np.atleast_2d(np.asarray(queryVectors, dtype=np.float32))
+        with self._lock:
+            if docId is not None:
+                labels = sorted(self._byDoc.get(docId, ()))
+                if not labels:
+                    if self.fallback is None:
+                        return [[] for _ in queries]
+                    logger.info(f"docId={docId} is not in the HNSW index, searching {type(self.fallback).__name__}")
+                    return self.fallback.search(queries, topK, docId=docId)
+                if len(labels) <= config.HNSW_EXACT_FILTER_MAX:
+                    return self._exact(queries, labels, topK)
+                allowed = set(labels)
+                k = min(topK, len(labels))
+                try:
+                    found, distances = self.index.knn_query(queries, k=k, filter=lambda label: label in allowed)
+                except RuntimeError:  # graph too sparse around the filter for k results
+                    return self._exact(queries, labels, topK)
+            else:
+                k = min(topK, len(self._meta))
+                if k == 0:
+                    return [[] for _ in queries]
+                found, distances = self.index.knn_query(queries, k=k)
+            return [[self._hit(int(l), d) for l, d in zip(ls, ds)] for ls, ds in zip(found, distances)]
+
+    def count(self):
+        return len(self._meta)
+
+    def _paths(self):
+        return os.path.join(self.directory, "index.bin"), os.path.join(self.directory, "labels.pkl")
+
+    def persist(self):
+        with self._lock, directoryLock(self.directory):
+            if self._index is None:
+                return
+            indexPath, labelsPath = self._paths()
+            self._index.save_index(indexPath + ".tmp")
+            with open(labelsPath + ".tmp", "wb") as f:
+                pickle.dump({"labels": self._labels, "meta": self._meta, "nextLabel": self._nextLabel,
+                             "revisions": self._revisions}, f)
+            os.replace(indexPath + ".tmp", indexPath)
+            os.replace(labelsPath + ".tmp", labelsPath)
+            self._dirty = 0
+            logger.info(f"Persisted HNSW index with {len(self._meta)} vectors to {self.directory}")
+
+    def load(self) -> bool:
+        """Loads a persisted index; False if there is none."""
+        import hnswlib
+        indexPath, labelsPath = self._paths()
+        if not (os.path.exists(indexPath) and os.path.exists(labelsPath)):
+            return False
+        with self._lock, directoryLock(self.directory):
+            with open(labelsPath, "rb") as f:
+                state = pickle.load(f)
+            index = hnswlib.Index(space="l2", dim=self.dim)
+            index.load_index(indexPath, allow_replace_deleted=True)
+            index.set_ef(config.HNSW_EF_SEARCH)
+            self._index = index
+            self._labels, self._meta, self._nextLabel = state["labels"], state["meta"], state["nextLabel"]
+            self._revisions = state.get("revisions", {})
+            self._byDoc = {}
+            for label, meta in self._meta.items():
+                self._byDoc.setdefault(meta["docId"], set()).add(label)
+            self._dirty = 0
+        return True
+
+    def markRevision(self, docId, revision):
+        with self._lock:
+            self._revisions[docId] = revision
+
+    def importFrom(self, source: ChromaVectorStore, revisions: Dict[str, int] = None):
+        """Builds the index from every vector in a Chroma store."""
+        revisions = documentRevisions.snapshot() if revisions is None else revisions
+        for ids, vectors, metadatas in source.iterBatches():
+            self.add(ids, vectors, metadatas)
+        with self._lock:
+            self._revisions = dict(revisions)
+        self.persist()
+
+    def reconcile(self, source: ChromaVectorStore, revisions: Dict[str, int] = None) -> int:
+        """
+        Brings the index in line with Chroma: documents whose revision differs from the one this
+        index last recorded (writes lost by a crash before persist, or made by another process)
+        are re-imported, or dropped if Chroma no longer has them. Only the revision counters are
+        compared, so the cost follows the number of changed documents, not the corpus size.
+        Returns the number of documents changed.
+        """
+        revisions = documentRevisions.snapshot() if revisions is None else revisions
+        with self._lock:
+            changed = [(d, r) for d, r in revisions.items() if self._revisions.get(d) != r]
+        for docId, revision in changed:
+            ids, vectors, metadatas = source.getDocument(docId)
+            with self._lock:
+                self.deleteByDocId(docId)
+                if ids:
+                    self.add(ids, vectors, metadatas)
+                self._revisions[docId] = revision
+        if changed:
+            logger.info(f"Reconciled HNSW index with Chroma: {len(changed)} document(s) updated")
+        return len(changed)
+
+_store = None
+_storeLock = threading.Lock()
+
+def getVectorStore() -> VectorStore:
+    """The dense-search store for this process: HNSW when DENSE_SEARCH_BACKEND="hnsw", else Chroma."""
+    global _store
+    with _storeLock:
+        if _store is None:
+            from app.chromaClient import collection
+            chroma = ChromaVectorStore(collection)
+            if config.DENSE_SEARCH_BACKEND == "hnsw":
+                store = HnswVectorStore(fallback=chroma)
+                if store.load():
+                    if store.reconcile(chroma):
+                        store.persist()
+                elif chroma.count():
+                    logger.info("No persisted HNSW index, building it from Chroma")
+                    store.importFrom(chroma)
+                _store = store
+            else:
+                _store = chroma
+        return _store
+
+def getMirrorStore() -> VectorStore | None:
+    """A store that must receive DocumentStore's writes besides Chroma itself, if any."""
+    if config.DENSE_SEARCH_BACKEND != "hnsw":
+        return None
+    return getVectorStore()
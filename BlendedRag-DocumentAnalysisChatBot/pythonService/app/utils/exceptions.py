@@ -1,4 +1,13 @@
 class pdfProcessingError(Exception):
     def __init__(self, message="Failed to process PDF"):
         self.message = message
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class uploadRejectedError(pdfProcessingError):
+    """Upload refused before ingestion (wrong type, empty, not a PDF)."""
+    def __init__(self, message="Upload rejected"):
+        super().__init__(message)
+
+class uploadTooLargeError(uploadRejectedError):
+    def __init__(self, message="Upload exceeds the maximum allowed size"):
+        super().__init__(message)
@@ -0,0 +1,15 @@
+# app/utils/fileLock.py
+import os
+import fcntl
+from contextlib import contextmanager
+
+@contextmanager
+def fileLock(lockPath: str):
+    """Exclusive advisory lock shared by every process (API server, bulk CLI) using lockPath."""
+    os.makedirs(os.path.dirname(lockPath) or ".", exist_ok=True)
+    with open(lockPath, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,52 @@
+# app/utils/fileUtils.py
+import hashlib
+import os
+from fastapi import UploadFile
+from app import config
+from app.utils.exceptions import uploadRejectedError, uploadTooLargeError
+
+UPLOAD_BLOCK_SIZE = 1 << 20  # 1 MiB read/write blocks keep per-upload memory flat
+PDF_MAGIC = b"%PDF-"
+
+def maxUploadBytes() -> int:
+    return int(config.MAX_UPLOAD_SIZE_MB * 1024 * 1024)
+
+def safeFileName(fileName: str) -> str:
+    """Strips any client-supplied directory components."""
+    return os.path.basename(fileName or "") or "unknown.pdf"
+
+def checkFileType(fileName: str):
+    ext = os.path.splitext(fileName or "")[1].lower()
+    if ext not in config.ALLOWED_FILE_TYPES:
+        raise uploadRejectedError(f"Unsupported file type '{ext}' for {fileName}; allowed: {config.ALLOWED_FILE_TYPES}")
+
+async def streamUploadToDisk(file: UploadFile, filePath: str, maxBytes: int = None,
+                             blockSize: int = UPLOAD_BLOCK_SIZE, magic: bytes = PDF_MAGIC):
+    """
+    Copies an upload to filePath in fixed-size blocks, hashing on the fly.
+    Aborts (and removes the partial file) as soon as maxBytes is exceeded or the
+    content does not start with `magic`. Returns (bytesWritten, sha256 hex digest).
+    """
+    maxBytes = maxUploadBytes() if maxBytes is None else maxBytes
+    digest = hashlib.sha256()
+    total = 0
+    try:
+        with open(filePath, "wb") as out:
+            while True:
+                block = await file.read(blockSize)
+                if not block:
+                    break
+                if total == 0 and magic and not block.startswith(magic):
+                    raise uploadRejectedError(f"{file.filename} is not a valid PDF")
+                total += len(block)
+                if total > maxBytes:
+                    raise uploadTooLargeError(f"{file.filename} exceeds the {maxBytes // (1024 * 1024)} MB upload limit")
+                digest.update(block)
+                out.write(block)
+        if total == 0:
+            raise uploadRejectedError(f"Uploaded file is empty: {file.filename}")
+    except BaseException:
+        if os.path.exists(filePath):
+            os.remove(filePath)
+        raise
+    return total, digest.hexdigest()
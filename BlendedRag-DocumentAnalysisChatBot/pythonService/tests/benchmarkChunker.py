@@ -0,0 +1,64 @@
+# benchmarkChunker.py
+# Chunking throughput on large synthetic text: word-window chunkText vs TokenChunker
+# (whitespace offsets and, when transformers is installed, the embedding model's tokenizer).
+# Usage: python tests/benchmarkChunker.py [--mb 20] [--pages 2000]
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app import config
+from app.pdfParser.chunker import chunkText, TokenChunker, whitespaceOffsets, loadTokenizer, tokenizerOffsets
+
+VOCAB = ("retrieval augmented generation embeds document chunks into dense vectors while bm25 "
+         "scores sparse keyword overlap the ingestion pipeline parses pages tokenizes text and "
+         "stores offsets with page numbers for every chunk").split()
+
+def syntheticPages(totalMb: float, pages: int):
+    rng = random.Random(0)
+    perPage = int(totalMb * 1024 * 1024 / pages)
+    out = []
+    for p in range(1, pages + 1):
+        words, size = [], 0
+        while size < perPage:
+            w = rng.choice(VOCAB)
+            words.append(w)
+            size += len(w) + 1
+        out.append((p, " ".join(words)))
+    return out
+
+def report(name, elapsed, totalBytes, chunks):
+    print(f"{name:<28}: {elapsed:6.2f}s  {totalBytes / elapsed / 1e6:7.2f} MB/s  {len(chunks)} chunks")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=20.0, help="size of the synthetic document")
+    ap.add_argument("--pages", type=int, default=2000)
+    args = ap.parse_args()
+
+    pages = syntheticPages(args.mb, args.pages)
+    totalBytes = sum(len(t) for _, t in pages)
+    print(f"{len(pages)} pages, {totalBytes / 1e6:.1f} MB of text")
+
+    start = time.perf_counter()
+    chunks = chunkText("\n".join(t for _, t in pages), chunkSize=1000, chunkOverlap=200)
+    report("chunkText (1000 words)", time.perf_counter() - start, totalBytes, chunks)
+
+    start = time.perf_counter()
+    chunks = TokenChunker(whitespaceOffsets, config.CHUNK_MAX_TOKENS, config.CHUNK_OVERLAP_TOKENS).chunkPages(pages)
+    report("TokenChunker (whitespace)", time.perf_counter() - start, totalBytes, chunks)
+
+    try:
+        offsets = tokenizerOffsets(loadTokenizer(config.EMBEDDING_MODEL_NAME))
+    except Exception as e:
+        print(f"Skipping tokenizer benchmark: {e}")
+        return
+    start = time.perf_counter()
+    chunks = TokenChunker(offsets, config.CHUNK_MAX_TOKENS, config.CHUNK_OVERLAP_TOKENS).chunkPages(pages)
+    report("TokenChunker (model tokenizer)", time.perf_counter() - start, totalBytes, chunks)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# benchmarkEmbeddingBackends.py
+# Chunk embedding throughput of the torch, onnx and onnx-int8 backends on CPU.
+# Usage: python tests/benchmarkEmbeddingBackends.py [--chunks 2000] [--batch 64] [--backends torch,onnx,onnx-int8]
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.embeddings.embeddingEngine import EmbeddingEngine
+
+VOCAB = ("retrieval augmented generation embeds document chunks into dense vectors while bm25 "
+         "scores sparse keyword overlap the ingestion pipeline parses pages tokenizes text and "
+         "stores offsets with page numbers for every chunk").split()
+
+def syntheticChunks(n: int):
+    rng = random.Random(0)
+    # Mix of full-size chunks and short trailing ones, like real documents
+    return [" ".join(rng.choice(VOCAB) for _ in range(rng.choice((40, 120, 180, 180)))) for _ in range(n)]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=2000)
+    ap.add_argument("--batch", type=int, default=64, help="chunks per generateEmbeddings call")
+    ap.add_argument("--backends", default="torch,onnx,onnx-int8")
+    args = ap.parse_args()
+
+    chunks = syntheticChunks(args.chunks)
+    for backend in args.backends.split(","):
+        engine = EmbeddingEngine(backend=backend)
+        engine.warmup()
+        start = time.perf_counter()
+        for i in range(0, len(chunks), args.batch):
+            engine.generateEmbeddings(chunks[i:i + args.batch])
+        elapsed = time.perf_counter() - start
+        stats = engine.stats()
+        print(f"{backend:<10}: {len(chunks) / elapsed:8.1f} chunks/s  "
+              f"load {stats['loadSeconds']:.1f}s  model {stats['parameterBytes'] / 2**20:.0f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarkEmbeddingExecutor.py
+# Ingestion embedding throughput: document-order batches on the shared engine vs the
+# length-bucketed executor with 1..N worker processes.
+# Usage: python tests/benchmarkEmbeddingExecutor.py [--chunks 4000] [--workers 1,2,4] [--backend torch]
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.dirname(__file__))
+
+from benchmarkEmbeddingBackends import syntheticChunks
+from app.embeddings.embeddingEngine import EmbeddingEngine
+from app.embeddings.embeddingExecutor import EmbeddingExecutor
+
+def report(name, elapsed, n):
+    print(f"{name:<34}: {n / elapsed:8.1f} chunks/s  ({elapsed:.1f}s)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=4000)
+    ap.add_argument("--batch", type=int, default=64, help="batch size of the document-order baseline")
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--backend", default="torch")
+    args = ap.parse_args()
+
+    chunks = syntheticChunks(args.chunks)
+    engine = EmbeddingEngine(backend=args.backend)
+    engine.warmup()
+
+    start = time.perf_counter()
+    for i in range(0, len(chunks), args.batch):
+        engine.generateEmbeddings(chunks[i:i + args.batch])
+    report("document order, 1 process", time.perf_counter() - start, len(chunks))
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        executor = EmbeddingExecutor(engine, workers=workers)
+        executor.generateEmbeddings(chunks[:workers * executor.bucketSize])  # spawn workers and load models
+        start = time.perf_counter()
+        executor.generateEmbeddings(chunks)
+        report(f"bucketed, {workers} worker(s) x {executor.threadsPerWorker} thr", time.perf_counter() - start, len(chunks))
+        executor.shutdown()
+
+if __name__ == "__main__":
+    main()
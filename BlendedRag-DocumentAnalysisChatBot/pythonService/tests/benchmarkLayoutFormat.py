@@ -0,0 +1,91 @@
+# benchmarkLayoutFormat.py
+# Layout file size and write/read time: json.dump(indent=4) as written by pdf_to_layout_json
+# vs the binary page-framed format. Uses a synthetic layout, or a real one with --layout.
+# Usage: python tests/benchmarkLayoutFormat.py [--pages 500] [--spans 400] [--layout file.json]
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.pdfParser import layoutFormat
+from app.pdfParser.layoutFormat import LayoutWriter, LayoutReader
+
+FONTS = [("Times-Roman", 10.0), ("Times-Bold", 12.0), ("Helvetica", 9.0), ("Courier", 8.0)]
+WORDS = "layout extraction keeps one element per text span with font size and position".split()
+
+def syntheticLayout(pages: int, spans: int):
+    rng = random.Random(0)
+    out = []
+    for n in range(1, pages + 1):
+        elements = []
+        for i in range(spans):
+            name, size = rng.choice(FONTS)
+            elements.append({
+                "type": "textbox",
+                "position": {"x": rng.uniform(50, 500), "y": 60 + i * 1.7, "width": rng.uniform(20, 400), "height": size + 2},
+                "font": {"name": name, "size": size, "bold": "Bold" in name, "italic": False},
+                "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+            })
+        elements.append({"type": "image", "position": {"x": 40, "y": 40, "width": 80, "height": 30}, "src": "images/logo.png"})
+        out.append({"page_number": n, "width": 612.0, "height": 792.0, "text": "", "elements": elements})
+    return {"document": "synthetic.pdf", "fileHash": None, "pages": out}
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=500)
+    ap.add_argument("--spans", type=int, default=400, help="text spans per page")
+    ap.add_argument("--layout", help="existing layout JSON to use instead of synthetic data")
+    args = ap.parse_args()
+
+    if args.layout:
+        with open(args.layout, "r", encoding="utf-8") as f:
+            layout = json.load(f)
+    else:
+        layout = syntheticLayout(args.pages, args.spans)
+    print(f"{len(layout['pages'])} pages, codec: {'msgpack' if layoutFormat.msgpack else 'json'} frames")
+
+    with tempfile.TemporaryDirectory() as d:
+        jsonPath, binPath = os.path.join(d, "l.json"), os.path.join(d, "l.layout")
+
+        def writeJson():
+            with open(jsonPath, "w", encoding="utf-8") as f:
+                json.dump(layout, f, indent=4, ensure_ascii=False)
+
+        def readJson():
+            with open(jsonPath, "r", encoding="utf-8") as f:
+                return len(json.load(f)["pages"])
+
+        def writeBinary():
+            with LayoutWriter(binPath, layout["document"], layout["fileHash"]) as writer:
+                for page in layout["pages"]:
+                    writer.writePage(page)
+
+        def readBinary():
+            # Streaming: only one page is alive at a time
+            with LayoutReader(binPath) as reader:
+                return sum(1 for _ in reader.iterPages())
+
+        wj, _ = timed(writeJson)
+        rj, _ = timed(readJson)
+        wb, _ = timed(writeBinary)
+        rb, pages = timed(readBinary)
+        assert pages == len(layout["pages"])
+        sj, sb = os.path.getsize(jsonPath), os.path.getsize(binPath)
+
+    print(f"{'format':<10}{'size MB':>10}{'write s':>10}{'read s':>10}")
+    print(f"{'json':<10}{sj / 1e6:>10.1f}{wj:>10.2f}{rj:>10.2f}")
+    print(f"{'binary':<10}{sb / 1e6:>10.1f}{wb:>10.2f}{rb:>10.2f}")
+    print(f"binary is {sj / sb:.1f}x smaller")
+
+if __name__ == "__main__":
+    main()
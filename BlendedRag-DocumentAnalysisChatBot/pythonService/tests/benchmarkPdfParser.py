@@ -0,0 +1,52 @@
+# benchmarkPdfParser.py
+# Compares serial and process-pool text extraction.
+# Usage: python tests/benchmarkPdfParser.py [path/to/large.pdf] [--pages N]
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import fitz  # PyMuPDF
+from app.pdfParser.parser import extractPages
+
+def buildSyntheticPdf(path: str, pages: int):
+    """Writes a text-heavy PDF so the benchmark runs without a real manual at hand."""
+    doc = fitz.open()
+    line = "The quick brown fox jumps over the lazy dog while the parser benchmark keeps counting. "
+    for p in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 756), f"Page {p + 1}\n" + line * 40, fontsize=8)
+    doc.save(path)
+    doc.close()
+
+def timeIt(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdf", nargs="?", help="PDF to parse (a synthetic one is generated if omitted)")
+    ap.add_argument("--pages", type=int, default=2000, help="pages in the synthetic PDF")
+    ap.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    pdfPath = args.pdf
+    if not pdfPath:
+        pdfPath = os.path.join(tempfile.mkdtemp(), "benchmark.pdf")
+        print(f"Generating {args.pages}-page synthetic PDF at {pdfPath} ...")
+        buildSyntheticPdf(pdfPath, args.pages)
+
+    serialPages, serialTime = timeIt(lambda: extractPages(pdfPath, workers=1))
+    print(f"serial      : {len(serialPages)} pages in {serialTime:.2f}s ({len(serialPages) / serialTime:.0f} pages/s)")
+
+    for workers in sorted(set(args.workers)):
+        pages, elapsed = timeIt(lambda: extractPages(pdfPath, workers=workers))
+        assert pages == serialPages, "parallel extraction must match the serial output"
+        print(f"workers={workers:<4}: {len(pages)} pages in {elapsed:.2f}s ({len(pages) / elapsed:.0f} pages/s, {serialTime / elapsed:.2f}x)")
+
+if __name__ == "__main__":
+    main()
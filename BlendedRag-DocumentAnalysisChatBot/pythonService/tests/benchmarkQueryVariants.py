@@ -0,0 +1,41 @@
+# benchmarkQueryVariants.py
+# Per-variant retrieval (one embed + one search per variant) vs fusedRetrieveTopK (one batched
+# embed, one multi-vector search, RRF fusion) for 1..N refined variants of a query.
+# Usage: python tests/benchmarkQueryVariants.py <docId> ["query"] [--max-variants 8] [--repeat 20]
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes import queryRoutes
+from app.embeddings.queryEmbeddingCache import queryEmbeddingCache
+
+def timeIt(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        queryEmbeddingCache.clear()  # measure the encoder too, not just cache hits
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("docId")
+    ap.add_argument("query", nargs="?", default="What is the summary of this document?")
+    ap.add_argument("--max-variants", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--topk", type=int, default=5)
+    args = ap.parse_args()
+
+    variants = [args.query] + [f"{args.query} (aspect {i})" for i in range(1, args.max_variants)]
+    queryRoutes.fusedRetrieveTopK(args.docId, variants, args.topk)  # load model and index
+    print(f"{'variants':>8}{'looped ms':>12}{'fused ms':>11}")
+    for n in range(1, args.max_variants + 1):
+        qs = variants[:n]
+        looped = timeIt(lambda: [queryRoutes.chromaRetrieveTopK(args.docId, q, args.topk) for q in qs], args.repeat)
+        fused = timeIt(lambda: queryRoutes.fusedRetrieveTopK(args.docId, qs, args.topk), args.repeat)
+        print(f"{n:>8}{looped:>12.1f}{fused:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# benchmarkReconstruction.py
+# json_to_pdf reconstruction time on a several-hundred-page synthetic layout:
+# one process vs page ranges rendered in parallel and merged.
+# Usage: python tests/benchmarkReconstruction.py [--pages 400] [--spans 300] [--workers 4]
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(os.path.dirname(__file__))
+
+from benchmarkLayoutFormat import syntheticLayout
+from app.pdfParser.layoutFormat import writeLayout
+from json_to_pdf import reconstruct_pdf_from_json
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--spans", type=int, default=300, help="text spans per page")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--pages-per-part", type=int, default=50)
+    args = ap.parse_args()
+
+    layout = syntheticLayout(args.pages, args.spans)
+    with tempfile.TemporaryDirectory() as d:
+        layoutPath = os.path.join(d, "synthetic.layout")
+        writeLayout(layoutPath, layout)
+        timings = {}
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            out = reconstruct_pdf_from_json(layoutPath, os.path.join(d, f"out{workers}.pdf"),
+                                            workers=workers, pages_per_part=args.pages_per_part)
+            timings[workers] = time.perf_counter() - start
+            print(f"workers={workers:<3}: {timings[workers]:6.2f}s  {os.path.getsize(out) / 1e6:.1f} MB")
+    print(f"speedup: {timings[1] / timings[args.workers]:.2f}x on {args.pages} pages")
+
+if __name__ == "__main__":
+    main()
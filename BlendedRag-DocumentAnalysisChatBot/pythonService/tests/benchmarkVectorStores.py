@@ -0,0 +1,79 @@
+# benchmarkVectorStores.py
+# Chroma vs in-process HNSW behind the VectorStore interface: build time, recall@k against
+# exact search, and single-query latency, corpus-wide and filtered to one docId.
+# Uses an in-memory Chroma client and a temporary HNSW directory; nothing persistent is touched.
+# Usage: python tests/benchmarkVectorStores.py [--vectors 200000] [--doc-size 2000] [--queries 200] [--k 10]
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.storage.vectorStore import ChromaVectorStore, HnswVectorStore
+from app.storage.vectorIndex import normalizeRows
+
+def clusteredVectors(n: int, dim: int, rng) -> np.ndarray:
+    # Chunk embeddings cluster by topic; uniform random vectors would flatter every ANN index
+    centers = rng.normal(size=(max(1, n // 500), dim))
+    return normalizeRows(centers[rng.integers(len(centers), size=n)] + 0.35 * rng.normal(size=(n, dim)))
+
+def exactTopK(vectors: np.ndarray, queries: np.ndarray, k: int, rows: np.ndarray = None):
+    candidates = vectors if rows is None else vectors[rows]
+    best = np.argsort(-(queries @ candidates.T), axis=1)[:, :k]
+    return best if rows is None else rows[best]
+
+def measure(store, queries, k, docId=None):
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = store.search(q, k, docId=docId)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([int(h["id"]) for h in hits])
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), found
+
+def recall(found, truth, k):
+    return np.mean([len(set(f) & set(t.tolist())) / k for f, t in zip(found, truth)])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--doc-size", type=int, default=2000, help="chunks per synthetic docId")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--batch", type=int, default=5000)
+    args = ap.parse_args()
+
+    import chromadb
+    rng = np.random.default_rng(0)
+    vectors = clusteredVectors(args.vectors, args.dim, rng)
+    queries = normalizeRows(vectors[rng.integers(args.vectors, size=args.queries)] + 0.2 * rng.normal(size=(args.queries, args.dim)))
+    ids = [str(i) for i in range(args.vectors)]
+    metas = [{"docId": f"doc{i // args.doc_size}", "chunkIndex": i % args.doc_size} for i in range(args.vectors)]
+    docRows = np.arange(0, min(args.doc_size, args.vectors))
+
+    truth = exactTopK(vectors, queries, args.k)
+    docTruth = exactTopK(vectors, queries, args.k, docRows)
+
+    with tempfile.TemporaryDirectory() as d:
+        stores = {
+            "chroma": ChromaVectorStore(chromadb.EphemeralClient().get_or_create_collection("bench")),
+            "hnsw": HnswVectorStore(directory=d, dim=args.dim, maxElements=args.vectors)
+        }
+        print(f"{args.vectors} vectors x {args.dim}d, {args.queries} queries, k={args.k}")
+        print(f"{'store':<8}{'build s':>9}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'doc recall':>12}{'doc p50':>9}{'doc p95':>9}")
+        for name, store in stores.items():
+            start = time.perf_counter()
+            for b in range(0, args.vectors, args.batch):
+                store.add(ids[b:b + args.batch], vectors[b:b + args.batch], metas[b:b + args.batch])
+            build = time.perf_counter() - start
+            p50, p95, found = measure(store, queries, args.k)
+            dp50, dp95, docFound = measure(store, queries, args.k, docId="doc0")
+            print(f"{name:<8}{build:>9.1f}{recall(found, truth, args.k):>9.3f}{p50:>9.2f}{p95:>9.2f}"
+                  f"{recall(docFound, docTruth, args.k):>12.3f}{dp50:>9.2f}{dp95:>9.2f}")
+
+if __name__ == "__main__":
+    main()
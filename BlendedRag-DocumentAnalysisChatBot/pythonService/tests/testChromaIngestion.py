@@ -1,44 +1,33 @@
 # testChromaIngestion.py
 import asyncio
+import io
 from app.pdfParser.ingestor import processPdf
 from app.chromaClient import collection
-from app.embeddings.embeddingClient import EmbeddingClient
-from fastapi import UploadFile
-
-embeddingClient = EmbeddingClient()
 
 class DummyUploadFile:
     """Simulate UploadFile for local PDF"""
     def __init__(self, path, name):
         self.filename = name
-        self._path = path
+        with open(path, "rb") as f:
+            self._stream = io.BytesIO(f.read())
 
-    async def read(self):
-        with open(self._path, "rb") as f:
-            return f.read()
+    async def read(self, size: int = -1):
+        return self._stream.read(size)
 
 async def test():
     # Use a small PDF for testing
     testPdfPath = "data/sample.pdf"  # make sure this exists
     dummyFile = DummyUploadFile(testPdfPath, "sample.pdf")
 
-    # Process PDF
+    # Process PDF: ingestion writes every chunk to Chroma exactly once
     result = await processPdf(dummyFile)
     docId = result["docId"]
-    chunks = [c["text"] for c in result["chunks"]]
-
-    # Generate embeddings
-    embeddings = embeddingClient.generateEmbeddings(chunks)
 
-    # Add to Chroma collection
-    collection.add(
-        ids=[f"{docId}_{i}" for i in range(len(chunks))],
-        documents=chunks,
-        embeddings=embeddings,
-        metadatas=[{"docId": docId, "chunkIndex": i, "text": chunks[i]} for i in range(len(chunks))]
-    )
+    stored = collection.get(where={"docId": docId}, include=["metadatas", "documents"])
+    assert len(stored["ids"]) == result["numChunks"], "each chunk should be stored once"
+    assert all("text" not in md for md in stored["metadatas"]), "chunk text lives in documents only"
 
-    print(f"Stored {len(chunks)} chunks in Chroma for docId={docId}")
+    print(f"Stored {len(stored['ids'])} chunks in Chroma for docId={docId}")
 
 if __name__ == "__main__":
     asyncio.run(test())
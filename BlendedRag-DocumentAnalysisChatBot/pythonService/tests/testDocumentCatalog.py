@@ -0,0 +1,71 @@
+# testDocumentCatalog.py
+# Claims on identical content: a second uploader waits for the first ingestion and either
+# gets its entry or, if it failed, can claim the content itself.
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.storage.documentCatalog import DocumentCatalog
+
+def testWaitForSeesCompletionOrRelease():
+    with tempfile.TemporaryDirectory() as d:
+        catalog = DocumentCatalog(path=os.path.join(d, "catalog.json"))
+        assert catalog.claim("h1", "doc1") is None
+        assert catalog.claim("h1", "doc2") == {"docId": "doc1", "pending": True}
+
+        threading.Timer(0.05, catalog.complete, ("h1", "doc1", "a.pdf", 3, 7)).start()
+        assert catalog.waitFor("h1", timeout=5)["numChunks"] == 7
+
+        assert catalog.claim("h2", "doc3") is None
+        threading.Timer(0.05, catalog.release, ("h2",)).start()
+        assert catalog.waitFor("h2", timeout=5) is None
+        assert catalog.claim("h2", "doc4") is None  # the failed content can be claimed again
+
+def testWaitForTimesOut():
+    with tempfile.TemporaryDirectory() as d:
+        catalog = DocumentCatalog(path=os.path.join(d, "catalog.json"))
+        catalog.claim("h1", "doc1")
+        try:
+            catalog.waitFor("h1", timeout=0.05)
+            assert False, "expected TimeoutError"
+        except TimeoutError:
+            pass
+
+def testOnSettledCallsBackWithoutBlocking():
+    with tempfile.TemporaryDirectory() as d:
+        catalog = DocumentCatalog(path=os.path.join(d, "catalog.json"))
+        seen = []
+        catalog.onSettled("h0", seen.append)  # nothing pending: runs at once
+        catalog.claim("h1", "doc1")
+        catalog.onSettled("h1", seen.append)
+        assert seen == [None]
+        catalog.complete("h1", "doc1", "a.pdf", 3, 7)
+        assert seen[1]["docId"] == "doc1"
+
+        catalog.claim("h2", "doc2")
+        catalog.onSettled("h2", seen.append)
+        catalog.release("h2")
+        assert seen[2] is None and len(seen) == 3
+
+def testTwoProcessesMergeTheirEntries():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "catalog.json")
+        api, cli = DocumentCatalog(path=path), DocumentCatalog(path=path)  # each loads the empty file
+        api.claim("h1", "doc1")
+        cli.claim("h2", "doc2")
+        api.complete("h1", "doc1", "a.pdf", 1, 1)
+        cli.complete("h2", "doc2", "b.pdf", 1, 1)  # must not drop the API's entry
+        assert api.lookup("h2")["docId"] == "doc2"
+        assert DocumentCatalog(path=path).lookup("h1")["docId"] == "doc1"
+        api.forgetDocument("doc2")
+        assert cli.claim("h2", "doc3") is None
+
+if __name__ == "__main__":
+    testWaitForSeesCompletionOrRelease()
+    testWaitForTimesOut()
+    testOnSettledCallsBackWithoutBlocking()
+    testTwoProcessesMergeTheirEntries()
+    print("✅ document catalog")
@@ -0,0 +1,64 @@
+# testEmbeddingCache.py
+# Persistent embedding cache with a stand-in engine: only misses are encoded, vectors survive
+# a reopen, and the least recently used entries are evicted past maxEntries.
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.embeddings.embeddingCache import EmbeddingCache
+
+class CountingEngine:
+    def __init__(self):
+        self.encoded = []
+
+    def generateEmbeddings(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype=np.float32)
+
+def testOnlyMissesAreEncodedAndPersisted():
+    with tempfile.TemporaryDirectory() as d:
+        engine = CountingEngine()
+        cache = EmbeddingCache("test-model", 3, engine=engine, directory=d, maxEntries=100)
+        first = cache.embed(["alpha", "beta", "alpha"])
+        assert engine.encoded == ["alpha", "beta"]
+
+        # Normalized text (whitespace) hits the same entry; a new process sees the stored rows
+        reopened = EmbeddingCache("test-model", 3, engine=engine, directory=d, maxEntries=100)
+        second = reopened.embed(["  alpha ", "beta", "gamma"])
+        assert engine.encoded == ["alpha", "beta", "gamma"]
+        assert np.array_equal(second[:2], first[:2])
+        assert reopened.stats()["hits"] == 2 and reopened.stats()["misses"] == 1
+
+def testLeastRecentlyUsedAreEvicted():
+    with tempfile.TemporaryDirectory() as d:
+        engine = CountingEngine()
+        cache = EmbeddingCache("test-model", 3, engine=engine, directory=d, maxEntries=3)
+        for text in ("a1", "a2", "a3"):
+            cache.embed([text])
+        cache.embed(["a1"])  # refresh a1
+        cache.embed(["a4"])  # evicts a2, the oldest
+        engine.encoded.clear()
+        cache.embed(["a1", "a2"])
+        assert engine.encoded == ["a2"]
+        stats = cache.stats()
+        assert stats["entries"] == 3 and stats["evictions"] >= 1
+
+def testSlotReusedByAnotherProcessIsNotServed():
+    with tempfile.TemporaryDirectory() as d:
+        engine = CountingEngine()
+        mine = EmbeddingCache("test-model", 3, engine=engine, directory=d, maxEntries=1)
+        other = EmbeddingCache("test-model", 3, engine=engine, directory=d, maxEntries=1)
+        expected = mine.embed(["aaaa"])
+        other.embed(["b"])  # evicts "aaaa" and writes "b" into its slot
+        engine.encoded.clear()
+        assert np.array_equal(mine.embed(["aaaa"]), expected)
+        assert engine.encoded == ["aaaa"]
+
+if __name__ == "__main__":
+    testOnlyMissesAreEncodedAndPersisted()
+    testLeastRecentlyUsedAreEvicted()
+    testSlotReusedByAnotherProcessIsNotServed()
+    print("✅ embedding cache")
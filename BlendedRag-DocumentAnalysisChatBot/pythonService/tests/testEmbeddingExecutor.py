@@ -0,0 +1,34 @@
+# testEmbeddingExecutor.py
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.embeddings.embeddingExecutor import EmbeddingExecutor, lengthBuckets
+
+class RecordingEngine:
+    """Embeds text as [len(text), 0]; records each batch it is given."""
+    def __init__(self):
+        self.batches = []
+
+    def generateEmbeddings(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[len(t), 0.0] for t in texts], dtype=np.float32)
+
+def testBucketsGroupSimilarLengths():
+    assert lengthBuckets([5, 1, 9, 3, 7], 2) == [[2, 4], [0, 3], [1]]
+
+def testOriginalOrderIsRestored():
+    texts = ["x" * n for n in (3, 40, 1, 25, 7, 40, 2)]
+    engine = RecordingEngine()
+    executor = EmbeddingExecutor(engine, workers=1, bucketSize=3, lengthFn=lambda ts: [len(t) for t in ts])
+    vectors = executor.generateEmbeddings(texts)
+    assert vectors[:, 0].tolist() == [len(t) for t in texts]
+    assert [len(b) for b in engine.batches] == [3, 3, 1]
+    assert [len(t) for t in engine.batches[0]] == [40, 40, 25]
+
+if __name__ == "__main__":
+    testBucketsGroupSimilarLengths()
+    testOriginalOrderIsRestored()
+    print("✅ embedding executor")
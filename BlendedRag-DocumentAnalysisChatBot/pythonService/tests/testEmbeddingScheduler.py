@@ -0,0 +1,61 @@
+# testEmbeddingScheduler.py
+# Micro-batching against a stand-in engine: concurrent callers (threads and asyncio) get their
+# own rows back, in order, from fewer model calls than requests.
+import os
+import sys
+import time
+import asyncio
+import threading
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.embeddings.embeddingScheduler import EmbeddingScheduler
+
+class CountingEngine:
+    """Embeds "n" as [n, n]; records the size of every call."""
+    def __init__(self):
+        self.calls = []
+
+    def generateEmbeddings(self, texts):
+        self.calls.append(len(texts))
+        time.sleep(0.005)
+        return np.array([[float(t), float(t)] for t in texts], dtype=np.float32)
+
+def testThreadedCallersAreBatched():
+    engine = CountingEngine()
+    scheduler = EmbeddingScheduler(engine, maxBatchSize=16, maxWaitMs=20)
+    results = {}
+
+    def call(i):
+        results[i] = scheduler.embed([str(i), str(i + 1000)])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(24)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i in range(24):
+        assert results[i].tolist() == [[i, i], [i + 1000, i + 1000]]
+    assert len(engine.calls) < 24
+    assert max(engine.calls) <= 16
+    stats = scheduler.stats()
+    assert stats["batchSize"]["count"] == len(engine.calls)
+    assert stats["queueWaitMs"]["count"] == 24
+
+def testAsyncCallers():
+    engine = CountingEngine()
+    scheduler = EmbeddingScheduler(engine, maxBatchSize=64, maxWaitMs=20)
+
+    async def run():
+        return await asyncio.gather(*(scheduler.embedOneAsync(str(i)) for i in range(10)))
+
+    vectors = asyncio.run(run())
+    assert [v[0] for v in vectors] == list(range(10))
+    assert sum(engine.calls) == 10 and len(engine.calls) < 10
+
+if __name__ == "__main__":
+    testThreadedCallersAreBatched()
+    testAsyncCallers()
+    print("✅ embedding scheduler batches concurrent callers")
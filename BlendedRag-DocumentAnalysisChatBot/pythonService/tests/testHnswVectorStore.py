@@ -0,0 +1,109 @@
+# testHnswVectorStore.py
+# Needs hnswlib.
+import os
+import sys
+import tempfile
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("hnswlib")
+
+from app.storage.vectorStore import VectorStore, HnswVectorStore
+from app.storage.vectorIndex import normalizeRows
+
+def testAddSearchDeletePersistLoad():
+    rng = np.random.default_rng(0)
+    vectors = normalizeRows(rng.normal(size=(300, 32)))
+    ids = [f"doc{i % 3}_{i // 3}" for i in range(300)]
+    metas = [{"docId": f"doc{i % 3}", "chunkIndex": i // 3} for i in range(300)]
+    with tempfile.TemporaryDirectory() as d:
+        store = HnswVectorStore(directory=d, dim=32, maxElements=64)  # forces a resize
+        store.add(ids, vectors, metas)
+
+        hit = store.search(vectors[4], 1)[0][0]
+        assert hit["id"] == ids[4] and hit["distance"] < 1e-4
+        filtered = store.search(vectors[4], 5, docId="doc2")[0]
+        assert len(filtered) == 5 and all(h["meta"]["docId"] == "doc2" for h in filtered)
+
+        store.deleteByDocId("doc1")
+        assert store.count() == 200 and store.search(vectors[4], 5, docId="doc1") == [[]]
+        store.persist()
+
+        reloaded = HnswVectorStore(directory=d, dim=32)
+        assert reloaded.load() and reloaded.count() == 200
+        assert reloaded.search(vectors[0], 1)[0][0]["id"] == ids[0]
+
+class MemorySource(VectorStore):
+    """Stand-in for the Chroma store: the source of truth that reconcile() and search fall back to."""
+    def __init__(self):
+        self.rows = {}  # id -> (vector, meta)
+
+    def add(self, ids, vectors, metadatas, documents=None):
+        for cid, v, md in zip(ids, vectors, metadatas):
+            self.rows[cid] = (np.asarray(v, dtype=np.float32), md)
+
+    def deleteIds(self, ids):
+        for cid in ids:
+            self.rows.pop(cid, None)
+
+    def deleteByDocId(self, docId):
+        self.deleteIds([cid for cid, (_, md) in self.rows.items() if md["docId"] == docId])
+
+    def search(self, queryVectors, topK, docId=None):
+        return [[{"id": cid, "distance": 0.0, "meta": md, "text": "from source"}
+                 for cid, (_, md) in self.rows.items() if md["docId"] == docId][:topK]]
+
+    def count(self):
+        return len(self.rows)
+
+    def getDocument(self, docId):
+        ids = [cid for cid, (_, md) in self.rows.items() if md["docId"] == docId]
+        vectors = np.array([self.rows[cid][0] for cid in ids], dtype=np.float32)
+        return ids, vectors, [self.rows[cid][1] for cid in ids]
+
+def testReconcileRepairsLostWritesAndFallsBack():
+    rng = np.random.default_rng(1)
+    vectors = normalizeRows(rng.normal(size=(40, 16)))
+    metas = [{"docId": f"doc{i // 10}", "chunkIndex": i % 10} for i in range(40)]
+    ids = [f"doc{i // 10}_{i % 10}" for i in range(40)]
+    source = MemorySource()
+    source.add(ids, vectors, metas)
+    revisions = {f"doc{d}": 1 for d in range(4)}
+    with tempfile.TemporaryDirectory() as d:
+        store = HnswVectorStore(directory=d, dim=16, fallback=source)
+        store.add(ids[:20], vectors[:20], metas[:20])
+        store.markRevision("doc0", 1)
+        store.markRevision("doc1", 1)
+        store.persist()
+        # Written after the last persist, then lost: doc2 and doc3 are unknown, doc1 got a new revision
+        store.add(ids[20:], vectors[20:], metas[20:])
+        source.rows["doc1_0"] = (vectors[39], metas[10])
+        revisions["doc1"] = 2
+        # Deleted by another process: its revision moves and Chroma no longer has it
+        source.deleteByDocId("doc0")
+        revisions["doc0"] = 2
+
+        reloaded = HnswVectorStore(directory=d, dim=16, fallback=source)
+        assert reloaded.load() and reloaded.count() == 20
+        assert reloaded.search(vectors[25], 1, docId="doc2")[0][0]["text"] == "from source"
+        assert reloaded.reconcile(source, revisions) == 4
+        assert reloaded.count() == 30 and reloaded.reconcile(source, revisions) == 0
+        assert reloaded.search(vectors[39], 1, docId="doc1")[0][0]["id"] == "doc1_0"
+        assert reloaded.search(vectors[0], 1, docId="doc0")[0] == []
+
+def testIncompleteBackendFailsOnConstruction():
+    class NoSearch(VectorStore):
+        def add(self, ids, vectors, metadatas, documents=None): pass
+        def deleteIds(self, ids): pass
+        def deleteByDocId(self, docId): pass
+        def count(self): return 0
+    with pytest.raises(TypeError):
+        NoSearch()
+
+if __name__ == "__main__":
+    testAddSearchDeletePersistLoad()
+    testReconcileRepairsLostWritesAndFallsBack()
+    testIncompleteBackendFailsOnConstruction()
+    print("✅ HNSW vector store")
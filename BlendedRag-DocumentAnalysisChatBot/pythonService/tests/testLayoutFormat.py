@@ -0,0 +1,53 @@
+# testLayoutFormat.py
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.pdfParser.layoutFormat import writeLayout, readLayout, LayoutReader, LayoutWriter, isBinaryLayout, toColumnar, fromColumnar
+
+def samplePage(n):
+    return {
+        "page_number": n, "width": 612.0, "height": 792.0, "text": f"Page {n}\n",
+        "elements": [
+            {"type": "textbox", "position": {"x": 72.0, "y": 70.5, "width": 100.25, "height": 12.0},
+             "font": {"name": "Times-Bold", "size": 14.0, "bold": True, "italic": False}, "content": f"Page {n}"},
+            {"type": "image", "position": {"x": 10, "y": 10, "width": 50, "height": 50}, "src": "images/abc.png"},
+            {"type": "textbox", "position": {"x": 72.0, "y": 90.0, "width": 300.0, "height": 10.0},
+             "font": {"name": "Times-Roman", "size": 10.0, "bold": False, "italic": False}, "content": "héllo"},
+            {"type": "table", "position": {"x": 0, "y": 0, "width": 1, "height": 1}, "content": [["a", "b"], ["1", ""]]},
+        ]
+    }
+
+def testColumnarRoundTrip():
+    page = samplePage(1)
+    assert fromColumnar(toColumnar(page)) == page
+
+def testFileRoundTripStreamsPages():
+    layout = {"document": "doc.pdf", "fileHash": "ff", "pages": [samplePage(n) for n in range(1, 6)]}
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "doc.layout")
+        writeLayout(path, layout)
+        assert isBinaryLayout(path)
+        assert readLayout(path) == layout
+        with LayoutReader(path) as reader:
+            assert reader.header == {"document": "doc.pdf", "fileHash": "ff"}
+            assert next(reader.iterPages()) == layout["pages"][0]
+
+def testFailedWriteLeavesNoLayout():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "doc.layout")
+        try:
+            with LayoutWriter(path, "doc.pdf") as writer:
+                writer.writePage(samplePage(1))
+                raise RuntimeError("crash mid-write")
+        except RuntimeError:
+            pass
+        assert os.listdir(d) == []
+
+if __name__ == "__main__":
+    testColumnarRoundTrip()
+    testFileRoundTripStreamsPages()
+    testFailedWriteLeavesNoLayout()
+    print("✅ layout format round trips")
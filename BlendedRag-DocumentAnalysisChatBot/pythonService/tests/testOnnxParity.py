@@ -0,0 +1,38 @@
+# testOnnxParity.py
+# The ONNX Runtime backends must agree with the PyTorch SentenceTransformer output.
+# Needs sentence-transformers, onnx and onnxruntime; the first run exports the model.
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from app.embeddings.embeddingEngine import EmbeddingEngine
+
+TEXTS = [
+    "What is the total revenue reported for the fiscal year?",
+    "Blended retrieval combines BM25 keyword scores with dense vector similarity.",
+    "short",
+    "The agreement may be terminated by either party with thirty days written notice. " * 12,  # > 256 tokens
+]
+
+def cosines(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+def testOnnxMatchesTorch():
+    reference = EmbeddingEngine(backend="torch").generateEmbeddings(TEXTS)
+    for backend, minCosine in (("onnx", 0.999), ("onnx-int8", 0.98)):
+        vectors = EmbeddingEngine(backend=backend).generateEmbeddings(TEXTS)
+        assert vectors.shape == reference.shape
+        worst = cosines(vectors, reference).min()
+        print(f"{backend}: min cosine vs torch = {worst:.5f}")
+        assert worst >= minCosine, f"{backend} drifted from torch (min cosine {worst:.5f})"
+
+if __name__ == "__main__":
+    testOnnxMatchesTorch()
+    print("✅ ONNX backends agree with PyTorch")
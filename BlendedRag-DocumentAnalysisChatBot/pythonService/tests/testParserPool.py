@@ -0,0 +1,52 @@
+# testParserPool.py
+# One contiguous range per worker, one spawned pool per size reused across calls, and pooled
+# page batches identical to serial ones.
+import os
+import sys
+import math
+import tempfile
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.pdfParser.parserPool import getParserPool, splitContiguous, shutdownParserPools
+
+def testSplitContiguous():
+    ranges = splitContiguous(list(range(10)), 4)
+    assert ranges == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert splitContiguous(range(3), 8) == [range(0, 1), range(1, 2), range(2, 3)]
+    assert splitContiguous([], 4) == []
+
+def testPoolIsSharedAndSpawned():
+    try:
+        pool = getParserPool(2)
+        assert getParserPool(2) is pool
+        assert pool._mp_context.get_start_method() == "spawn"
+        assert list(pool.map(math.sqrt, [4, 9])) == [2.0, 3.0]
+    finally:
+        shutdownParserPools()
+
+def testPooledBatchesMatchSerial():
+    fitz = pytest.importorskip("fitz")
+    from app.pdfParser.parser import iterPageBatches
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "pages.pdf")
+        with fitz.open() as doc:
+            for i in range(70):
+                doc.new_page().insert_text((72, 72), f"page {i + 1}")
+            doc.save(path)
+        try:
+            serial = list(iterPageBatches(path, batchSize=16, workers=1))
+            pooled = list(iterPageBatches(path, batchSize=16, workers=2))  # ranges of 32 pages, 2 in flight
+            assert pooled == serial and [len(b) for b in pooled] == [16, 16, 16, 16, 6]
+            batches = iterPageBatches(path, batchSize=16, workers=2)
+            assert next(batches)[0][0] == 1
+            batches.close()  # stopping early cancels the ranges still queued
+        finally:
+            shutdownParserPools()
+
+if __name__ == "__main__":
+    testSplitContiguous()
+    testPoolIsSharedAndSpawned()
+    testPooledBatchesMatchSerial()
+    print("✅ parser pool")
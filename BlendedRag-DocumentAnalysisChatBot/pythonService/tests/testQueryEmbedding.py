@@ -1,6 +1,7 @@
 # testQueryEmbedding.py
 import asyncio
 from app.routes import queryRoutes
+from app.embeddings.embeddingEngine import embeddingEngine
 
 async def test_query():
     # Replace this with a docId that you ingested earlier
@@ -10,7 +11,7 @@ async def test_query():
     test_query = "What is the summary of this document?"
 
     # Generate embedding using your client
-    embedding = queryRoutes.embedding_client.generateEmbedding(test_query)
+    embedding = embeddingEngine.generateEmbedding(test_query)
     print("Query embedding shape:", embedding.shape)  # Should be (384,)
 
     # Use chromaRetrieveTopK to see if retrieval works
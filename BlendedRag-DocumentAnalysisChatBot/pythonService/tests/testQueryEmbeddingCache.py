@@ -0,0 +1,45 @@
+# testQueryEmbeddingCache.py
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.embeddings.queryEmbeddingCache import QueryEmbeddingCache
+
+class CountingEmbedder:
+    """Stand-in for the scheduler: embeds text as [len(text)] * 4."""
+    def __init__(self):
+        self.encoded = []
+
+    def embed(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[len(t)] * 4 for t in texts], dtype=np.float32)
+
+    def embedOne(self, text):
+        return self.embed([text])[0]
+
+def testRepeatedQueriesSkipTheEncoder():
+    embedder = CountingEmbedder()
+    cache = QueryEmbeddingCache(embedder, maxEntries=10, maxBytes=1 << 20, ttlSeconds=60)
+    cache.embedOne("what is the revenue?")
+    cache.embedOne("what is  the revenue? ")
+    vectors = cache.embedMany(["what is the revenue?", "net income", "net income"])
+    assert embedder.encoded == ["what is the revenue?", "net income"]
+    assert vectors.shape == (3, 4)
+    assert cache.stats()["hits"] == 2
+
+def testBoundsAndTtl():
+    embedder = CountingEmbedder()
+    cache = QueryEmbeddingCache(embedder, maxEntries=100, maxBytes=16 * 2, ttlSeconds=0.05)
+    for q in ("a", "b", "c"):
+        cache.embedOne(q)  # 16 bytes each: only two fit
+    assert cache.stats()["entries"] == 2 and cache.get("a") is None
+    time.sleep(0.06)
+    assert cache.get("c") is None  # expired
+
+if __name__ == "__main__":
+    testRepeatedQueriesSkipTheEncoder()
+    testBoundsAndTtl()
+    print("✅ query embedding cache")
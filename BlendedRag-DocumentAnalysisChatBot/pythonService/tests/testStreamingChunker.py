@@ -0,0 +1,17 @@
+from app.pdfParser.chunker import chunkText, StreamingChunker
+
+def test_streaming_matches_chunk_text():
+    pages = [" ".join(f"p{p}w{w}" for w in range(37 * p % 90)) for p in range(1, 25)]
+    expected = chunkText("\n".join(pages), chunkSize=20, chunkOverlap=5)
+
+    chunker = StreamingChunker(chunkSize=20, chunkOverlap=5)
+    streamed = []
+    for page in pages:
+        streamed.extend(chunker.feed(page))
+    streamed.extend(chunker.flush())
+    assert streamed == expected
+
+def test_streaming_empty_input():
+    chunker = StreamingChunker(chunkSize=20, chunkOverlap=5)
+    assert chunker.feed("   ") == []
+    assert chunker.flush() == []
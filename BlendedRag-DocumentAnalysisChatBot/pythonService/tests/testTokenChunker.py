@@ -0,0 +1,42 @@
+from app.pdfParser.chunker import TokenChunker, whitespaceOffsets
+
+PAGES = [(p, " ".join(f"p{p}w{w}" for w in range(23 * p % 70))) for p in range(1, 30)]
+DOCUMENT = "\n".join(text for _, text in PAGES)
+
+def test_chunks_respect_token_budget_and_offsets():
+    chunks = TokenChunker(maxTokens=40, overlapTokens=8).chunkPages(PAGES)
+    assert chunks
+    for c in chunks:
+        assert c["tokenCount"] <= 40
+        assert c["text"] == DOCUMENT[c["charStart"]:c["charEnd"]]
+        assert c["text"].split()[0].startswith(f"p{c['pageStart']}w")
+        assert c["text"].split()[-1].startswith(f"p{c['pageEnd']}w")
+
+def test_chunks_cover_document_with_overlap():
+    chunks = TokenChunker(maxTokens=40, overlapTokens=8).chunkPages(PAGES)
+    words = whitespaceOffsets(DOCUMENT)
+    assert chunks[0]["charStart"] == words[0][0]
+    assert chunks[-1]["charEnd"] == words[-1][1]
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert cur["charStart"] < prev["charEnd"]  # overlapping windows, no gaps
+
+def test_word_pieces_are_not_split_across_chunks():
+    def pieceOffsets(text):
+        # Mimic word-piece tokenization: every word becomes 2-character pieces
+        return [(s, min(s + 2, e)) for ws, e in whitespaceOffsets(text) for s in range(ws, e, 2)]
+
+    chunks = TokenChunker(tokenOffsets=pieceOffsets, maxTokens=40, overlapTokens=8).chunkPages(PAGES)
+    words = {w for _, text in PAGES for w in text.split()}
+    for c in chunks:
+        assert c["tokenCount"] <= 40
+        assert all(w in words for w in c["text"].split())
+
+def test_anchored_pages_keep_chunks_of_unedited_pages():
+    chunker = TokenChunker(maxTokens=40, overlapTokens=8, anchorPages=True)
+    before = chunker.chunkPages(PAGES)
+    edited = [(p, "inserted words here " + text if p == 3 else text) for p, text in PAGES]
+    after = chunker.chunkPages(edited)
+    assert all(c["pageStart"] == c["pageEnd"] for c in before)
+    unchanged = lambda chunks: [c["text"] for c in chunks if c["pageStart"] != 3]
+    assert unchanged(before) == unchanged(after)
+    assert {c["text"] for c in after} - {c["text"] for c in before}  # page 3 did change
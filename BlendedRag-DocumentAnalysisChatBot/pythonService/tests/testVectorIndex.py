@@ -0,0 +1,36 @@
+# testVectorIndex.py
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.storage.vectorIndex import VectorIndex, normalizeRows
+
+def testStagedBatchesCommitAndSearchExactly():
+    rng = np.random.default_rng(0)
+    vectors = normalizeRows(rng.normal(size=(500, 16)))
+    queries = normalizeRows(rng.normal(size=(3, 16)))
+    with tempfile.TemporaryDirectory() as d:
+        index = VectorIndex(directory=d, dim=16, maxLoaded=1)
+        for start in range(0, 500, 128):  # streaming ingestion writes batch by batch
+            index.stageVectors("doc", start, vectors[start:start + 128])
+        assert index.search("doc", queries, 5) is None  # not searchable before commit
+        assert index.commitDocument("doc", 500)
+
+        rows, scores = index.search("doc", queries, 5)
+        expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+        assert np.array_equal(rows, expected)
+        assert np.all(np.diff(scores, axis=1) <= 0)
+
+        index.writeDocument("other", vectors[:3])
+        assert index.search("other", queries[0], 10)[0].shape == (1, 3)
+        assert len(index._loaded) == 1  # LRU bound
+
+        index.deleteDocument("doc")
+        assert not index.hasDocument("doc") and index.search("doc", queries, 5) is None
+
+if __name__ == "__main__":
+    testStagedBatchesCommitAndSearchExactly()
+    print("✅ vector index")